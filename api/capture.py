@@ -0,0 +1,205 @@
+"""
+Opt-in traffic capture for load replay.
+
+When TRAFFIC_CAPTURE_PATH is set, every request (apart from excluded paths)
+is appended to that file as one JSON line holding its arrival time, method,
+path, sanitized body, status, duration and request/response sizes. Unless
+TRAFFIC_CAPTURE_REDACT_TEXT is turned off, free-text fields (query, text) are
+replaced with same-length filler, so payload sizes survive but content does
+not, and ids (sessionId, object_id) are replaced with a stable hash, so
+distinct sessions stay distinct on replay. Other values, such as status and
+position, are kept because the endpoints validate them. The
+request path only enqueues the raw data; parsing, sanitizing and writing
+happen on a background thread. benchmarks/replay.py consumes these files.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+from config.logging_config import DroppingQueueHandler
+from config.settings import settings
+
+# Body keys whose values are never written, compared case-insensitively without underscores
+SENSITIVE_KEYS = {"username", "authorization", "cookie"}
+SENSITIVE_SUFFIXES = ("password", "secret", "apikey", "accesstoken", "authtoken")
+REDACTED = "[REDACTED]"
+# Free-text keys masked with redact_text, compared like SENSITIVE_KEYS
+TEXT_KEYS = {"query", "text"}
+
+_capture_loggers = {}
+
+
+def _normalize_key(key: str) -> str:
+    return key.lower().replace("_", "").replace("-", "")
+
+
+def _is_sensitive(key: str) -> bool:
+    normalized = _normalize_key(key)
+    return normalized in SENSITIVE_KEYS or normalized.endswith(SENSITIVE_SUFFIXES)
+
+
+def _is_id(key: str) -> bool:
+    return key.lower() == "id" or key.endswith(("Id", "ID", "_id", "-id"))
+
+
+def _mask(value):
+    """Same-length filler for every string in a value."""
+    if isinstance(value, str):
+        return "x" * len(value)
+    if isinstance(value, list):
+        return [_mask(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _mask(item) for key, item in value.items()}
+    return value
+
+
+def pseudonym(value: str) -> str:
+    """A stable stand-in for an id: equal ids map to equal pseudonyms."""
+    return "id-" + hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def sanitize(value, redact_text: bool = False):
+    """Redact sensitive keys and optionally mask free text and ids in a JSON value."""
+    if isinstance(value, dict):
+        sanitized = {}
+        for key, item in value.items():
+            if _is_sensitive(key):
+                sanitized[key] = REDACTED
+            elif redact_text and _normalize_key(key) in TEXT_KEYS:
+                sanitized[key] = _mask(item)
+            elif redact_text and _is_id(key) and isinstance(item, str):
+                sanitized[key] = pseudonym(item)
+            else:
+                sanitized[key] = sanitize(item, redact_text)
+        return sanitized
+    if isinstance(value, list):
+        return [sanitize(item, redact_text) for item in value]
+    return value
+
+
+class CaptureFormatter(logging.Formatter):
+    """Turn a captured exchange into a JSONL line (runs on the writer thread)."""
+
+    def __init__(self, redact_text: bool = True):
+        super().__init__()
+        self.redact_text = redact_text
+
+    def format(self, record):
+        entry = dict(record.capture)
+        raw_body = entry.pop("raw_body", b"")
+        body = None
+        if raw_body and not entry.get("body_truncated"):
+            try:
+                body = sanitize(json.loads(raw_body), self.redact_text)
+            except (ValueError, UnicodeDecodeError):
+                body = None
+                entry["body_encoding"] = "omitted"
+        entry["body"] = body
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class _CaptureQueueHandler(DroppingQueueHandler):
+    def prepare(self, record):
+        # The formatter needs record.capture intact; nothing to merge
+        return record
+
+
+def create_capture_logger(path: str, redact_text: bool = True, max_bytes: int = None):
+    """Build a non-propagating logger that writes captures to path via a background thread.
+
+    Loggers are cached per path so rebuilding the app does not duplicate lines.
+    """
+    if path in _capture_loggers:
+        return _capture_loggers[path]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes or settings.TRAFFIC_CAPTURE_MAX_BYTES, backupCount=1, encoding="utf-8"
+    )
+    file_handler.setFormatter(CaptureFormatter(redact_text))
+
+    capture_queue = queue.Queue(maxsize=10000)
+    listener = logging.handlers.QueueListener(capture_queue, file_handler)
+    listener.start()
+
+    capture_logger = logging.getLogger(f"traffic.capture.{len(_capture_loggers)}")
+    capture_logger.propagate = False
+    capture_logger.setLevel(logging.INFO)
+    capture_logger.addHandler(_CaptureQueueHandler(capture_queue))
+    atexit.register(listener.stop)
+
+    _capture_loggers[path] = (capture_logger, listener)
+    return _capture_loggers[path]
+
+
+class TrafficCaptureMiddleware:
+    """Record request/response metadata for later replay."""
+
+    def __init__(self, app, path: str = None, exclude=None, redact_text: bool = None, max_body_bytes: int = None):
+        self.app = app
+        self.exclude = tuple(settings.TRAFFIC_CAPTURE_EXCLUDE if exclude is None else exclude)
+        self.max_body_bytes = settings.TRAFFIC_CAPTURE_MAX_BODY_BYTES if max_body_bytes is None else max_body_bytes
+        if redact_text is None:
+            redact_text = settings.TRAFFIC_CAPTURE_REDACT_TEXT
+        self.logger, self.listener = create_capture_logger(path or settings.TRAFFIC_CAPTURE_PATH, redact_text)
+        self.started = time.time()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+
+        arrival = time.time()
+        start = time.perf_counter()
+        body_chunks = []
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+        max_body_bytes = self.max_body_bytes
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                request_bytes += len(chunk)
+                if request_bytes <= max_body_bytes:
+                    body_chunks.append(chunk)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            content_type = ""
+            for name, value in scope.get("headers", ()):
+                if name == b"content-type":
+                    content_type = value.decode("latin-1")
+                    break
+            self.logger.info("capture", extra={"capture": {
+                "ts": arrival,
+                "offset_s": round(arrival - self.started, 6),
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "content_type": content_type,
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "request_bytes": request_bytes,
+                "response_bytes": response_bytes,
+                "body_truncated": request_bytes > max_body_bytes,
+                "raw_body": b"".join(body_chunks),
+            }})
@@ -7,14 +7,15 @@ from pathlib import Path
 import logging
 import json
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 # Add parent directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
+
+# Set up logging
+from config.logging_config import setup_logging
+setup_logging()
+logger = logging.getLogger(__name__)
 logger.info(f"Project root added to path: {parent_dir}")
 
 # Create writable directories in /tmp if on Vercel
@@ -1,7 +1,8 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 import logging
 import sys
@@ -14,12 +15,23 @@ except ImportError:
     # If that fails, try to add parent directory to path for direct script execution
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
     from api.routes import router  # Absolute import (when run directly)
+from api.capture import TrafficCaptureMiddleware
+from api.middleware import RateLimitMiddleware, RequestContextMiddleware
+from config.logging_config import setup_logging
+from config.settings import settings
+from core import metrics
+from core.assets import AssetStore, REVALIDATE_CACHE_CONTROL
+from core.retention import retention_loop
 
-# Configure logging
-logging.basicConfig(level=logging.WARNING)  # Set global logging level to WARNING
-# Suppress specific loggers
-logging.getLogger("httpx").setLevel(logging.WARNING)
-logging.getLogger("pygame").setLevel(logging.WARNING)
+# Configure logging (queue-based, shared by every entry point)
+setup_logging()
+
+def _first_existing(paths, check):
+    """Return the first path that passes the given check, or None."""
+    for path in paths:
+        if check(path):
+            return path
+    return None
 
 def create_app():
     app = FastAPI(
@@ -28,6 +40,12 @@ def create_app():
         version="1.0.0",
     )
 
+    # Optional per-client limit, counted across all workers (set RATE_LIMIT_PER_MINUTE)
+    if settings.RATE_LIMIT_PER_MINUTE > 0:
+        app.add_middleware(
+            RateLimitMiddleware, limit=settings.RATE_LIMIT_PER_MINUTE, trusted_hops=settings.TRUSTED_PROXY_HOPS
+        )
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -37,65 +55,75 @@ def create_app():
         allow_headers=["*"],
     )
 
+    # Request ids and access timing for every request
+    app.add_middleware(RequestContextMiddleware)
+
+    # Opt-in traffic capture for load replay (set TRAFFIC_CAPTURE_PATH)
+    if settings.TRAFFIC_CAPTURE_PATH:
+        logging.info(f"Capturing traffic to: {settings.TRAFFIC_CAPTURE_PATH}")
+        app.add_middleware(TrafficCaptureMiddleware, path=settings.TRAFFIC_CAPTURE_PATH)
+
     app.include_router(router)
 
-    # Mount static directories if they exist
-    # Try both absolute and relative paths for static directories
-    static_paths = ["static", os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")]
-    template_paths = ["templates", os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")]
-    for path in static_paths:
-        if os.path.isdir(path):
-            logging.info(f"Mounting static directory at: {path}")
-            app.mount("/static", StaticFiles(directory=path), name="static")
-            break
-    
-    for path in template_paths:
-        if os.path.isdir(path):
-            logging.info(f"Mounting templates directory at: {path}")
-            app.mount("/templates", StaticFiles(directory=path), name="templates")
-            break
-            
+    # Periodic history retention; workers share one run per interval (0 disables it)
+    if settings.RETENTION_INTERVAL > 0:
+        @app.on_event("startup")
+        async def start_retention():
+            app.state.retention_task = asyncio.create_task(retention_loop(settings.RETENTION_INTERVAL))
+
+        @app.on_event("shutdown")
+        async def stop_retention():
+            app.state.retention_task.cancel()
+
+    # Locate static and template directories once
+    # Try both relative and absolute paths
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    static_dir = _first_existing(["static", os.path.join(project_root, "static")], os.path.isdir)
+    template_dir = _first_existing(["templates", os.path.join(project_root, "templates")], os.path.isdir)
+    template_path = _first_existing(
+        ["templates/bot.html", os.path.join(project_root, "templates/bot.html")], os.path.isfile
+    )
+
+    # Static assets and the UI template are loaded and compressed once at startup
+    assets = AssetStore(static_dir=static_dir, template_path=template_path)
+    app.state.assets = assets
+
+    if template_dir:
+        logging.info(f"Mounting templates directory at: {template_dir}")
+        app.mount("/templates", StaticFiles(directory=template_dir), name="templates")
+
+    @app.get("/static/{path:path}", include_in_schema=False)
+    async def static_files(path: str, request: Request):
+        return assets.serve_static(request, path)
+
+    # Resolve the favicon once instead of probing the filesystem per request
+    favicon_path = next((p for p in ("SVG/bot.svg", "favicon.ico") if p in assets.static), None)
+    if not favicon_path:
+        logging.warning("Favicon not found")
+
     @app.get("/favicon.ico", include_in_schema=False)
-    async def favicon():
-        # Try multiple potential paths for favicon
-        favicon_paths = [
-            "static/SVG/bot.svg",
-            os.path.join(os.path.dirname(os.path.dirname(__file__)), "static/SVG/bot.svg"),
-            "static/favicon.ico",
-            os.path.join(os.path.dirname(os.path.dirname(__file__)), "static/favicon.ico")
-        ]
-        
-        for path in favicon_paths:
-            if os.path.exists(path):
-                logging.info(f"Serving favicon from: {path}")
-                return FileResponse(path)
-            logging.warning("Favicon not found")
-        return None
-        
+    async def favicon(request: Request):
+        if not favicon_path:
+            return None
+        return assets.serve_static(request, favicon_path)
+
     @app.get("/", response_class=HTMLResponse)
-    async def read_root():
-        # Try multiple potential paths for the template file
-        template_paths = [
-            "templates/bot.html",
-            os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates/bot.html")
-        ]
-        
-        for path in template_paths:
-            if os.path.exists(path):
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        logging.info(f"Loading template from: {path}")
-                        return HTMLResponse(content=f.read(), status_code=200)
-                except Exception as e:
-                    logging.error(f"Error reading template file {path}: {str(e)}")
-          # Fallback HTML content
+    async def read_root(request: Request):
+        if assets.template is not None:
+            return assets.template.response(request, REVALIDATE_CACHE_CONTROL)
+        # Fallback HTML content
         logging.warning("Template file not found, serving default HTML")
         return HTMLResponse(content="<h1>Myra ChatBot API</h1><p>API is running. Use endpoints to interact with the chatbot.</p>")
-        
+
     @app.get("/health")
     async def health():
         return {"status": "healthy"}
         
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Expose latency histograms and counters in Prometheus text format"""
+        return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
     @app.get("/env-check")
     async def env_check():
         """Check environment variables (non-sensitive ones)"""
@@ -0,0 +1,131 @@
+"""
+ASGI middleware shared by the FastAPI application.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from config.logging_config import request_id_var
+from core.metrics import HTTP_REQUEST_DURATION, RATE_LIMITED
+from core.state import get_state_backend
+
+access_logger = logging.getLogger("api.access")
+
+
+class RequestContextMiddleware:
+    """Assign a request id, time the request and emit one access log record.
+
+    The id is taken from an incoming X-Request-ID header when present and is
+    echoed back on the response so clients can correlate log lines.
+
+    Request latency is also recorded in the HTTP duration histogram, labelled by
+    the name of the matched endpoint to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            endpoint = scope.get("endpoint")
+            route = getattr(endpoint, "__name__", "unmatched")
+            HTTP_REQUEST_DURATION.observe(duration, scope.get("method"), route, status_code)
+            access_logger.info(
+                "request completed",
+                extra={
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                },
+            )
+            request_id_var.reset(token)
+
+
+class RateLimitMiddleware:
+    """Fixed-window per-client request limit shared by every worker.
+
+    Counters live in the shared state backend, so the limit holds for the
+    whole deployment rather than per process. Clients are identified by their
+    peer address. X-Forwarded-For is only consulted when trusted_hops proxies
+    sit in front of the app: each appends the address it received from, so
+    the client is the trusted_hops-th entry from the right. Entries further
+    left were written by the client and could be anything.
+    """
+
+    EXEMPT_PREFIXES = ("/health", "/metrics", "/static/", "/favicon.ico")
+    WINDOW_SECONDS = 60
+
+    def __init__(self, app, limit: int, trusted_hops: int = 0):
+        self.app = app
+        self.limit = limit
+        self.trusted_hops = max(0, trusted_hops)
+
+    def _client(self, scope) -> str:
+        if self.trusted_hops:
+            forwarded = []
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    forwarded.extend(part.strip() for part in value.decode("latin-1").split(","))
+            if len(forwarded) >= self.trusted_hops and forwarded[-self.trusted_hops]:
+                return forwarded[-self.trusted_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        window = int(time.time() // self.WINDOW_SECONDS)
+        key = f"{self._client(scope)}:{window}"
+        count = await asyncio.to_thread(
+            get_state_backend().incr, "rate_limit", key, 1, self.WINDOW_SECONDS
+        )
+        if count <= self.limit:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc()
+        retry_after = self.WINDOW_SECONDS - int(time.time()) % self.WINDOW_SECONDS
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
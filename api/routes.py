@@ -5,7 +5,7 @@ import os
 import sys
 # Add project root to path for absolute imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from routes import chat_routes
+from routes import chat_routes, session_routes, speech_routes
 
 router = APIRouter()
 # Check if templates directory exists
@@ -24,3 +24,5 @@ async def hello_world():
 
 # Include all route modules
 router.include_router(chat_routes.router, tags=["chat"])
+router.include_router(speech_routes.router, tags=["speech"])
+router.include_router(session_routes.router, tags=["sessions"])
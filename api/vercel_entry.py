@@ -8,10 +8,8 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from config.logging_config import setup_logging
+setup_logging()
 logger = logging.getLogger(__name__)
 logger.info(f"Project root set to: {project_root}")
 logger.info(f"Current working directory: {os.getcwd()}")
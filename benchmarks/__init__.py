@@ -0,0 +1 @@
+# Benchmarks for the Myra ChatBot API. Run modules with `python -m benchmarks.<name>`.
@@ -0,0 +1,117 @@
+"""
+History export benchmark: throughput and memory of GET /sessions/export.
+
+Seeds a scratch state database with the given number of messages (part of
+them archived), starts the app, streams the NDJSON export and samples the
+app's resident memory while it runs. Peak memory should stay flat as the
+message count grows.
+
+    python -m benchmarks.bench_export --messages 100000 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# core.state loads config.settings, which requires an API key; only the stub is ever called
+os.environ.setdefault("GroqAPIKey", "benchmark-key")
+from benchmarks.harness import memory_kb, start_app, stop
+from core.retention import ArchiveStore
+from core.state import SQLiteStateBackend
+
+SEED_BATCH = 10000
+# /sessions endpoints are disabled unless the app is started with a key
+HISTORY_API_KEY = "benchmark-history-key"
+
+
+def seed(workdir: str, messages: int, sessions: int, archived_fraction: float):
+    """Fill Data/state.db and Data/archive the way the app would lay them out."""
+    state = SQLiteStateBackend(os.path.join(workdir, "Data", "state.db"))
+    archive = ArchiveStore(os.path.join(workdir, "Data", "archive"))
+    archived = int(messages * archived_fraction)
+    start = time.time() - messages
+    try:
+        for offset in range(0, messages, SEED_BATCH):
+            count = min(SEED_BATCH, messages - offset)
+            batch = [
+                {
+                    "role": "user" if (offset + i) % 2 == 0 else "assistant",
+                    "content": f"Message {offset + i}: " + "lorem ipsum dolor sit amet " * 6,
+                    "created_at": start + offset + i,
+                }
+                for i in range(count)
+            ]
+            session_id = f"session-{(offset // SEED_BATCH) % sessions}"
+            if offset < archived:
+                archive.append(session_id, batch)
+            else:
+                state.append_messages(session_id, batch)
+    finally:
+        state.close()
+        archive.close()
+
+
+def export(base_url: str, pid: int):
+    """Stream the full export; returns (lines, bytes, seconds, peak rss kb during the export)."""
+    peak = 0
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, memory_kb(pid)["rss_kb"] or 0)
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    lines = size = 0
+    start = time.perf_counter()
+    try:
+        headers = {"Authorization": f"Bearer {HISTORY_API_KEY}"}
+        with httpx.stream("GET", f"{base_url}/sessions/export", headers=headers, timeout=None) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+    finally:
+        done.set()
+        sampler.join()
+    return lines, size, time.perf_counter() - start, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", nargs="+", type=int, default=[100000, 1000000])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--archived-fraction", type=float, default=0.5)
+    args = parser.parse_args()
+
+    for messages in args.messages:
+        with tempfile.TemporaryDirectory(prefix="myra-export-") as workdir:
+            seed(workdir, messages, args.sessions, args.archived_fraction)
+            app_process = None
+            try:
+                # The export never calls the upstream API, so any URL will do
+                app_process, base_url = start_app(
+                    "http://127.0.0.1:9", workdir,
+                    extra_env={"RETENTION_INTERVAL": "0", "HISTORY_API_KEY": HISTORY_API_KEY},
+                )
+                baseline = memory_kb(app_process.pid)["rss_kb"]
+                lines, size, elapsed, peak = export(base_url, app_process.pid)
+            finally:
+                stop(app_process)
+        print(
+            f"messages={messages:<9} exported={lines:<9} {size / 1e6:.1f} MB in {elapsed:.2f}s "
+            f"({lines / elapsed:,.0f} msg/s)  rss baseline={baseline} KiB peak={peak} KiB "
+            f"(+{peak - baseline} KiB)",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
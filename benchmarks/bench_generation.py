@@ -0,0 +1,141 @@
+"""
+Generation profile benchmark: latency and completion tokens per query class.
+
+Runs the same mix of /chat queries (greetings, short questions, open chat,
+long-form requests), /summarize and /scenario requests twice against
+benchmarks.stub_upstream: once with every request on the old fixed options
+(max_tokens=1024, temperature=0.7) and once with the generation profiles from
+config.settings. The stub writes until max_tokens is reached, which is how a
+model that rambles behaves, so the savings shown are an upper bound. Real
+answers that end early save less.
+
+    python -m benchmarks.bench_generation --requests 20 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.harness import start_app, start_stub, stop, summarize_latencies
+from benchmarks.load_test import SAMPLE_TEXT, scenario_payload
+from benchmarks.stub_upstream import add_stub_arguments
+from config.settings import DEFAULT_GENERATION_PROFILES
+
+QUERIES = {
+    "greeting": ["hi", "Hello there!", "thanks a lot", "good morning", "how are you"],
+    "short_answer": ["who wrote Hamlet?", "what is the capital of Japan", "how many legs does a spider have",
+                     "is Python dynamically typed?"],
+    "chat": ["tell me something interesting about octopuses", "I can't decide what to cook tonight",
+             "my favourite band just released a new album"],
+    "long_form": ["explain how HTTPS keeps traffic private", "write a short story about a lighthouse keeper",
+                  "what is the difference between TCP and UDP"],
+}
+
+# Every profile on the options all requests used before profiles existed
+FIXED_PROFILES = {name: {"max_tokens": 1024, "temperature": 0.7, "stop": None, "reasoning_effort": None} for name in DEFAULT_GENERATION_PROFILES}
+
+
+def requests_for(kind: str, count: int):
+    """(path, payload) pairs for one query class or endpoint."""
+    if kind == "summarize":
+        return [("/summarize", {"text": SAMPLE_TEXT})] * count
+    if kind == "scenario":
+        return [("/scenario", scenario_payload())] * count
+    queries = QUERIES[kind]
+    # A fresh session per request keeps history length out of the comparison
+    return [
+        ("/chat", {"query": queries[index % len(queries)], "sessionId": f"bench-{kind}-{index}"})
+        for index in range(count)
+    ]
+
+
+async def run_kind(base_url: str, stub_url: str, kind: str, count: int, concurrency: int, timeout: float):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for item in requests_for(kind, count):
+        queue.put_nowait(item)
+
+    async def worker(client):
+        nonlocal errors
+        while not queue.empty():
+            path, payload = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        before = (await client.get(f"{stub_url}/health")).json()["completion_tokens"]
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        after = (await client.get(f"{stub_url}/health")).json()["completion_tokens"]
+    result = summarize_latencies(latencies, errors, elapsed)
+    result["completion_tokens_per_request"] = round((after - before) / max(1, len(latencies) + errors), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_stub_arguments(parser)
+    # The stub generates min(completion_tokens, max_tokens) tokens
+    parser.set_defaults(completion_tokens=1024, tokens_per_second=500.0, latency_ms=150.0)
+    parser.add_argument("--kinds", nargs="+", default=[*QUERIES, "summarize", "scenario"])
+    parser.add_argument("--requests", type=int, default=20, help="Requests per query class")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    modes = {
+        "fixed": {"GENERATION_PROFILES": json.dumps(FIXED_PROFILES), "GENERATION_CLASSIFY_QUERIES": "0"},
+        "profiles": {},
+    }
+    results = {}
+    stub_process = None
+    try:
+        stub_process, stub_url = start_stub(args)
+        for mode, extra_env in modes.items():
+            with tempfile.TemporaryDirectory(prefix="myra-generation-") as workdir:
+                app_process = None
+                try:
+                    app_process, base_url = start_app(
+                        stub_url, workdir, extra_env={"RETENTION_INTERVAL": "0", **extra_env}
+                    )
+                    for kind in args.kinds:
+                        results.setdefault(kind, {})[mode] = asyncio.run(
+                            run_kind(base_url, stub_url, kind, args.requests, args.concurrency, args.timeout)
+                        )
+                finally:
+                    stop(app_process)
+    finally:
+        stop(stub_process)
+
+    print(f"{'class':<14}{'tokens fixed':>14}{'tokens prof.':>14}{'p50 fixed':>11}{'p50 prof.':>11}{'saved':>8}")
+    for kind, by_mode in results.items():
+        fixed, profiled = by_mode["fixed"], by_mode["profiles"]
+        fixed_p50, profiled_p50 = fixed["latency_ms"]["p50"], profiled["latency_ms"]["p50"]
+        saved = 1 - profiled_p50 / fixed_p50 if fixed_p50 and profiled_p50 else 0.0
+        print(
+            f"{kind:<14}{fixed['completion_tokens_per_request']:>14}{profiled['completion_tokens_per_request']:>14}"
+            f"{fixed_p50:>11}{profiled_p50:>11}{saved:>8.0%}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Measure the per-record cost paid by request handlers for logging.
+
+Compares the previous synchronous FileHandler + StreamHandler setup against the
+queue-based pipeline from config.logging_config. Only the time spent in the
+calling thread is measured, since that is what blocks the event loop.
+
+    python -m benchmarks.bench_logging [--records 20000] [--json]
+"""
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.logging_config import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestIdFilter,
+    SamplingFilter,
+)
+
+LEGACY_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _run(logger, records):
+    timings = []
+    for i in range(records):
+        start = time.perf_counter()
+        logger.info("Received chat request", extra={"query": f"what is the weather like today {i}"})
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "records": records,
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 3),
+        "p50_us": round(_percentile(timings, 50) * 1e6, 3),
+        "p99_us": round(_percentile(timings, 99) * 1e6, 3),
+    }
+
+
+def bench_legacy(log_dir, records):
+    logger = logging.getLogger("bench.legacy")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    devnull = open(os.devnull, "w")
+    handlers = [
+        logging.FileHandler(os.path.join(log_dir, "legacy.log")),
+        logging.StreamHandler(devnull),
+    ]
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(LEGACY_FORMAT))
+        logger.addHandler(handler)
+    try:
+        return _run(logger, records)
+    finally:
+        for handler in handlers:
+            logger.removeHandler(handler)
+            handler.close()
+        devnull.close()
+
+
+def bench_queue(log_dir, records, sample_rate=1.0):
+    logger = logging.getLogger("core.chat.bench")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    devnull = open(os.devnull, "w")
+    outputs = [
+        logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, f"queue-{sample_rate}.log"), maxBytes=10 * 1024 * 1024, backupCount=2
+        ),
+        logging.StreamHandler(devnull),
+    ]
+    for handler in outputs:
+        handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=records + 1)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+    queue_handler.addFilter(RequestIdFilter())
+    logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(log_queue, *outputs)
+    listener.start()
+    try:
+        result = _run(logger, records)
+    finally:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+        for handler in outputs:
+            handler.close()
+        devnull.close()
+    result["sample_rate"] = sample_rate
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results only")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = {
+            "legacy_sync": bench_legacy(log_dir, args.records),
+            "queue": bench_queue(log_dir, args.records),
+            "queue_sampled_10pct": bench_queue(log_dir, args.records, sample_rate=0.1),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    baseline = results["legacy_sync"]["mean_us"]
+    for name, result in results.items():
+        saved = baseline - result["mean_us"]
+        print(
+            f"{name:<22} mean {result['mean_us']:>8.2f} us  p50 {result['p50_us']:>8.2f} us  "
+            f"p99 {result['p99_us']:>8.2f} us  saved/record {saved:>7.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Scenario payload benchmark: DetectionData JSON against the columnar formats.
+
+For each frame size builds the same detections as a DetectionData body and as
+columnar JSON, msgpack (when installed) and .npz bodies. It then reports
+request size (raw and gzipped) and the time to parse, validate and format
+the prompt lines. This is the CPU work /scenario and /scenario/compact do
+before calling the model. Every format is checked to yield the same prompt
+lines.
+
+    python -m benchmarks.bench_scenario --detections 100 1000 10000
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing the routes builds a ChatManager; keep it off disk and offline
+os.environ.setdefault("GroqAPIKey", "benchmark-key")
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("RETENTION_INTERVAL", "0")
+from benchmarks.load_test import SCENARIO_LABELS
+from core.detections import (
+    CONFIDENCE_DTYPE,
+    LABEL_DTYPE,
+    POSITION_DTYPE,
+    POSITIONS,
+    msgpack,
+    parse_json,
+    parse_msgpack,
+    parse_npz,
+)
+from routes.chat_routes import DetectionData
+
+
+def make_frame(count: int, seed: int = 0):
+    """Random detections as (label index, position index, confidence) columns."""
+    rng = np.random.default_rng(seed)
+    label = rng.integers(0, len(SCENARIO_LABELS), count)
+    position = rng.integers(0, len(POSITIONS), count)
+    # Two decimals, as detectors usually report them
+    confidence = np.round(rng.uniform(0.3, 1.0, count), 2)
+    return label, position, confidence
+
+
+def detection_data_body(label, position, confidence) -> bytes:
+    detections = {}
+    for index, (l, p, c) in enumerate(zip(label.tolist(), position.tolist(), confidence.tolist())):
+        name = SCENARIO_LABELS[l]
+        detections.setdefault(name, []).append(
+            {"object_id": f"{name}_{index}", "position": POSITIONS[p], "confidence": c}
+        )
+    # Keys in vocabulary order, so both formats produce identical prompt lines
+    detections = {name: detections[name] for name in SCENARIO_LABELS if name in detections}
+    return json.dumps({"status": "success", "filename": "frame.jpg", "detections": detections}).encode()
+
+
+def columnar_payload(label, position, confidence) -> dict:
+    return {
+        "status": "success",
+        "filename": "frame.jpg",
+        "labels": list(SCENARIO_LABELS),
+        "label": label.tolist(),
+        "position": position.tolist(),
+        "confidence": confidence.tolist(),
+    }
+
+
+def msgpack_buffer_body(label, position, confidence) -> bytes:
+    payload = columnar_payload(label, position, confidence)
+    payload["label"] = label.astype(LABEL_DTYPE).tobytes()
+    payload["position"] = position.astype(POSITION_DTYPE).tobytes()
+    payload["confidence"] = confidence.astype(CONFIDENCE_DTYPE).tobytes()
+    return msgpack.packb(payload)
+
+
+def npz_body(label, position, confidence) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        status=np.asarray("success"),
+        filename=np.asarray("frame.jpg"),
+        labels=np.asarray(SCENARIO_LABELS),
+        label=label.astype(LABEL_DTYPE),
+        position=position.astype(POSITION_DTYPE),
+        confidence=confidence.astype(CONFIDENCE_DTYPE),
+    )
+    return buffer.getvalue()
+
+
+def pydantic_lines(body: bytes):
+    """What /scenario does with its body: validate, then format each detection."""
+    request = DetectionData.model_validate_json(body)
+    return [
+        f"- {object_type} at {detection.position} (confidence: {detection.confidence:.2%})"
+        for object_type, detections in request.detections.items()
+        for detection in detections
+    ]
+
+
+def best_time(function, body, repeat: int) -> float:
+    """Fastest of `repeat` runs in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(body)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--detections", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.detections:
+        columns = make_frame(count)
+        formats = [
+            ("DetectionData", detection_data_body(*columns), pydantic_lines),
+            ("columnar json", json.dumps(columnar_payload(*columns)).encode(), lambda b: parse_json(b).lines()),
+        ]
+        if msgpack is not None:
+            formats.append(("columnar msgpack", msgpack_buffer_body(*columns), lambda b: parse_msgpack(b).lines()))
+        formats.append(("columnar npz", npz_body(*columns), lambda b: parse_npz(b).lines()))
+
+        expected = pydantic_lines(formats[0][1])
+        print(f"\n{count} detections")
+        print(f"{'format':<18}{'bytes':>10}{'gzipped':>10}{'parse+format ms':>17}{'parse only ms':>15}")
+        for name, body, function in formats:
+            if function(body) != expected:
+                raise AssertionError(f"{name} produced different prompt lines")
+            total_ms = best_time(function, body, args.repeat)
+            if name == "DetectionData":
+                parse_ms = best_time(DetectionData.model_validate_json, body, args.repeat)
+            else:
+                parse = {"columnar json": parse_json, "columnar msgpack": parse_msgpack, "columnar npz": parse_npz}[name]
+                parse_ms = best_time(parse, body, args.repeat)
+            print(f"{name:<18}{len(body):>10}{len(gzip.compress(body)):>10}{total_ms:>17.3f}{parse_ms:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
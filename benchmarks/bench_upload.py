@@ -0,0 +1,159 @@
+"""
+Document upload benchmark: memory of POST /summarize/upload as files grow.
+
+Writes synthetic text and PDF files of increasing size, starts the stub
+upstream and the app, uploads each file as a streamed request body (and as
+multipart/form-data when python-multipart is installed), and samples the
+app's resident memory while it runs. Peak memory should stay flat as the
+files grow. PDFs need the optional pypdf package in the app's environment.
+
+    python -m benchmarks.bench_upload --sizes-mb 1 10 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.harness import memory_kb, start_app, start_stub, stop
+from benchmarks.stub_upstream import add_stub_arguments
+from core.documents import pypdf
+
+PARAGRAPH = (
+    "FastAPI is a modern web framework for building APIs with Python based on standard type hints. "
+    "It is designed to be easy to use while delivering high performance comparable to Node.js and Go. "
+)
+LINES_PER_PAGE = 40
+
+
+def write_text(path: str, size: int):
+    with open(path, "w", encoding="utf-8") as f:
+        written = number = 0
+        while written < size:
+            paragraph = f"## Section {number}\n\n{PARAGRAPH * 4}\n\n"
+            f.write(paragraph)
+            written += len(paragraph)
+            number += 1
+
+
+def write_pdf(path: str, size: int):
+    """A minimal uncompressed PDF with one Helvetica text page per ~4 KB."""
+    line = PARAGRAPH[:90].replace("(", "").replace(")", "")
+    content = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for _ in range(LINES_PER_PAGE)) + " ET"
+    pages = max(1, size // (len(content) + 200))
+    offsets = []
+    with open(path, "wb") as f:
+        def obj(number, body):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+
+        f.write(b"%PDF-1.4\n")
+        obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+        obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>")
+        obj(3, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i in range(pages):
+            obj(4 + 2 * i, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                           f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+            obj(5 + 2 * i, f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def upload(base_url: str, pid: int, path: str, media_type: str, multipart: bool, timeout: float):
+    """Upload one file; returns (response json, seconds, peak rss kb during the upload)."""
+    peak = 0
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, memory_kb(pid)["rss_kb"] or 0)
+            time.sleep(0.05)
+
+    def body():
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(256 * 1024)
+                if not block:
+                    return
+                yield block
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            if multipart:
+                response = httpx.post(f"{base_url}/summarize/upload",
+                                      files={"file": (os.path.basename(path), f, media_type)}, timeout=timeout)
+            else:
+                response = httpx.post(f"{base_url}/summarize/upload", content=body(),
+                                      headers={"Content-Type": media_type}, timeout=timeout)
+        response.raise_for_status()
+    finally:
+        done.set()
+        sampler.join()
+    return response.json(), time.perf_counter() - start, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_stub_arguments(parser)
+    parser.set_defaults(latency_ms=5.0, latency_dist="fixed", tokens_per_second=0.0, completion_tokens=60)
+    parser.add_argument("--sizes-mb", nargs="+", type=float, default=[1, 10, 50])
+    parser.add_argument("--kinds", nargs="+", choices=("text", "pdf"), default=["text", "pdf"])
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    kinds = [kind for kind in args.kinds if kind != "pdf" or pypdf is not None]
+    try:
+        import multipart  # noqa: F401
+        modes = (False, True)
+    except ImportError:
+        modes = (False,)
+
+    stub_process = None
+    with tempfile.TemporaryDirectory(prefix="myra-upload-") as workdir:
+        try:
+            stub_process, stub_url = start_stub(args)
+            for size_mb in args.sizes_mb:
+                for kind in kinds:
+                    path = os.path.join(workdir, f"document-{size_mb}mb.{'pdf' if kind == 'pdf' else 'md'}")
+                    (write_pdf if kind == "pdf" else write_text)(path, int(size_mb * 1024 * 1024))
+                    media_type = "application/pdf" if kind == "pdf" else "text/markdown"
+                    for use_multipart in modes:
+                        # A fresh app per upload, so one run's high-water mark does not hide the next
+                        app_process = None
+                        try:
+                            app_process, base_url = start_app(
+                                stub_url, workdir,
+                                extra_env={"RETENTION_INTERVAL": "0", "SUMMARIZE_UPLOAD_MAX_BYTES": str(1 << 40),
+                                           "SUMMARIZE_MAX_CHUNKS": "0"},
+                            )
+                            baseline = memory_kb(app_process.pid)["rss_kb"]
+                            result, elapsed, peak = upload(base_url, app_process.pid, path, media_type,
+                                                           use_multipart, args.timeout)
+                        finally:
+                            stop(app_process)
+                        print(
+                            f"{kind:<5}{size_mb:>7.1f} MB {'multipart' if use_multipart else 'stream':<10}"
+                            f"chunks={result['chunks']:<6} chars={result['characters']:<10} "
+                            f"{elapsed:7.2f}s  rss baseline={baseline} KiB peak={peak} KiB "
+                            f"(+{peak - baseline} KiB)",
+                            flush=True,
+                        )
+                    os.remove(path)
+        finally:
+            stop(stub_process)
+
+
+if __name__ == "__main__":
+    main()
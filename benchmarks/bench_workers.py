@@ -0,0 +1,170 @@
+"""
+Multi-worker scaling benchmark for /chat with shared state.
+
+For each worker count the app is started under uvicorn with that many worker
+processes against benchmarks.stub_upstream. Every concurrent client holds its
+own session and sends its turns one after another, so requests for the same
+session land on different workers. The run reports throughput, latency and
+scaling efficiency relative to one worker, then checks correctness from the
+shared state database: every session must hold exactly the turns its client
+sent, in order. A final phase checks that the rate limit is enforced once for
+the whole deployment rather than per worker.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --clients 32 --turns 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# core.state loads config.settings, which requires an API key; only the stub is ever called
+os.environ.setdefault("GroqAPIKey", "benchmark-key")
+from benchmarks.harness import memory_kb, start_app, start_stub, stop, summarize_latencies
+from benchmarks.stub_upstream import add_stub_arguments
+from core.state import SQLiteStateBackend
+
+
+async def run_sessions(base_url: str, clients: int, turns: int, timeout: float):
+    """Each client sends `turns` chat requests on its own session."""
+    latencies = []
+    errors = 0
+
+    async def client_loop(client, session_index):
+        nonlocal errors
+        for turn in range(turns):
+            payload = {"query": f"session {session_index} turn {turn}", "sessionId": f"bench-{session_index}"}
+            start = time.perf_counter()
+            try:
+                response = await client.post("/chat", json=payload)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, index) for index in range(clients)))
+        elapsed = time.perf_counter() - started
+    return summarize_latencies(latencies, errors, elapsed)
+
+
+def check_sessions(db_path: str, clients: int, turns: int):
+    """Count sessions whose stored history differs from what was sent."""
+    backend = SQLiteStateBackend(db_path)
+    broken = 0
+    try:
+        for index in range(clients):
+            messages = backend.get_messages(f"bench-{index}")
+            queries = [message["content"] for message in messages if message["role"] == "user"]
+            expected = [f"session {index} turn {turn}" for turn in range(turns)]
+            if queries != expected or len(messages) != 2 * turns:
+                broken += 1
+    finally:
+        backend.close()
+    return broken
+
+
+async def count_rate_limited(base_url: str, requests: int, concurrency: int, timeout: float):
+    # Counters use fixed one-minute windows; start early in a window so the
+    # whole burst is counted against the same one
+    remaining = 60 - time.time() % 60
+    if remaining < 20:
+        await asyncio.sleep(remaining)
+    statuses = []
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        async def issue(index):
+            async with semaphore:
+                response = await client.post("/chat", json={"query": f"limit {index}", "sessionId": "limit"})
+                statuses.append(response.status_code)
+        await asyncio.gather(*(issue(index) for index in range(requests)))
+    return statuses.count(429)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=10, help="Requests per session")
+    parser.add_argument("--state-backend", default="sqlite")
+    parser.add_argument("--rate-limit", type=int, default=50,
+                        help="Limit used for the cross-worker rate-limit check, 0 skips it")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    stub_process = None
+    try:
+        stub_process, stub_url = start_stub(args)
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory(prefix="myra-workers-") as workdir:
+                app_process = None
+                try:
+                    app_process, app_url = start_app(
+                        stub_url, workdir, workers=workers, extra_env={"STATE_BACKEND": args.state_backend}
+                    )
+                    summary = asyncio.run(run_sessions(app_url, args.clients, args.turns, args.timeout))
+                    summary["memory"] = memory_kb(app_process.pid)
+                finally:
+                    stop(app_process)
+                db_path = os.path.join(workdir, "Data", "state.db")
+                summary["workers"] = workers
+                summary["broken_sessions"] = (
+                    check_sessions(db_path, args.clients, args.turns) if os.path.exists(db_path) else None
+                )
+            results.append(summary)
+
+        baseline = results[0]["throughput_rps"] / results[0]["workers"] if results and results[0]["throughput_rps"] else None
+        for summary in results:
+            if baseline and summary["throughput_rps"]:
+                summary["scaling_efficiency"] = round(summary["throughput_rps"] / (baseline * summary["workers"]), 3)
+            latency = summary["latency_ms"]
+            print(
+                f"workers={summary['workers']:<3} rps={summary['throughput_rps']} p50={latency['p50']}ms "
+                f"p99={latency['p99']}ms errors={summary['errors']} "
+                f"efficiency={summary.get('scaling_efficiency')} broken_sessions={summary['broken_sessions']}",
+                flush=True,
+            )
+
+        rate_limit = None
+        if args.rate_limit and args.workers:
+            extra = max(10, args.rate_limit // 2)
+            with tempfile.TemporaryDirectory(prefix="myra-workers-") as workdir:
+                app_process = None
+                try:
+                    app_process, app_url = start_app(
+                        stub_url, workdir, workers=max(args.workers),
+                        extra_env={"STATE_BACKEND": args.state_backend, "RATE_LIMIT_PER_MINUTE": str(args.rate_limit)},
+                    )
+                    rejected = asyncio.run(
+                        count_rate_limited(app_url, args.rate_limit + extra, args.clients, args.timeout)
+                    )
+                finally:
+                    stop(app_process)
+            rate_limit = {"limit": args.rate_limit, "sent": args.rate_limit + extra,
+                          "rejected": rejected, "expected_rejected": extra}
+            print(f"rate limit across {max(args.workers)} workers: rejected {rejected} of "
+                  f"{args.rate_limit + extra} (expected {extra})")
+    finally:
+        stop(stub_process)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"clients": args.clients, "turns": args.turns, "results": results,
+                       "rate_limit": rate_limit}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Process and measurement helpers shared by the benchmark scripts.
+
+The app under test and the stub upstream each run in their own subprocess so
+that the load generator does not compete with them for the GIL.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.stub_upstream import stub_arguments_to_argv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0, process=None):
+    """Poll a URL until it answers or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} became ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not become ready within {timeout}s")
+
+
+def start_stub(args, port: int = None):
+    """Start the stub upstream; returns (process, base_url)."""
+    port = port or free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_upstream", "--port", str(port), *stub_arguments_to_argv(args)],
+        cwd=PROJECT_ROOT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_ready(f"{base_url}/health", process=process)
+    return process, base_url
+
+
+def app_env(stub_url: str, extra_env: dict = None) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+        "GroqAPIKey": env.get("GroqAPIKey") or "benchmark-key",
+        "GROQ_BASE_URL": stub_url,
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+    })
+    env.update(extra_env or {})
+    return env
+
+
+def start_app(stub_url: str, workdir: str, workers: int = 1, port: int = None, extra_env: dict = None):
+    """Start the FastAPI app under uvicorn in workdir; returns (process, base_url).
+
+    Running from a scratch directory keeps Data/ChatLog.json and logs/ out of
+    the source tree.
+    """
+    port = port or free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=workdir,
+        env=app_env(stub_url, extra_env),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_ready(f"{base_url}/health", process=process)
+    return process, base_url
+
+
+def stop(process):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _child_pids(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid: int) -> dict:
+    """Current and peak resident set size of a process tree, in KiB (Linux only)."""
+    rss = peak = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("VmHWM:"):
+                        peak += int(line.split()[1])
+        except OSError:
+            continue
+        pids.extend(_child_pids(current))
+    return {"rss_kb": rss or None, "peak_rss_kb": peak or None}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies, errors, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one scenario."""
+    latencies = sorted(latencies)
+    completed = len(latencies)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 3) if elapsed > 0 else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / completed * 1000, 3) if completed else None,
+            "p50": round(percentile(latencies, 50) * 1000, 3) if completed else None,
+            "p95": round(percentile(latencies, 95) * 1000, 3) if completed else None,
+            "p99": round(percentile(latencies, 99) * 1000, 3) if completed else None,
+            "max": round(latencies[-1] * 1000, 3) if completed else None,
+        },
+    }
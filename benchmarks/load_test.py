@@ -0,0 +1,201 @@
+"""
+Offline load test for /chat, /summarize and /scenario against the stub upstream.
+
+Starts benchmarks.stub_upstream and the app in subprocesses, then for every
+combination of endpoint, history size and concurrency level measures
+throughput, p50/p95/p99 latency and app memory. Results are written as JSON
+for regression tracking.
+
+    python -m benchmarks.load_test --concurrency 1 8 32 --history-sizes 0 200 \\
+        --requests 200 --output bench_results.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# core.state loads config.settings, which requires an API key; only the stub is ever called
+os.environ.setdefault("GroqAPIKey", "benchmark-key")
+from benchmarks.harness import (
+    PROJECT_ROOT,
+    memory_kb,
+    start_app,
+    start_stub,
+    stop,
+    summarize_latencies,
+)
+from benchmarks.stub_upstream import add_stub_arguments
+from core.state import DEFAULT_SESSION, SQLiteStateBackend
+
+SAMPLE_TEXT = (
+    "FastAPI is a modern web framework for building APIs with Python based on standard type hints. "
+    "It is designed to be easy to use while delivering high performance comparable to Node.js and Go. "
+) * 20
+
+SCENARIO_LABELS = ("person", "dog", "car", "bench", "bicycle", "tree", "traffic light", "bag")
+SCENARIO_POSITIONS = ("top-left", "top", "top-right", "centre-left", "centre", "centre-right",
+                      "bottom-left", "bottom", "bottom-right")
+
+
+def scenario_payload(objects_per_label: int = 3) -> dict:
+    detections = {}
+    for label_index, label in enumerate(SCENARIO_LABELS):
+        detections[label] = [
+            {
+                "object_id": f"{label}_{i}",
+                "position": SCENARIO_POSITIONS[(label_index + i) % len(SCENARIO_POSITIONS)],
+                "confidence": 0.5 + ((label_index * 7 + i) % 50) / 100,
+            }
+            for i in range(objects_per_label)
+        ]
+    return {"status": "success", "filename": "frame.jpg", "detections": detections}
+
+
+def payload_for(endpoint: str, index: int) -> dict:
+    if endpoint == "chat":
+        return {"query": f"Question number {index}: what can you tell me about Python web frameworks?"}
+    if endpoint == "summarize":
+        return {"text": SAMPLE_TEXT}
+    if endpoint == "scenario":
+        return scenario_payload()
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+def write_history(workdir: str, turns: int):
+    """Reset the default session to a history of the given number of messages."""
+    backend = SQLiteStateBackend(os.path.join(workdir, "Data", "state.db"))
+    messages = []
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Message {i}. " + SAMPLE_TEXT[:200]})
+    try:
+        backend.clear_session(DEFAULT_SESSION)
+        backend.append_messages(DEFAULT_SESSION, messages)
+    finally:
+        backend.close()
+
+
+async def run_scenario(base_url: str, endpoint: str, concurrency: int, total_requests: int, timeout: float):
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    async def worker(client):
+        nonlocal errors
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/{endpoint}", json=payload_for(endpoint, index))
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize_latencies(latencies, errors, elapsed)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", default=["chat", "summarize", "scenario"],
+                        choices=["chat", "summarize", "scenario"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--history-sizes", nargs="+", type=int, default=[0, 200, 2000],
+                        help="Number of messages in the session history before each scenario")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the app")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    baseline_memory = None
+    stub_process = app_process = None
+    with tempfile.TemporaryDirectory(prefix="myra-bench-") as workdir:
+        try:
+            stub_process, stub_url = start_stub(args)
+            write_history(workdir, 0)
+            app_process, app_url = start_app(stub_url, workdir, workers=args.workers)
+            baseline_memory = memory_kb(app_process.pid)
+
+            for endpoint in args.endpoints:
+                for history_size in args.history_sizes:
+                    for concurrency in args.concurrency:
+                        write_history(workdir, history_size)
+                        if args.warmup:
+                            asyncio.run(run_scenario(app_url, endpoint, 1, args.warmup, args.timeout))
+                            write_history(workdir, history_size)
+                        summary = asyncio.run(
+                            run_scenario(app_url, endpoint, concurrency, args.requests, args.timeout)
+                        )
+                        summary.update({
+                            "endpoint": endpoint,
+                            "history_size": history_size,
+                            "concurrency": concurrency,
+                            "memory": memory_kb(app_process.pid),
+                        })
+                        results.append(summary)
+                        latency = summary["latency_ms"]
+                        print(
+                            f"{endpoint:<10} history={history_size:<6} c={concurrency:<4} "
+                            f"rps={summary['throughput_rps']} p50={latency['p50']}ms "
+                            f"p95={latency['p95']}ms p99={latency['p99']}ms errors={summary['errors']}",
+                            flush=True,
+                        )
+        finally:
+            stop(app_process)
+            stop(stub_process)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workers": args.workers,
+            "requests_per_scenario": args.requests,
+            "stub": {
+                "latency_ms": args.latency_ms,
+                "latency_dist": args.latency_dist,
+                "tokens_per_second": args.tokens_per_second,
+                "completion_tokens": args.completion_tokens,
+                "error_rate": args.error_rate,
+            },
+            "baseline_memory": baseline_memory,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
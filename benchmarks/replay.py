@@ -0,0 +1,208 @@
+"""
+Replay a captured traffic stream against the app.
+
+Reads a JSONL capture produced by TRAFFIC_CAPTURE_PATH and re-issues each
+request at its original arrival offset, optionally compressed in time with
+--speed. By default the app and benchmarks.stub_upstream are started locally
+so replays are deterministic and offline; --target replays against an already
+running server instead.
+
+    python -m benchmarks.replay logs/traffic.jsonl --speed 4 --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.harness import memory_kb, start_app, start_stub, stop, summarize_latencies
+from benchmarks.stub_upstream import add_stub_arguments
+
+
+def load_capture(path: str, include=None, limit: int = None):
+    """Read replayable entries from a capture file, ordered by arrival."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get("body_truncated") or entry.get("body_encoding") == "omitted":
+                continue
+            if include and not entry["path"].startswith(tuple(include)):
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda entry: entry["ts"])
+    if limit:
+        entries = entries[:limit]
+    if entries:
+        first = entries[0]["ts"]
+        for entry in entries:
+            entry["replay_offset_s"] = entry["ts"] - first
+    return entries
+
+
+async def replay(base_url: str, entries, speed: float, max_in_flight: int, timeout: float):
+    """Issue every entry at its scheduled time; returns per-request results."""
+    results = []
+    semaphore = asyncio.Semaphore(max_in_flight)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+
+        async def issue(entry):
+            if speed > 0:
+                delay = entry["replay_offset_s"] / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            async with semaphore:
+                url = entry["path"] + (f"?{entry['query']}" if entry.get("query") else "")
+                headers = {"content-type": entry["content_type"]} if entry.get("content_type") else {}
+                content = json.dumps(entry["body"]).encode("utf-8") if entry.get("body") is not None else None
+                request_start = time.perf_counter()
+                try:
+                    response = await client.request(entry["method"], url, content=content, headers=headers)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = None
+                results.append({
+                    "path": entry["path"],
+                    "status": status,
+                    "captured_status": entry.get("status"),
+                    "latency_s": time.perf_counter() - request_start,
+                    "captured_ms": entry.get("duration_ms"),
+                    "lag_s": (request_start - started) - (entry["replay_offset_s"] / speed if speed > 0 else 0),
+                })
+
+        await asyncio.gather(*(issue(entry) for entry in entries))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def succeeded(result) -> bool:
+    """A replayed request succeeds when it gets the status it got when captured."""
+    if result["status"] is None:
+        return False
+    if result["captured_status"] is None:
+        return result["status"] < 400
+    return result["status"] == result["captured_status"]
+
+
+def summarize(results, elapsed):
+    by_path = {}
+    for result in results:
+        by_path.setdefault(result["path"], []).append(result)
+
+    def _summary(items, total_elapsed):
+        # A different status, 4xx included, means the replay did not reproduce the captured load
+        ok = [item["latency_s"] for item in items if succeeded(item)]
+        summary = summarize_latencies(ok, len(items) - len(ok), total_elapsed)
+        captured = sorted(item["captured_ms"] for item in items if item["captured_ms"] is not None)
+        if captured:
+            summary["captured_p50_ms"] = captured[len(captured) // 2]
+        summary["status_mismatches"] = sum(1 for item in items if item["status"] != item["captured_status"])
+        return summary
+
+    lags = sorted(result["lag_s"] for result in results)
+    return {
+        "overall": _summary(results, elapsed),
+        "max_schedule_lag_ms": round(lags[-1] * 1000, 3) if lags else None,
+        "paths": {path: _summary(items, elapsed) for path, items in sorted(by_path.items())},
+    }
+
+
+def compare(current, baseline):
+    """Print p50/p95/p99 deltas against a previous replay report."""
+    print("\nComparison with baseline (negative is faster):")
+    for path, summary in current["summary"]["paths"].items():
+        previous = baseline["summary"]["paths"].get(path)
+        if not previous:
+            continue
+        deltas = []
+        for key in ("p50", "p95", "p99"):
+            now, before = summary["latency_ms"][key], previous["latency_ms"][key]
+            if now is not None and before:
+                deltas.append(f"{key} {now - before:+.1f}ms ({(now - before) / before:+.1%})")
+        print(f"  {path:<14} " + "  ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("capture", help="JSONL capture file")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Time compression factor; 1 keeps original pacing, 0 sends as fast as possible")
+    parser.add_argument("--include", nargs="*", help="Only replay paths with these prefixes")
+    parser.add_argument("--limit", type=int, help="Replay at most this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--target", help="Replay against this running server instead of a local app")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local app")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    entries = load_capture(args.capture, args.include, args.limit)
+    if not entries:
+        print("No replayable entries found")
+        return
+
+    stub_process = app_process = None
+    memory = None
+    with tempfile.TemporaryDirectory(prefix="myra-replay-") as workdir:
+        try:
+            if args.target:
+                base_url = args.target
+            else:
+                stub_process, stub_url = start_stub(args)
+                app_process, base_url = start_app(stub_url, workdir, workers=args.workers)
+            results, elapsed = asyncio.run(
+                replay(base_url, entries, args.speed, args.max_in_flight, args.timeout)
+            )
+            if app_process is not None:
+                memory = memory_kb(app_process.pid)
+        finally:
+            stop(app_process)
+            stop(stub_process)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "capture": os.path.abspath(args.capture),
+            "speed": args.speed,
+            "requests": len(entries),
+            "target": args.target or "local",
+            "memory": memory,
+        },
+        "summary": summarize(results, elapsed),
+    }
+    overall = report["summary"]["overall"]
+    print(
+        f"Replayed {overall['requests']} requests in {overall['elapsed_s']}s "
+        f"({overall['throughput_rps']} rps), errors={overall['errors']}, "
+        f"max schedule lag={report['summary']['max_schedule_lag_ms']}ms"
+    )
+    for path, summary in report["summary"]["paths"].items():
+        latency = summary["latency_ms"]
+        print(f"  {path:<14} n={summary['requests']:<6} p50={latency['p50']}ms "
+              f"p95={latency['p95']}ms p99={latency['p99']}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
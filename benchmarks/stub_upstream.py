@@ -0,0 +1,259 @@
+"""
+Local OpenAI/Groq-compatible chat completions stub for offline benchmarks.
+
+Serves POST /openai/v1/chat/completions (the path the Groq SDK calls) with a
+configurable time-to-first-token distribution, token generation rate, error
+injection, optional SSE streaming and optional prompt prefix caching. Point ChatManager at it by setting
+GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+    python -m benchmarks.stub_upstream --port 9100 --latency-ms 300 --tokens-per-second 400
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FILLER_WORDS = (
+    "the quick brown fox jumps over a lazy dog while the assistant answers "
+    "your question clearly and concisely with helpful detail"
+).split()
+
+
+class StubConfig:
+    """Behaviour of the stub upstream."""
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_dist: str = "lognormal",
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 500.0,
+        completion_tokens: int = 120,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = None,
+        prompt_cache: bool = False,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.prompt_cache = prompt_cache
+        self.rng = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Time to first token in seconds."""
+        mean = self.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        if self.latency_dist == "fixed":
+            return mean
+        if self.latency_dist == "uniform":
+            return self.rng.uniform(0, 2 * mean)
+        # Lognormal with the requested mean
+        mu = _lognormal_mu(mean, self.latency_sigma)
+        return self.rng.lognormvariate(mu, self.latency_sigma)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+
+def _lognormal_mu(mean, sigma):
+    return math.log(mean) - sigma ** 2 / 2
+
+
+def _estimate_tokens(messages) -> int:
+    # Same rough 4 chars ~= 1 token estimate ChatManager uses
+    return max(1, sum(len(str(msg.get("content", ""))) for msg in messages) // 4)
+
+
+class PrefixCache:
+    """Simulated provider-side prompt caching.
+
+    A prompt is a hit up to the longest run of leading messages identical to
+    a run seen in an earlier request, counted in whole blocks of tokens the
+    way providers report cached_tokens.
+    """
+
+    def __init__(self, block_tokens: int = 128, max_entries: int = 100000):
+        self.block_tokens = block_tokens
+        self.max_entries = max_entries
+        self._seen = OrderedDict()
+
+    def lookup_and_store(self, messages) -> int:
+        digest = hashlib.sha256()
+        cached = tokens = 0
+        for message in messages:
+            digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+            key = digest.copy().hexdigest()
+            tokens += _estimate_tokens([message])
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                cached = tokens
+            self._seen[key] = True
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return cached // self.block_tokens * self.block_tokens
+
+
+def _make_tokens(count):
+    return [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(count)]
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Groq stub upstream")
+    stats = {"requests": 0, "errors": 0, "streamed": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0,
+             "completion_tokens": 0}
+    prefix_cache = PrefixCache() if config.prompt_cache else None
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", **stats}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        messages = body.get("messages", [])
+        model = body.get("model", "stub-model")
+        completion_tokens = min(config.completion_tokens, int(body.get("max_tokens") or config.completion_tokens))
+        prompt_tokens = _estimate_tokens(messages)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        if prefix_cache is not None:
+            cached_tokens = min(prompt_tokens, prefix_cache.lookup_and_store(messages))
+            usage["prompt_tokens_details"] = {"cached_tokens": cached_tokens}
+            stats["cached_prompt_tokens"] += cached_tokens
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        await asyncio.sleep(config.sample_latency())
+        if config.should_fail():
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=config.error_status,
+                content={"error": {"message": "Injected stub failure", "type": "server_error"}},
+            )
+
+        tokens = _make_tokens(completion_tokens)
+        per_token = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if body.get("stream"):
+            stats["streamed"] += 1
+
+            async def event_stream():
+                for index, token in enumerate(tokens):
+                    if per_token:
+                        await asyncio.sleep(per_token)
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"role": "assistant", "content": token + " "} if index == 0
+                            else {"content": token + " "},
+                            "finish_reason": None,
+                        }],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "x_groq": {"usage": usage},
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(per_token * completion_tokens)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    return app
+
+
+def add_stub_arguments(parser):
+    """Register the stub behaviour options on an argparse parser."""
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean time to first token")
+    parser.add_argument("--latency-dist", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Sigma for the lognormal distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--prompt-cache", action="store_true",
+                        help="Simulate provider prefix caching and report cached_tokens in usage")
+
+
+def stub_arguments_to_argv(args):
+    """Turn parsed stub options back into command line flags for a subprocess."""
+    argv = [
+        "--latency-ms", str(args.latency_ms),
+        "--latency-dist", args.latency_dist,
+        "--latency-sigma", str(args.latency_sigma),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--completion-tokens", str(args.completion_tokens),
+        "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status),
+    ]
+    if args.seed is not None:
+        argv += ["--seed", str(args.seed)]
+    if args.prompt_cache:
+        argv.append("--prompt-cache")
+    return argv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        prompt_cache=args.prompt_cache,
+    )
+    uvicorn.run(create_stub_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# Sample text used to build the character n-gram profiles for language detection.
+# Keys match the language codes in config.voice_mapping. Each sample mixes a
+# formal passage (Article 1 of the Universal Declaration of Human Rights) with
+# everyday conversational sentences of the kind the assistant produces.
+
+LANGUAGE_SAMPLES = {
+    "en": (
+        "All human beings are born free and equal in dignity and rights. They are endowed with reason "
+        "and conscience and should act towards one another in a spirit of brotherhood. "
+        "Hello, how can I help you today? The weather is nice and the sun is shining. "
+        "I think this is the best answer to your question. Please let me know if you need anything else. "
+        "What would you like to know about the world, the news or the history of this place? "
+        "London is the capital of the United Kingdom and lies on the River Thames. Thank you for the question, "
+        "I am happy to help. Work starts tomorrow morning, so I will now send a message to the whole team. "
+        "What else would you like to know about this topic? Today is a beautiful day and it is warm outside."
+    ),
+    "hi": (
+        "सभी मनुष्यों को गौरव और अधिकारों के मामले में जन्मजात स्वतन्त्रता और समानता प्राप्त है। "
+        "उन्हें बुद्धि और अन्तरात्मा की देन प्राप्त है और परस्पर उन्हें भाईचारे के भाव से बर्ताव करना चाहिए। "
+        "नमस्ते, मैं आपकी क्या मदद कर सकती हूँ? आज मौसम बहुत अच्छा है। "
+        "मुझे लगता है कि यह आपके सवाल का सबसे अच्छा जवाब है। अगर आपको कुछ और चाहिए तो मुझे बताइए। "
+        "नई दिल्ली भारत की राजधानी है और यमुना नदी के किनारे बसी है। सवाल के लिए धन्यवाद, मुझे आपकी मदद करके "
+        "खुशी होगी। काम कल सुबह शुरू होता है, इसलिए मैं अभी पूरी टीम को एक संदेश भेज रही हूँ। इस विषय के बारे में "
+        "आप और क्या जानना चाहेंगे? आज का दिन बहुत सुंदर है और बाहर गर्मी है।"
+    ),
+    "de": (
+        "Alle Menschen sind frei und gleich an Würde und Rechten geboren. Sie sind mit Vernunft und "
+        "Gewissen begabt und sollen einander im Geist der Brüderlichkeit begegnen. "
+        "Hallo, wie kann ich Ihnen heute helfen? Das Wetter ist schön und die Sonne scheint. "
+        "Ich glaube, das ist die beste Antwort auf Ihre Frage. Sagen Sie mir bitte, wenn Sie noch etwas brauchen. "
+        "Berlin ist die Hauptstadt von Deutschland und liegt an der Spree. Danke für die Frage, ich helfe dir "
+        "gerne. Die Arbeit beginnt morgen früh, deshalb schicke ich jetzt eine Nachricht an das ganze Team. "
+        "Was möchtest du sonst noch über dieses Thema wissen? Heute ist ein schöner Tag und draußen ist es warm."
+    ),
+    "es": (
+        "Todos los seres humanos nacen libres e iguales en dignidad y derechos y, dotados como están de "
+        "razón y conciencia, deben comportarse fraternalmente los unos con los otros. "
+        "Hola, ¿cómo puedo ayudarte hoy? El tiempo es agradable y el sol está brillando. "
+        "Creo que esta es la mejor respuesta a tu pregunta. Por favor, dime si necesitas algo más. "
+        "Madrid es la capital de España y está en el centro del país. Gracias por la pregunta, con gusto te "
+        "ayudo. El trabajo empieza mañana por la mañana, así que ahora enviaré un mensaje a todo el equipo. "
+        "¿Qué más te gustaría saber sobre este tema? Hoy hace un día precioso y hace calor afuera."
+    ),
+    "fr": (
+        "Tous les êtres humains naissent libres et égaux en dignité et en droits. Ils sont doués de raison "
+        "et de conscience et doivent agir les uns envers les autres dans un esprit de fraternité. "
+        "Bonjour, comment puis-je vous aider aujourd'hui ? Il fait beau et le soleil brille. "
+        "Je pense que c'est la meilleure réponse à votre question. Dites-moi si vous avez besoin d'autre chose. "
+        "Paris est la capitale de la France et se trouve sur la Seine. Merci pour la question, je vous aide "
+        "volontiers. Le travail commence demain matin, alors je vais maintenant envoyer un message à toute "
+        "l'équipe. Que voulez-vous savoir d'autre sur ce sujet ? Aujourd'hui il fait une belle journée et il fait chaud dehors."
+    ),
+    "gu": (
+        "પ્રતિષ્ઠા અને અધિકારોની દૃષ્ટિએ સર્વ માનવો જન્મથી સ્વતંત્ર અને સમાન હોય છે. "
+        "તેમનામાં વિચારશક્તિ અને અંતઃકરણ હોય છે અને તેમણે પરસ્પર બંધુત્વની ભાવનાથી વર્તવું જોઈએ. "
+        "નમસ્તે, હું આજે તમારી શું મદદ કરી શકું? આજે હવામાન ખૂબ સરસ છે. "
+        "મને લાગે છે કે આ તમારા પ્રશ્નનો શ્રેષ્ઠ જવાબ છે. જો તમને બીજું કંઈ જોઈએ તો મને કહો."
+    ),
+    "mr": (
+        "सर्व मानवी व्यक्ति जन्मतःच स्वतंत्र आहेत व त्यांना समान प्रतिष्ठा व समान अधिकार आहेत. "
+        "त्यांना विचारशक्ति व सदसद्विवेकबुद्धि लाभलेली आहे व त्यांनी एकमेकांशी बंधुत्वाच्या भावनेने आचरण करावे. "
+        "नमस्कार, मी आज तुमची काय मदत करू शकते? आज हवामान खूप छान आहे. "
+        "मला वाटते की हे तुमच्या प्रश्नाचे सर्वोत्तम उत्तर आहे. तुम्हाला आणखी काही हवे असल्यास मला सांगा. "
+        "मुंबई ही महाराष्ट्राची राजधानी आहे आणि ती समुद्राच्या किनाऱ्यावर वसलेली आहे. प्रश्नाबद्दल धन्यवाद, "
+        "मला तुमची मदत करायला आवडेल. काम उद्या सकाळी सुरू होते, म्हणून मी आता संपूर्ण टीमला एक संदेश पाठवते. "
+        "या विषयाबद्दल तुम्हाला आणखी काय जाणून घ्यायचे आहे? आज खूप सुंदर दिवस आहे आणि बाहेर उबदार आहे."
+    ),
+    "ta": (
+        "மனிதப் பிறவியினர் சகலரும் சுதந்திரமாகவே பிறக்கின்றனர்; அவர்கள் மதிப்பிலும், உரிமைகளிலும் "
+        "சமமானவர்கள். அவர்கள் நியாயத்தையும் மனசாட்சியையும் இயற்பண்பாகப் பெற்றவர்கள். "
+        "வணக்கம், இன்று நான் உங்களுக்கு எப்படி உதவ முடியும்? இன்று வானிலை நன்றாக உள்ளது. "
+        "இது உங்கள் கேள்விக்கு சிறந்த பதில் என்று நினைக்கிறேன். வேறு ஏதாவது தேவைப்பட்டால் சொல்லுங்கள்."
+    ),
+    "ar": (
+        "يولد جميع الناس أحرارًا متساوين في الكرامة والحقوق. وقد وهبوا عقلاً وضميرًا وعليهم أن "
+        "يعامل بعضهم بعضًا بروح الإخاء. "
+        "مرحبا، كيف يمكنني مساعدتك اليوم؟ الطقس جميل والشمس مشرقة. "
+        "أعتقد أن هذا هو أفضل جواب على سؤالك. من فضلك أخبرني إذا كنت بحاجة إلى أي شيء آخر."
+    ),
+    "ja": (
+        "すべての人間は、生まれながらにして自由であり、かつ、尊厳と権利とについて平等である。 "
+        "人間は、理性と良心とを授けられており、互いに同胞の精神をもって行動しなければならない。 "
+        "こんにちは、今日はどのようにお手伝いできますか？天気が良くて太陽が輝いています。 "
+        "これがあなたの質問に対する最良の答えだと思います。他に何か必要なことがあれば教えてください。"
+    ),
+    "ko": (
+        "모든 인간은 태어날 때부터 자유로우며 그 존엄과 권리에 있어 동등하다. 인간은 천부적으로 "
+        "이성과 양심을 부여받았으며 서로 형제애의 정신으로 행동하여야 한다. "
+        "안녕하세요, 오늘 무엇을 도와드릴까요? 날씨가 좋고 해가 빛나고 있습니다. "
+        "이것이 질문에 대한 가장 좋은 답변이라고 생각합니다. 다른 것이 필요하면 말씀해 주세요."
+    ),
+    "ru": (
+        "Все люди рождаются свободными и равными в своем достоинстве и правах. Они наделены разумом и "
+        "совестью и должны поступать в отношении друг друга в духе братства. "
+        "Здравствуйте, чем я могу вам помочь сегодня? Погода хорошая, и светит солнце. "
+        "Я думаю, что это лучший ответ на ваш вопрос. Пожалуйста, скажите, если вам нужно что-нибудь ещё."
+    ),
+    "pt": (
+        "Todos os seres humanos nascem livres e iguais em dignidade e em direitos. Dotados de razão e de "
+        "consciência, devem agir uns para com os outros em espírito de fraternidade. "
+        "Olá, como posso ajudar você hoje? O tempo está bom e o sol está brilhando. "
+        "Acho que esta é a melhor resposta para a sua pergunta. Por favor, me diga se precisar de mais alguma coisa. "
+        "Lisboa é a capital de Portugal e fica junto ao rio Tejo. Obrigado pela pergunta, terei todo o gosto "
+        "em ajudar. O trabalho começa amanhã de manhã, por isso agora vou enviar uma mensagem à equipa. "
+        "O que mais gostaria de saber sobre este assunto? Hoje está um dia lindo e faz calor lá fora."
+    ),
+    "it": (
+        "Tutti gli esseri umani nascono liberi ed eguali in dignità e diritti. Essi sono dotati di ragione "
+        "e di coscienza e devono agire gli uni verso gli altri in spirito di fratellanza. "
+        "Ciao, come posso aiutarti oggi? Il tempo è bello e il sole splende. "
+        "Penso che questa sia la migliore risposta alla tua domanda. Per favore, dimmi se hai bisogno di altro. "
+        "Roma è la capitale dell'Italia e si trova sul fiume Tevere. Grazie per la domanda, ti aiuto volentieri. "
+        "Il lavoro inizia domani mattina, quindi adesso mando un messaggio a tutta la squadra. Che cos'altro "
+        "vorresti sapere su questo argomento? Oggi è una bella giornata e fuori fa caldo."
+    ),
+    "tr": (
+        "Bütün insanlar hür, haysiyet ve haklar bakımından eşit doğarlar. Akıl ve vicdana sahiptirler ve "
+        "birbirlerine karşı kardeşlik zihniyeti ile hareket etmelidirler. "
+        "Merhaba, bugün size nasıl yardımcı olabilirim? Hava çok güzel ve güneş parlıyor. "
+        "Bence bu sorunuzun en iyi cevabı. Başka bir şeye ihtiyacınız olursa lütfen bana söyleyin. "
+        "Ankara Türkiye'nin başkentidir ve Anadolu'nun ortasında yer alır. Soru için teşekkürler, size "
+        "yardım etmekten mutluluk duyarım. İş yarın sabah başlıyor, bu yüzden şimdi bütün ekibe bir mesaj "
+        "göndereceğim. Bu konu hakkında başka ne bilmek istersiniz? Bugün çok güzel bir gün ve dışarısı sıcak."
+    ),
+    "nl": (
+        "Alle mensen worden vrij en gelijk in waardigheid en rechten geboren. Zij zijn begiftigd met verstand "
+        "en geweten, en behoren zich jegens elkander in een geest van broederschap te gedragen. "
+        "Hallo, hoe kan ik je vandaag helpen? Het weer is mooi en de zon schijnt. "
+        "Ik denk dat dit het beste antwoord op je vraag is. Laat het me weten als je nog iets nodig hebt. "
+        "Amsterdam is de hoofdstad van Nederland en ligt aan het IJ. Bedankt voor de vraag, ik help je graag. "
+        "Het werk begint morgenochtend, dus nu stuur ik een bericht naar het hele team. Wat wil je nog meer "
+        "weten over dit onderwerp? Vandaag is het een mooie dag en het is warm buiten."
+    ),
+    "pl": (
+        "Wszyscy ludzie rodzą się wolni i równi pod względem swej godności i swych praw. Są oni obdarzeni "
+        "rozumem i sumieniem i powinni postępować wobec innych w duchu braterstwa. "
+        "Cześć, jak mogę ci dzisiaj pomóc? Pogoda jest ładna i świeci słońce. "
+        "Myślę, że to najlepsza odpowiedź na twoje pytanie. Daj mi znać, jeśli potrzebujesz czegoś jeszcze. "
+        "Warszawa jest stolicą Polski i leży nad Wisłą. Dziękuję za pytanie, chętnie ci pomogę. Praca zaczyna "
+        "się jutro rano, więc teraz wyślę wiadomość do całego zespołu. Co jeszcze chciałbyś wiedzieć na ten "
+        "temat? Dzisiaj jest piękny dzień i na zewnątrz jest ciepło."
+    ),
+    "sv": (
+        "Alla människor är födda fria och lika i värde och rättigheter. De har utrustats med förnuft och "
+        "samvete och bör handla gentemot varandra i en anda av broderskap. "
+        "Hej, hur kan jag hjälpa dig idag? Vädret är fint och solen skiner. "
+        "Jag tror att detta är det bästa svaret på din fråga. Säg till om du behöver något mer. "
+        "Stockholm är Sveriges huvudstad och ligger där Mälaren möter Östersjön. Tack för frågan, jag hjälper "
+        "dig gärna. Arbetet börjar i morgon bitti, så nu skickar jag ett meddelande till hela laget. Vad vill "
+        "du mer veta om det här ämnet? I dag är det en vacker dag och det är varmt ute."
+    ),
+    "da": (
+        "Alle mennesker er født frie og lige i værdighed og rettigheder. De er udstyret med fornuft og "
+        "samvittighed, og de bør handle mod hverandre i en broderskabets ånd. "
+        "Hej, hvordan kan jeg hjælpe dig i dag? Vejret er dejligt, og solen skinner. "
+        "Jeg tror, at dette er det bedste svar på dit spørgsmål. Sig til, hvis du har brug for noget andet. "
+        "København er hovedstaden i Danmark og ligger på Sjælland. Tak for spørgsmålet, jeg hjælper dig "
+        "gerne. Arbejdet begynder i morgen tidlig, så nu sender jeg en besked til hele holdet. Hvad vil du "
+        "ellers gerne vide om dette emne? I dag er det en smuk dag, og det er varmt udenfor."
+    ),
+    "no": (
+        "Alle mennesker er født frie og med samme menneskeverd og menneskerettigheter. De er utstyrt med "
+        "fornuft og samvittighet og bør handle mot hverandre i brorskapets ånd. "
+        "Hei, hvordan kan jeg hjelpe deg i dag? Været er fint og solen skinner. "
+        "Jeg tror dette er det beste svaret på spørsmålet ditt. Si ifra hvis du trenger noe mer. "
+        "Oslo er hovedstaden i Norge og ligger innerst i Oslofjorden. Takk for spørsmålet, jeg hjelper deg "
+        "gjerne. Arbeidet begynner i morgen tidlig, så nå sender jeg en melding til hele teamet. Hva mer "
+        "vil du vite om dette emnet? I dag er det en vakker dag, og det er varmt ute."
+    ),
+    "fi": (
+        "Kaikki ihmiset syntyvät vapaina ja tasavertaisina arvoltaan ja oikeuksiltaan. Heille on annettu "
+        "järki ja omatunto, ja heidän on toimittava toisiaan kohtaan veljeyden hengessä. "
+        "Hei, miten voin auttaa sinua tänään? Sää on kaunis ja aurinko paistaa. "
+        "Luulen, että tämä on paras vastaus kysymykseesi. Kerro minulle, jos tarvitset vielä jotain. "
+        "Helsinki on Suomen pääkaupunki ja sijaitsee meren rannalla. Kiitos kysymyksestä, autan mielelläni. "
+        "Työ alkaa huomenna aamulla, joten lähetän nyt viestin koko tiimille. Mitä muuta haluaisit tietää "
+        "tästä aiheesta? Tänään on kaunis päivä ja ulkona on lämmintä."
+    ),
+    "hu": (
+        "Minden emberi lény szabadon születik és egyenlő méltósága és joga van. Az emberek, ésszel és "
+        "lelkiismerettel bírván, egymással szemben testvéri szellemben kell hogy viseltessenek. "
+        "Szia, miben segíthetek ma? Szép az idő és süt a nap. "
+        "Szerintem ez a legjobb válasz a kérdésedre. Kérlek, szólj, ha még valamire szükséged van. "
+        "Budapest Magyarország fővárosa és legnagyobb városa, a Duna két partján fekszik. "
+        "Köszönöm szépen a kérdést, örömmel segítek neked bármikor. A munka holnap reggel kezdődik, "
+        "ezért most elküldöm az üzenetet a csapatnak. Mit szeretnél még tudni erről a témáról?"
+    ),
+    "cs": (
+        "Všichni lidé rodí se svobodní a sobě rovní co do důstojnosti a práv. Jsou nadáni rozumem a "
+        "svědomím a mají spolu jednat v duchu bratrství. "
+        "Ahoj, jak ti dnes mohu pomoci? Počasí je pěkné a svítí slunce. "
+        "Myslím, že tohle je nejlepší odpověď na tvou otázku. Dej mi prosím vědět, jestli potřebuješ něco dalšího. "
+        "Praha je hlavní město České republiky a leží na řece Vltavě. Děkuji za otázku, rád ti pomohu. "
+        "Práce začíná zítra ráno, proto teď pošlu zprávu celému týmu. Co bys ještě chtěl vědět o tomto "
+        "tématu? Dnes je krásný den a venku je teplo."
+    ),
+    "sk": (
+        "Všetci ľudia sa rodia slobodní a sebe rovní, čo sa týka ich dôstojnosti a práv. Sú obdarení "
+        "rozumom a svedomím a majú navzájom jednať v bratskom duchu. "
+        "Ahoj, ako ti dnes môžem pomôcť? Počasie je pekné a svieti slnko. "
+        "Myslím si, že toto je najlepšia odpoveď na tvoju otázku. Daj mi prosím vedieť, ak potrebuješ niečo ďalšie. "
+        "Bratislava je hlavné mesto Slovenska a leží na brehu Dunaja. Ďakujem za otázku, rád ti pomôžem. "
+        "Práca sa začína zajtra ráno, preto teraz pošlem správu celému tímu. Čo by si ešte chcel vedieť "
+        "o tejto téme? Dnes je krásny deň a vonku je teplo."
+    ),
+    "el": (
+        "Όλοι οι άνθρωποι γεννιούνται ελεύθεροι και ίσοι στην αξιοπρέπεια και τα δικαιώματα. Είναι "
+        "προικισμένοι με λογική και συνείδηση, και οφείλουν να συμπεριφέρονται μεταξύ τους με πνεύμα αδελφοσύνης. "
+        "Γεια σας, πώς μπορώ να σας βοηθήσω σήμερα; Ο καιρός είναι ωραίος και ο ήλιος λάμπει. "
+        "Νομίζω ότι αυτή είναι η καλύτερη απάντηση στην ερώτησή σας. Πείτε μου αν χρειάζεστε κάτι άλλο."
+    ),
+    "id": (
+        "Semua orang dilahirkan merdeka dan mempunyai martabat dan hak-hak yang sama. Mereka dikaruniai "
+        "akal dan hati nurani dan hendaknya bergaul satu sama lain dalam semangat persaudaraan. "
+        "Halo, bagaimana saya bisa membantu Anda hari ini? Cuacanya bagus dan matahari bersinar. "
+        "Saya pikir ini adalah jawaban terbaik untuk pertanyaan Anda. Beri tahu saya jika Anda membutuhkan hal lain. "
+        "Jakarta adalah ibu kota Indonesia dan terletak di pulau Jawa. Terima kasih atas pertanyaannya, saya "
+        "senang membantu. Pekerjaan dimulai besok pagi, jadi sekarang saya akan mengirim pesan kepada seluruh "
+        "tim. Apa lagi yang ingin Anda ketahui tentang topik ini? Hari ini adalah hari yang indah dan di luar hangat."
+    ),
+}
@@ -0,0 +1,192 @@
+"""
+Unified logging setup for every entry point.
+
+Records are handed to a QueueHandler so the event loop never blocks on disk or
+console I/O; a QueueListener thread formats them as JSON and writes them to the
+console and (outside Vercel) a size-rotated log file. High-volume INFO lines
+can be sampled, and each record carries the current request id.
+"""
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+IS_VERCEL = os.environ.get('VERCEL') == '1'
+
+# Logging settings, overridable through environment variables
+LOG_DIR = "/tmp/logs" if IS_VERCEL else "logs"
+LOG_FILE = os.path.join(LOG_DIR, "app.log")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()  # "json" or "text"
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Fraction of INFO (and lower) records kept from the sampled loggers
+LOG_INFO_SAMPLE_RATE = float(os.environ.get("LOG_INFO_SAMPLE_RATE", 1.0))
+SAMPLED_LOGGERS = ("core.chat", "routes.chat_routes", "api.access")
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Request id of the request currently being handled, set by the middleware
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+# Attributes present on every LogRecord; anything else was passed via extra=
+_RESERVED_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the id of the request that produced it."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of low-severity records from noisy loggers.
+
+    WARNING and above always pass. Records logged with extra={"sample": False}
+    are never dropped.
+    """
+
+    def __init__(self, rate: float, logger_names=SAMPLED_LOGGERS):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self.logger_names = tuple(logger_names)
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno > logging.INFO:
+            return True
+        if not record.name.startswith(self.logger_names) or not getattr(record, "sample", True):
+            return True
+        # Deterministic 1-in-N sampling without a random number per record
+        with self._lock:
+            self._credit += self.rate
+            if self._credit >= 1.0:
+                self._credit -= 1.0
+                return True
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Merge args into the message in place rather than formatting and
+        # copying the record; the writer thread does the real formatting.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as a single-line JSON object."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in payload and key != "sample":
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+def _build_output_handlers(formatter):
+    handlers = [logging.StreamHandler()]
+    # On Vercel, rely on console output only
+    if not IS_VERCEL:
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            handlers.append(logging.handlers.RotatingFileHandler(
+                LOG_FILE,
+                maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUP_COUNT,
+                encoding="utf-8",
+                delay=True,
+            ))
+        except OSError as e:
+            print(f"Warning: Could not set up file logging: {str(e)}")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging(level: str = None):
+    """Configure the root logger once; later calls are no-ops.
+
+    Returns the QueueListener driving the background writer thread.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else _TextFormatter(TEXT_FORMAT)
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(LOG_INFO_SAMPLE_RATE))
+        queue_handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level or LOG_LEVEL)
+
+        # Third-party loggers that are too chatty at INFO
+        for name in ("httpx", "httpcore", "groq", "pygame"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, *_build_output_handlers(formatter), respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
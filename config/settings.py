@@ -1,8 +1,22 @@
 from dotenv import load_dotenv
+import json
 import os
 from typing import Optional, Dict
 from pathlib import Path
 
+# Sampling options per endpoint (summarize, scenario) and per /chat query class
+# (greeting, short_answer, chat, long_form), see core.generation. The default
+# model's reasoning tokens count against max_tokens, so every limit leaves room
+# for them on top of the answer itself
+DEFAULT_GENERATION_PROFILES = {
+    "greeting": {"max_tokens": 512, "temperature": 0.7, "reasoning_effort": "low"},
+    "short_answer": {"max_tokens": 1024, "temperature": 0.5, "reasoning_effort": "low"},
+    "chat": {"max_tokens": 2048, "temperature": 0.7, "reasoning_effort": "low"},
+    "long_form": {"max_tokens": 4096, "temperature": 0.7, "reasoning_effort": "medium"},
+    "summarize": {"max_tokens": 1536, "temperature": 0.3, "reasoning_effort": "low"},
+    "scenario": {"max_tokens": 1024, "temperature": 0.6, "reasoning_effort": "low"},
+}
+
 class Settings:
     def __init__(self):
         # Load environment variables from .env file if it exists
@@ -14,6 +28,8 @@ class Settings:
         self.USERNAME = self.env_vars.get("Username", "Assistant")
         self.ASSISTANT_NAME = self.env_vars.get("Assistantname", "AI Assistant")
         self.GROQ_API_KEY = self.get_required_env_var("GroqAPIKey")
+        # Optional override of the API host, e.g. a local stub for benchmarks
+        self.GROQ_BASE_URL = self.env_vars.get("GROQ_BASE_URL") or None
         
         # Check if running on Vercel for path settings
         self.IS_VERCEL = os.environ.get('VERCEL') == '1'
@@ -23,10 +39,75 @@ class Settings:
             # Use /tmp directory for Vercel (serverless functions can write here)
             self.CHAT_LOG_PATH = "/tmp/data/ChatLog.json"
             self.SPEECH_FILE_PATH = "/tmp/speech.mp3"
+            self.AUDIO_CACHE_DIR = "/tmp/audio/cache"
+            self.STATE_DB_PATH = "/tmp/data/state.db"
+            self.ARCHIVE_DIR = "/tmp/data/archive"
         else:
             # Local paths
             self.CHAT_LOG_PATH = "Data/ChatLog.json"
             self.SPEECH_FILE_PATH = "speech.mp3"
+            self.AUDIO_CACHE_DIR = "audio/cache"
+            self.STATE_DB_PATH = "Data/state.db"
+            self.ARCHIVE_DIR = "Data/archive"
+
+        # State shared by all workers: "sqlite" (default) or "memory" for a single process
+        self.STATE_BACKEND = self.env_vars.get("STATE_BACKEND", "sqlite").lower()
+        self.STATE_DB_PATH = self.env_vars.get("STATE_DB_PATH", self.STATE_DB_PATH)
+        # Messages sent upstream per turn; older ones stay stored but are not loaded
+        self.HISTORY_MAX_MESSAGES = int(self.env_vars.get("HISTORY_MAX_MESSAGES", 50))
+        # History is trimmed this many messages at a time (rounded up to whole turns),
+        # so the prompt prefix the provider caches only changes once per block
+        trim_block = int(self.env_vars.get("HISTORY_TRIM_BLOCK", 20))
+        self.HISTORY_TRIM_BLOCK = max(2, trim_block + trim_block % 2)
+        # Retention: idle sessions and turns beyond the limit move to compressed archive segments
+        self.HISTORY_SESSION_TTL = int(self.env_vars.get("HISTORY_SESSION_TTL", 30 * 24 * 3600))
+        self.HISTORY_MAX_TURNS = int(self.env_vars.get("HISTORY_MAX_TURNS", 200))
+        self.RETENTION_INTERVAL = int(self.env_vars.get("RETENTION_INTERVAL", 3600))
+        self.ARCHIVE_DIR = self.env_vars.get("ARCHIVE_DIR", self.ARCHIVE_DIR)
+        self.ARCHIVE_COMPRESSION = self.env_vars.get("ARCHIVE_COMPRESSION", "gzip").lower()
+        self.ARCHIVE_SEGMENT_MAX_BYTES = int(self.env_vars.get("ARCHIVE_SEGMENT_MAX_BYTES", 64 * 1024 * 1024))
+        # Prompt layout: optional static background text appended to the cached
+        # system prompt, and the rounding applied to the time sent with each request
+        self.PROMPT_CONTEXT_PATH = self.env_vars.get("PROMPT_CONTEXT_PATH") or None
+        self.PROMPT_TIME_GRANULARITY = int(self.env_vars.get("PROMPT_TIME_GRANULARITY", 60))
+        # Near-duplicate answer cache for first-turn /chat queries (off by default)
+        self.SEMANTIC_CACHE_ENABLED = self.env_vars.get("SEMANTIC_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+        self.SEMANTIC_CACHE_THRESHOLD = float(self.env_vars.get("SEMANTIC_CACHE_THRESHOLD", 0.75))
+        self.SEMANTIC_CACHE_TTL = int(self.env_vars.get("SEMANTIC_CACHE_TTL", 24 * 3600))
+        self.SEMANTIC_CACHE_MAX_ENTRIES = int(self.env_vars.get("SEMANTIC_CACHE_MAX_ENTRIES", 5000))
+        # Generation profiles. GENERATION_PROFILES takes a JSON object whose entries
+        # override or extend the defaults, e.g. {"chat": {"max_tokens": 512}}
+        self.GENERATION_PROFILES = self._load_generation_profiles()
+        # Classify /chat queries to pick a profile; when off every query uses "chat"
+        self.GENERATION_CLASSIFY_QUERIES = self.env_vars.get("GENERATION_CLASSIFY_QUERIES", "1").lower() in ("1", "true", "yes")
+        # /summarize/upload: largest accepted file, the characters of text summarized
+        # per upstream call before partial summaries are combined, and the most
+        # chunks (upstream calls) one upload may need, 0 for no limit
+        self.SUMMARIZE_UPLOAD_MAX_BYTES = int(self.env_vars.get("SUMMARIZE_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+        self.SUMMARIZE_CHUNK_CHARS = int(self.env_vars.get("SUMMARIZE_CHUNK_CHARS", 12000))
+        self.SUMMARIZE_MAX_CHUNKS = int(self.env_vars.get("SUMMARIZE_MAX_CHUNKS", 40))
+        # /sessions endpoints require "Authorization: Bearer <key>" and are disabled when unset
+        self.HISTORY_API_KEY = self.env_vars.get("HISTORY_API_KEY") or None
+        # Requests per client per minute across all workers, 0 disables the limit
+        self.RATE_LIMIT_PER_MINUTE = int(self.env_vars.get("RATE_LIMIT_PER_MINUTE", 0))
+        # Reverse proxies in front of the app that append to X-Forwarded-For. With 0
+        # the header is ignored and clients are identified by their peer address
+        self.TRUSTED_PROXY_HOPS = int(self.env_vars.get("TRUSTED_PROXY_HOPS", 0))
+        # Opt-in traffic capture for load replay (see api.capture). Text values are
+        # masked with same-length filler unless TRAFFIC_CAPTURE_REDACT_TEXT=0
+        self.TRAFFIC_CAPTURE_PATH = self.env_vars.get("TRAFFIC_CAPTURE_PATH") or None
+        self.TRAFFIC_CAPTURE_EXCLUDE = tuple(
+            prefix for prefix in self.env_vars.get("TRAFFIC_CAPTURE_EXCLUDE", "/metrics,/static/,/favicon.ico").split(",")
+            if prefix
+        )
+        self.TRAFFIC_CAPTURE_MAX_BODY_BYTES = int(self.env_vars.get("TRAFFIC_CAPTURE_MAX_BODY_BYTES", 256 * 1024))
+        self.TRAFFIC_CAPTURE_MAX_BYTES = int(self.env_vars.get("TRAFFIC_CAPTURE_MAX_BYTES", 100 * 1024 * 1024))
+        self.TRAFFIC_CAPTURE_REDACT_TEXT = self.env_vars.get("TRAFFIC_CAPTURE_REDACT_TEXT", "1").lower() in ("1", "true", "yes")
+
+        # Text-to-speech: "edge" (needs the edge-tts package) or "stub" for tests
+        self.TTS_ENGINE = self.env_vars.get("TTS_ENGINE", "edge").lower()
+        self.TTS_CONCURRENCY = int(self.env_vars.get("TTS_CONCURRENCY", 4))
+        self.AUDIO_CACHE_MAX_BYTES = int(self.env_vars.get("AUDIO_CACHE_MAX_BYTES", 200 * 1024 * 1024))
     
     def _get_env_vars(self) -> Dict[str, str]:
         """Combine environment variables from both .env file and system environment."""
@@ -38,6 +119,26 @@ class Settings:
             env_vars[key] = value
             
         return env_vars
+    def _load_generation_profiles(self) -> Dict[str, dict]:
+        """Default generation profiles merged with the GENERATION_PROFILES overrides."""
+        profiles = {name: dict(options) for name, options in DEFAULT_GENERATION_PROFILES.items()}
+        raw = self.env_vars.get("GENERATION_PROFILES")
+        if not raw:
+            return profiles
+        try:
+            overrides = json.loads(raw)
+        except ValueError as e:
+            raise EnvironmentError(f"GENERATION_PROFILES is not valid JSON: {str(e)}")
+        if not isinstance(overrides, dict) or not all(isinstance(v, dict) for v in overrides.values()):
+            raise EnvironmentError("GENERATION_PROFILES must map profile names to objects of options")
+        for name, options in overrides.items():
+            merged = {**profiles.get(name, profiles["chat"]), **options}
+            for key in ("stop", "reasoning_effort"):
+                if key in options and options[key] is None:
+                    merged.pop(key)
+            profiles[name] = merged
+        return profiles
+
     def _validate_required_env_vars(self) -> None:
         """Validate that all required environment variables are present."""
         required_vars = ["GroqAPIKey"]
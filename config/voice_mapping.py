@@ -117,3 +117,37 @@ LANGUAGE_MAPPING = [
 # Default voice to use if language detection fails
 DEFAULT_VOICE = "en-US-JennyNeural"
 
+
+GENDERS = ("male", "female")
+
+
+def build_voice_index():
+    """Precompute (language, gender) -> voice for every known language.
+
+    gender is "male", "female" or None for the language's default voice.
+    Languages without a gendered voice (e.g. no male Arabic or Turkish voice)
+    fall back to the language's default voice, and that falls back to
+    DEFAULT_VOICE.
+    """
+    index = {}
+    languages = set(VOICE_MAPPING) | set(VOICE_MAPPING_MALE) | set(VOICE_MAPPING_FEMALE)
+    for language in languages:
+        default = VOICE_MAPPING.get(language, DEFAULT_VOICE)
+        index[(language, None)] = default
+        index[(language, "male")] = VOICE_MAPPING_MALE.get(language, default)
+        index[(language, "female")] = VOICE_MAPPING_FEMALE.get(language, default)
+    return index
+
+
+VOICE_INDEX = build_voice_index()
+KNOWN_VOICES = frozenset(VOICE_INDEX.values()) | {DEFAULT_VOICE}
+KNOWN_LANGUAGES = frozenset(language for language, _ in VOICE_INDEX)
+
+
+def select_voice(language, gender=None):
+    """Voice for a language code or locale (e.g. "hi" or "hi-IN") and optional gender.
+
+    Unknown languages, such as zh-CN from SUPPORTED_LANGUAGES, get DEFAULT_VOICE.
+    """
+    code = (language or "").split("-")[0].lower()
+    return VOICE_INDEX.get((code, gender), DEFAULT_VOICE)
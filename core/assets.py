@@ -0,0 +1,179 @@
+"""
+In-memory store for the chat UI template and static assets.
+
+Everything is read, fingerprinted and pre-compressed once at startup so that
+page loads never touch the filesystem. Responses carry strong ETags and honour
+If-None-Match, and static URLs embedded in the template are rewritten to
+content-hashed versions that can be cached for a long time.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+
+from fastapi import Request, Response
+
+from core.metrics import CACHE_REQUESTS
+
+try:
+    import brotli  # Optional: better ratios than gzip when available
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Only bother compressing types that actually shrink
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "image/svg+xml",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+)
+# Keep a compressed variant only if it saves at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+# Cache policies
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+STATIC_URL_PREFIX = "/static/"
+_STATIC_REF_PATTERN = re.compile(r"""(["'])/?static/([^"'?#$]+)\1""")
+
+
+class Asset:
+    """A single file held in memory along with its compressed variants."""
+
+    def __init__(self, content: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(content).hexdigest()[:16]
+        self.etag = f'"{self.digest}"'
+        # Encoding name -> (body, etag). Identity is always present.
+        self.variants = {"identity": (content, self.etag)}
+
+        if media_type.startswith(COMPRESSIBLE_TYPES) and content:
+            threshold = len(content) * (1 - MIN_COMPRESSION_SAVING)
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                if len(compressed) < threshold:
+                    self.variants["br"] = (compressed, f'"{self.digest}-br"')
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < threshold:
+                self.variants["gzip"] = (compressed, f'"{self.digest}-gz"')
+
+    @property
+    def size(self) -> int:
+        return len(self.variants["identity"][0])
+
+    def matches(self, if_none_match: str) -> bool:
+        """Check an If-None-Match header against any representation of this asset."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        etags = {etag for _, etag in self.variants.values()}
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate in etags:
+                return True
+        return False
+
+    def select_encoding(self, accept_encoding: str) -> str:
+        """Pick the best available encoding the client accepts."""
+        accepted = set()
+        for part in (accept_encoding or "").split(","):
+            token, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(token.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        """Build a full or 304 response for this asset."""
+        encoding = self.select_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        if self.matches(request.headers.get("if-none-match", "")):
+            CACHE_REQUESTS.inc("http_etag", "hit")
+            return Response(status_code=304, headers=headers)
+        CACHE_REQUESTS.inc("http_etag", "miss")
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class AssetStore:
+    """Loads static files and the UI template once and serves them from memory."""
+
+    def __init__(self, static_dir: str = None, template_path: str = None):
+        self.static_dir = static_dir
+        self.static = {}
+        self.template = None
+
+        if static_dir:
+            self._load_static(static_dir)
+        if template_path:
+            self._load_template(template_path)
+
+        total = sum(asset.size for asset in self.static.values())
+        logger.info(f"Loaded {len(self.static)} static assets ({total} bytes) into memory")
+
+    def _load_static(self, static_dir: str):
+        for root, _, files in os.walk(static_dir):
+            for name in files:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, static_dir).replace(os.sep, "/")
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                try:
+                    with open(full_path, "rb") as f:
+                        self.static[rel_path] = Asset(f.read(), media_type)
+                except OSError as e:
+                    logger.error(f"Error reading static file {full_path}: {str(e)}")
+
+    def _load_template(self, template_path: str):
+        try:
+            with open(template_path, "r", encoding="utf-8") as f:
+                html = f.read()
+        except OSError as e:
+            logger.error(f"Error reading template file {template_path}: {str(e)}")
+            return
+        logger.info(f"Loaded template from: {template_path}")
+        html = _STATIC_REF_PATTERN.sub(self._rewrite_static_ref, html)
+        self.template = Asset(html.encode("utf-8"), "text/html")
+
+    def _rewrite_static_ref(self, match) -> str:
+        quote, rel_path = match.group(1), match.group(2)
+        if rel_path not in self.static:
+            return match.group(0)
+        return f"{quote}{self.url_for(rel_path)}{quote}"
+
+    def url_for(self, rel_path: str) -> str:
+        """Return the content-hashed URL for a static asset."""
+        asset = self.static.get(rel_path)
+        if asset is None:
+            return STATIC_URL_PREFIX + rel_path
+        return f"{STATIC_URL_PREFIX}{rel_path}?v={asset.digest}"
+
+    def serve_static(self, request: Request, rel_path: str) -> Response:
+        asset = self.static.get(rel_path)
+        if asset is None:
+            return Response(status_code=404)
+        # Only a URL carrying the current content hash may be cached forever
+        if request.query_params.get("v") == asset.digest:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = REVALIDATE_CACHE_CONTROL
+        return asset.response(request, cache_control)
@@ -1,50 +1,37 @@
 import datetime
 import logging
-import os
+import time
 import traceback
-import json
-from json import load, dump
 from groq import Groq
 from fastapi import HTTPException
 from config.settings import settings
+from core import metrics
+from core.generation import load_profiles, select_profile
+from core.semantic_cache import create_semantic_cache
+from core.state import DEFAULT_SESSION, get_state_backend
 
-# Check if running on Vercel
-IS_VERCEL = os.environ.get('VERCEL') == '1'
-
-# Set up logging based on environment
-if IS_VERCEL:
-    # In Vercel, use /tmp for writable files
-    LOG_DIR = "/tmp/logs"
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR, exist_ok=True)
-    
-    # Configure logging - in Vercel, we might need to rely more on console output
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler()  # Just use console logging on Vercel
-        ]
-    )
-else:
-    # Local development: use regular log directory
-    LOG_DIR = "logs"
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR)
-        
-    # Configure logging with file output
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(os.path.join(LOG_DIR, 'app.log')),
-            logging.StreamHandler()
-        ]
-    )
 logger = logging.getLogger(__name__)
 
 ALLOWED_MODELS = ["llama3-70b-8192", "mixtral-8x7b-32768"]
 DEFAULT_MODEL = "openai/gpt-oss-120b"
+# An empty answer cut off by max_tokens is retried once with this many times the limit
+LENGTH_RETRY_FACTOR = 2
+
+
+def history_window(total: int, max_messages: int, block: int) -> int:
+    """How many of a session's newest messages to load for the next turn.
+
+    Instead of sliding by one turn on every request, the window starts at a
+    multiple of block, so its first message stays put until the session grows
+    by another block. It then holds between max_messages - block + 1 and
+    max_messages messages.
+    """
+    if not max_messages or total <= max_messages:
+        return total
+    block = max(1, min(block, max_messages))
+    start = -(-(total - max_messages) // block) * block
+    return total - start
+
 
 class ChatManager:
     def __init__(self):
@@ -54,23 +41,21 @@ class ChatManager:
             if not api_key:
                 raise ValueError("GROQ_API_KEY is not set in environment variables or .env file")
             
-            self.client = Groq(api_key=api_key)
+            self.client = Groq(api_key=api_key, base_url=settings.GROQ_BASE_URL)
             self.system_message = self._create_system_message()
+            # Identical leading messages on every request let the provider reuse its prompt cache
+            self.prompt_prefix = self._build_prompt_prefix()
+            # Optional near-duplicate answer cache (SEMANTIC_CACHE_ENABLED)
+            self.semantic_cache = create_semantic_cache()
             self.model = DEFAULT_MODEL
+            # max_tokens, temperature and stop sequences per endpoint and query class
+            self.profiles = load_profiles()
             
             # Validate model availability without making a full API call
             logger.info(f"Initialized ChatManager with model: {self.model}")
             
-            # Ensure chat log directory exists
-            chat_log_dir = os.path.dirname(settings.CHAT_LOG_PATH)
-            if not os.path.exists(chat_log_dir):
-                os.makedirs(chat_log_dir)
-            
-            # Create empty chat log if it doesn't exist
-            if not os.path.exists(settings.CHAT_LOG_PATH):
-                with open(settings.CHAT_LOG_PATH, "w") as f:
-                    f.write("[]")
-                logger.info(f"Created empty chat log at {settings.CHAT_LOG_PATH}")
+            # History lives in the shared state backend so every worker sees it
+            self.state = get_state_backend()
                 
         except Exception as e:
             logger.error(f"Error initializing ChatManager: {str(e)}")
@@ -89,23 +74,56 @@ class ChatManager:
 *** Always use respectful and professional language, addressing the user in a friendly manner. ***
 """
 
+    def _build_prompt_prefix(self):
+        """Messages every request starts with, built once per configuration.
+
+        Providers cache prompts by exact prefix, so nothing that changes per
+        request (time, user, query) may appear here.
+        """
+        content = self.system_message
+        context = self._load_static_context()
+        if context:
+            content = f"{content}\nBackground information you can rely on:\n{context}\n"
+        return ({"role": "system", "content": content},)
+
+    def _load_static_context(self):
+        if not settings.PROMPT_CONTEXT_PATH:
+            return ""
+        try:
+            with open(settings.PROMPT_CONTEXT_PATH, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError as e:
+            logger.warning(f"Could not read prompt context {settings.PROMPT_CONTEXT_PATH}: {str(e)}")
+            return ""
+
     def _get_realtime_info(self):
-        current_date_time = datetime.datetime.now()
-        return f"Day: {current_date_time.strftime('%A')}, Date: {current_date_time.strftime('%d %B %Y')}, Time: {current_date_time.strftime('%H:%M:%S')}"
+        # Rounded down so consecutive requests share the same text
+        granularity = max(1, settings.PROMPT_TIME_GRANULARITY)
+        current_date_time = datetime.datetime.fromtimestamp(time.time() // granularity * granularity)
+        return f"Day: {current_date_time.strftime('%A')}, Date: {current_date_time.strftime('%d %B %Y')}, Time: {current_date_time.strftime('%H:%M')}"
     
     def _modify_answer(self, answer: str) -> str:
         if not answer:
             return ""
         return '\n'.join([line for line in answer.split('\n') if line.strip()])
 
-    def _chunk_messages(self, messages, max_tokens=5000):
-        """Split messages into smaller chunks to avoid token limit."""
+    def _chunk_messages(self, messages, max_tokens=5000, block=None):
+        """Drop the oldest messages, a block at a time, until the rest fit in max_tokens.
+
+        Whole blocks keep the first message, and with it the cached prompt
+        prefix, unchanged while the history grows by less than a block.
+        """
+        block = block or settings.HISTORY_TRIM_BLOCK
         # Rough estimate: 4 chars ~= 1 token
         total_length = sum(len(msg["content"]) for msg in messages)
-        if total_length / 4 <= max_tokens:
-            return messages
+        start = 0
+        while total_length / 4 > max_tokens and start < len(messages):
+            total_length -= sum(len(msg["content"]) for msg in messages[start:start + block])
+            start += block
+        if start < len(messages):
+            return messages[start:]
 
-        # Keep only the most recent messages that fit within the token limit
+        # Even the last block is too long: keep the most recent messages that fit
         result = []
         current_length = 0
         for msg in reversed(messages):
@@ -117,75 +135,73 @@ class ChatManager:
         
         return result
 
-    def chat(self, query: str, user_name=None) -> str:
+    def chat(self, query: str, user_name=None, session_id: str = DEFAULT_SESSION, cacheable: bool = False,
+             profile: str = None) -> str:
+        """Answer a query in the context of a session's history.
+
+        cacheable allows the semantic answer cache to serve the query when it
+        opens a session; later turns always go upstream because their answers
+        depend on the conversation so far. profile names the generation
+        profile to use; when it is None the query is classified. A session_id
+        of None sends the query without history and does not store the turn.
+        """
         if not query or not query.strip():
             logger.error("Empty query provided")
             raise ValueError("Empty query provided")
 
         try:
-            messages = self._load_chat_history()
-            messages.append({"role": "user", "content": query})
-            
-            # Chunk messages to avoid token limit
-            chunked_messages = self._chunk_messages(messages)
-            
-            # Update system message with user name if provided
-            system_message = self._create_system_message(user_name)
-            
-            logger.info(f"Sending request to Groq API with model: {self.model}")
+            with metrics.chat_stage("load_history"):
+                messages = self._load_chat_history(session_id)
+            user_message = {"role": "user", "content": query}
+
+            answer_cache = self.semantic_cache if cacheable and not messages else None
+            if answer_cache is not None:
+                with metrics.chat_stage("semantic_cache"):
+                    cached_answer = answer_cache.lookup(query)
+                if cached_answer is not None:
+                    with metrics.chat_stage("save_history"):
+                        self._save_chat_history(session_id, [user_message, {"role": "assistant", "content": cached_answer}])
+                    return self._modify_answer(cached_answer)
+
+            # Trim the history to the token budget; the query itself is always sent,
+            # however long, so a long document part is never dropped
+            with metrics.chat_stage("chunk_messages"):
+                chunked_messages = self._chunk_messages(messages) + [user_message]
             
-            # Implement retry logic for API calls
-            max_retries = 3
-            retry_count = 0
+            generation = select_profile(self.profiles, query, profile)
+            logger.info("Sending request to Groq API", extra={"model": self.model, "profile": generation.name})
             
-            while retry_count < max_retries:
-                try:
-                    completion = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": system_message},
-                            {"role": "system", "content": self._get_realtime_info()},
-                            *chunked_messages
-                        ],
-                        max_tokens=1024,
-                        temperature=0.7,
-                        top_p=1,
-                        stream=False,
-                        timeout=30
-                    )
-                    logger.info("Successfully received response from Groq API")
-                    break  # Break the retry loop if successful
-                except Exception as api_error:
-                    retry_count += 1
-                    logger.warning(f"API call attempt {retry_count} failed: {str(api_error)}")
-                    if retry_count >= max_retries:
-                        error_details = f"API error after {max_retries} attempts: {str(api_error)}"
-                        logger.error(error_details)
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"API error: {str(api_error)}"
-                        )
-            
-            if not completion or not hasattr(completion, 'choices') or not completion.choices:
-                error_msg = f"Invalid API response structure: {completion}"
-                logger.error(error_msg)
-                raise HTTPException(
-                    status_code=500,
-                    detail="Invalid response from the chat service"
+            # Stable prefix first, then history (trimmed in whole blocks), volatile time last
+            request_messages = [
+                *self.prompt_prefix,
+                *chunked_messages,
+                {"role": "system", "content": self._get_realtime_info()},
+            ]
+            completion = self._create_completion(request_messages, generation)
+            answer, finish_reason = self._completion_answer(completion)
+            if not answer.strip() and finish_reason == "length":
+                # Reasoning tokens count against max_tokens; the model used them all before answering
+                logger.warning(
+                    f"Generation profile {generation.name!r} ran out of tokens before answering, retrying once",
+                    extra={"profile": generation.name, "max_tokens": generation.max_tokens},
                 )
-            
-            answer = completion.choices[0].message.content
-            if not answer or not answer.strip():
-                logger.error("Empty response received from API")
+                completion = self._create_completion(
+                    request_messages, generation, max_tokens=generation.max_tokens * LENGTH_RETRY_FACTOR
+                )
+                answer, finish_reason = self._completion_answer(completion)
+            if not answer.strip():
+                logger.error("Empty response received from API", extra={"finish_reason": finish_reason})
                 raise HTTPException(
                     status_code=500,
                     detail="Empty response from the chat service"
                 )
             
-            messages.append({"role": "assistant", "content": answer})
-            
+            if answer_cache is not None:
+                answer_cache.store(query, answer)
+
             try:
-                self._save_chat_history(messages)
+                with metrics.chat_stage("save_history"):
+                    self._save_chat_history(session_id, [user_message, {"role": "assistant", "content": answer}])
             except Exception as e:
                 logger.warning(f"Failed to save chat history: {str(e)}\n{traceback.format_exc()}")
                 
@@ -204,31 +220,85 @@ class ChatManager:
                 detail="An unexpected error occurred while processing your request"
             )
 
-    def _load_chat_history(self):
+    def _create_completion(self, messages, generation, max_tokens: int = None):
+        """One chat completion with the profile's options, retried on API errors."""
+        options = generation.options()
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        max_retries = 3
+        retry_count = 0
+        
+        while True:
+            try:
+                api_start = time.perf_counter()
+                with metrics.chat_stage("upstream"):
+                    completion = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        **options,
+                        top_p=1,
+                        stream=False,
+                        timeout=30
+                    )
+                api_seconds = time.perf_counter() - api_start
+                usage = getattr(completion, "usage", None)
+                cached_tokens = metrics.record_usage(usage)
+                finish_reason = completion.choices[0].finish_reason if getattr(completion, "choices", None) else None
+                metrics.record_generation(generation.name, api_seconds, usage, finish_reason)
+                logger.info(
+                    "Successfully received response from Groq API",
+                    extra={
+                        "upstream_ms": round(api_seconds * 1000, 3),
+                        "cached_tokens": cached_tokens,
+                        "profile": generation.name,
+                        "finish_reason": finish_reason,
+                    },
+                )
+                return completion
+            except Exception as api_error:
+                retry_count += 1
+                metrics.UPSTREAM_RETRIES.inc()
+                logger.warning(f"API call attempt {retry_count} failed: {str(api_error)}")
+                if retry_count >= max_retries:
+                    error_details = f"API error after {max_retries} attempts: {str(api_error)}"
+                    logger.error(error_details)
+                    metrics.UPSTREAM_ERRORS.inc()
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"API error: {str(api_error)}"
+                    )
+
+    def _completion_answer(self, completion):
+        """The answer text and finish reason of a completion."""
+        if not completion or not hasattr(completion, 'choices') or not completion.choices:
+            error_msg = f"Invalid API response structure: {completion}"
+            logger.error(error_msg)
+            raise HTTPException(
+                status_code=500,
+                detail="Invalid response from the chat service"
+            )
+        choice = completion.choices[0]
+        return choice.message.content or "", getattr(choice, "finish_reason", None)
+
+    def _load_chat_history(self, session_id: str = DEFAULT_SESSION):
+        if session_id is None:
+            return []
         try:
-            # Make sure the file exists
-            if not os.path.exists(settings.CHAT_LOG_PATH):
+            total = self.state.count_messages(session_id)
+            if not total:
                 return []
-                
-            with open(settings.CHAT_LOG_PATH, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    return []
-                return json.loads(content)
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON in chat history file. Creating new history.")
-            return []
+            limit = history_window(total, settings.HISTORY_MAX_MESSAGES, settings.HISTORY_TRIM_BLOCK)
+            return self.state.get_messages(session_id, limit)
         except Exception as e:
             logger.error(f"Error loading chat history: {str(e)}")
             return []
 
-    def _save_chat_history(self, messages):
+    def _save_chat_history(self, session_id: str, messages):
+        """Append only the new turn; earlier messages are already stored."""
+        if session_id is None:
+            return
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(settings.CHAT_LOG_PATH), exist_ok=True)
-            
-            with open(settings.CHAT_LOG_PATH, "w") as f:
-                json.dump(messages, f, indent=4)
+            self.state.append_messages(session_id, messages)
         except Exception as e:
             logger.error(f"Error saving chat history: {str(e)}")
             # Don't raise here, just log the error
@@ -0,0 +1,200 @@
+"""
+Compact columnar detection payloads for /scenario/compact.
+
+DetectionData sends one JSON object per detection, and pydantic builds and
+validates a model for each of them. The columnar format sends one array per
+field instead:
+
+    {
+        "status": "success",
+        "filename": "frame.jpg",
+        "labels": ["person", "dog"],      # label vocabulary
+        "label": [0, 0, 1],               # index into labels, per detection
+        "position": [6, 4, 8],            # index into positions, per detection
+        "confidence": [0.91, 0.88, 0.67],
+        "positions": [...]                # optional, defaults to POSITIONS
+    }
+
+The same keys are accepted as msgpack, where the per-detection arrays may be
+lists or raw little-endian buffers (uint16 labels, uint8 positions, float32
+confidences), or as a NumPy .npz archive. Whatever the number of detections,
+validation is a handful of vectorized comparisons over the arrays.
+"""
+import io
+import json
+import zipfile
+
+import numpy as np
+
+try:
+    import orjson  # Optional: faster JSON decoding
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # Optional: enables application/msgpack payloads
+except ImportError:
+    msgpack = None
+
+# Position codes used when a payload does not send its own vocabulary
+POSITIONS = (
+    "top-left", "top", "top-right",
+    "centre-left", "centre", "centre-right",
+    "bottom-left", "bottom", "bottom-right",
+)
+LABEL_DTYPE = np.dtype("<u2")
+POSITION_DTYPE = np.dtype("u1")
+CONFIDENCE_DTYPE = np.dtype("<f4")
+
+MAX_DETECTIONS = 50000
+MAX_VOCABULARY = 4096
+MAX_NAME_CHARS = 64
+# Uncompressed size limit for .npz archives, checked before any array is read
+MAX_NPZ_BYTES = 16 * 1024 * 1024
+
+
+def _vocabulary(values, field: str):
+    if not isinstance(values, (list, tuple)) or not values:
+        raise ValueError(f"{field} must be a non-empty list of strings")
+    if len(values) > MAX_VOCABULARY:
+        raise ValueError(f"{field} may hold at most {MAX_VOCABULARY} entries")
+    for value in values:
+        if not isinstance(value, str) or not value.strip() or len(value) > MAX_NAME_CHARS:
+            raise ValueError(f"{field} entries must be non-empty strings of at most {MAX_NAME_CHARS} characters")
+    return list(values)
+
+
+def _column(values, field: str, kind: str, buffer_dtype: np.dtype) -> np.ndarray:
+    """One per-detection array from a list, a raw buffer or an ndarray."""
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        if len(values) % buffer_dtype.itemsize:
+            raise ValueError(f"{field} buffer length is not a multiple of {buffer_dtype.itemsize}")
+        return np.frombuffer(values, dtype=buffer_dtype)
+    if isinstance(values, np.ndarray):
+        array = values
+    elif isinstance(values, (list, tuple)):
+        try:
+            array = np.asarray(values)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be a flat array of numbers")
+    else:
+        raise ValueError(f"{field} must be an array")
+    if array.ndim != 1:
+        raise ValueError(f"{field} must be a flat array of numbers")
+    if not array.size:
+        return array.astype(buffer_dtype)
+    if array.dtype.kind not in kind:
+        raise ValueError(f"{field} must be an array of {'integers' if kind == 'iu' else 'numbers'}")
+    return array
+
+
+class ColumnarDetections:
+    """Detections of one frame held as parallel arrays."""
+
+    def __init__(self, status, filename, labels, label, position, confidence, positions=None):
+        if status != "success":
+            raise ValueError('Status must be "success"')
+        if not isinstance(filename, str):
+            raise ValueError("filename must be a string")
+        self.filename = filename
+        self.labels = _vocabulary(labels, "labels")
+        self.positions = _vocabulary(list(POSITIONS) if positions is None else positions, "positions")
+        self.label = _column(label, "label", "iu", LABEL_DTYPE)
+        self.position = _column(position, "position", "iu", POSITION_DTYPE)
+        self.confidence = _column(confidence, "confidence", "iuf", CONFIDENCE_DTYPE)
+
+        count = len(self.label)
+        if len(self.position) != count or len(self.confidence) != count:
+            raise ValueError("label, position and confidence must have the same length")
+        if count > MAX_DETECTIONS:
+            raise ValueError(f"At most {MAX_DETECTIONS} detections are accepted per frame")
+        if count:
+            if self.label.min() < 0 or self.label.max() >= len(self.labels):
+                raise ValueError("label holds an index outside labels")
+            if self.position.min() < 0 or self.position.max() >= len(self.positions):
+                raise ValueError("position holds an index outside positions")
+            if not np.isfinite(self.confidence).all() or self.confidence.min() < 0 or self.confidence.max() > 1:
+                raise ValueError("confidence values must be between 0 and 1")
+
+    def __len__(self):
+        return len(self.label)
+
+    def lines(self):
+        """Prompt lines in the /scenario format, grouped by label in vocabulary order."""
+        order = np.argsort(self.label, kind="stable")
+        labels, positions = self.labels, self.positions
+        return [
+            f"- {labels[label]} at {positions[position]} (confidence: {confidence:.2%})"
+            for label, position, confidence in zip(
+                self.label[order].tolist(), self.position[order].tolist(), self.confidence[order].tolist()
+            )
+        ]
+
+    @classmethod
+    def from_mapping(cls, payload):
+        if not isinstance(payload, dict):
+            raise ValueError("Payload must be an object")
+        missing = [key for key in ("status", "labels", "label", "position", "confidence") if key not in payload]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        return cls(
+            payload["status"],
+            payload.get("filename", ""),
+            payload["labels"],
+            payload["label"],
+            payload["position"],
+            payload["confidence"],
+            payload.get("positions"),
+        )
+
+
+def parse_json(body: bytes) -> ColumnarDetections:
+    try:
+        payload = orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError:
+        raise ValueError("Body is not valid JSON")
+    return ColumnarDetections.from_mapping(payload)
+
+
+def parse_msgpack(body: bytes) -> ColumnarDetections:
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except (ValueError, TypeError):
+        raise ValueError("Body is not valid msgpack")
+    return ColumnarDetections.from_mapping(payload)
+
+
+def parse_npz(body: bytes) -> ColumnarDetections:
+    """An archive written with numpy.savez; status and filename are 0-d string arrays."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            if sum(member.file_size for member in archive.infolist()) > MAX_NPZ_BYTES:
+                raise ValueError(f"Archive expands to more than {MAX_NPZ_BYTES} bytes")
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            payload = {}
+            for key in ("status", "filename", "labels", "positions", "label", "position", "confidence"):
+                if key not in archive.files:
+                    continue
+                array = archive[key]
+                if key in ("status", "filename"):
+                    payload[key] = str(array) if array.ndim == 0 else None
+                elif key in ("labels", "positions"):
+                    payload[key] = array.tolist() if array.dtype.kind == "U" else None
+                else:
+                    payload[key] = array
+    except zipfile.BadZipFile:
+        raise ValueError("Body is not a valid .npz archive")
+    except (OSError, EOFError, ValueError) as e:
+        raise ValueError(f"Body is not a valid .npz archive: {str(e)}")
+    return ColumnarDetections.from_mapping(payload)
+
+
+# Content type -> parser; msgpack is only offered when the package is installed
+PARSERS = {
+    "application/json": parse_json,
+    "application/x-npz": parse_npz,
+}
+if msgpack is not None:
+    PARSERS["application/msgpack"] = parse_msgpack
+    PARSERS["application/x-msgpack"] = parse_msgpack
+    PARSERS["application/vnd.msgpack"] = parse_msgpack
@@ -0,0 +1,158 @@
+"""
+Incremental text extraction for uploaded documents.
+
+Uploads are spooled to a temporary file that stays in memory only up to
+SPOOL_MEMORY_BYTES and moves to disk after that. The file is then read back
+a block or a page at a time, so a document's full text is never held in
+memory at once:
+
+- plain text and Markdown are decoded as UTF-8 with an incremental decoder;
+- PDF pages are extracted one at a time with the optional pypdf package.
+
+chunk_text() groups the extracted pieces into chunks sized for one
+summarization call, split on paragraph, line or word boundaries.
+count_chunks() makes the same pass without keeping the chunks, so a document
+with too many chunks can be rejected before any of them is summarized.
+"""
+import codecs
+import logging
+import os
+import tempfile
+
+try:
+    import pypdf  # Optional: enables PDF uploads
+except ImportError:
+    pypdf = None
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_BYTES = 64 * 1024
+SPOOL_MEMORY_BYTES = 1024 * 1024
+PDF_MAGIC = b"%PDF-"
+
+TEXT_TYPES = ("text/plain", "text/markdown", "text/x-markdown")
+TEXT_EXTENSIONS = (".txt", ".text", ".md", ".markdown")
+# Types clients send when they do not know better; the content is sniffed instead
+GENERIC_TYPES = ("", "application/octet-stream")
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the configured size limit."""
+
+
+async def spool_upload(chunks, max_bytes: int):
+    """Copy an async iterator of bytes into a temporary file, rewound for reading."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload is larger than {max_bytes} bytes")
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+def detect_kind(file, content_type: str = "", filename: str = "") -> str:
+    """Return "pdf" or "text" for an upload, from its first bytes, type and name."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    extension = os.path.splitext(filename or "")[1].lower()
+    head = file.read(1024)
+    file.seek(0)
+    if head.startswith(PDF_MAGIC):
+        return "pdf"
+    if content_type == "application/pdf" or extension == ".pdf":
+        raise ValueError("File is not a valid PDF")
+    if content_type in TEXT_TYPES or extension in TEXT_EXTENSIONS:
+        return "text"
+    if content_type in GENERIC_TYPES and b"\0" not in head:
+        return "text"
+    raise ValueError(f"Unsupported file type {content_type or extension or 'unknown'!r}: send text, Markdown or PDF")
+
+
+def iter_text(file, block_bytes: int = READ_BLOCK_BYTES):
+    """Decode a UTF-8 file block by block; invalid bytes become U+FFFD."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while True:
+        block = file.read(block_bytes)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_pdf_text(file):
+    """Extract a PDF's text one page at a time."""
+    if pypdf is None:
+        raise ValueError("PDF uploads require the pypdf package")
+    try:
+        reader = pypdf.PdfReader(file)
+        # Many PDFs are encrypted with an empty password only to set permissions
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ValueError("Password-protected PDFs are not supported")
+        page_count = len(reader.pages)
+    except (pypdf.errors.PyPdfError, KeyError, TypeError) as e:
+        raise ValueError(f"Could not read PDF: {str(e)}")
+    for number in range(page_count):
+        try:
+            text = reader.pages[number].extract_text()
+        except (pypdf.errors.PyPdfError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping unreadable PDF page {number + 1}: {str(e)}")
+            continue
+        finally:
+            # The reader caches every object it parses; drop them once a page is done
+            reader.resolved_objects.clear()
+        if text and text.strip():
+            yield text + "\n\n"
+
+
+def extract_text(file, kind: str):
+    """Pieces of a document's text, in order."""
+    if kind == "pdf":
+        return iter_pdf_text(file)
+    return iter_text(file)
+
+
+def _split_point(text: str, limit: int) -> int:
+    for separator in ("\n\n", "\n", ". ", " "):
+        index = text.rfind(separator, limit // 2, limit)
+        if index != -1:
+            return index + len(separator)
+    return limit
+
+
+def chunk_text(pieces, chunk_chars: int):
+    """Regroup text pieces into chunks of at most chunk_chars characters."""
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= chunk_chars:
+            cut = _split_point(buffer, chunk_chars)
+            chunk = buffer[:cut].strip()
+            buffer = buffer[cut:]
+            if chunk:
+                yield chunk
+    buffer = buffer.strip()
+    if buffer:
+        yield buffer
+
+
+def count_chunks(file, kind: str, chunk_chars: int, limit: int) -> int:
+    """Chunks in a document, counting no further than limit + 1; rewinds the file."""
+    count = 0
+    try:
+        for _ in chunk_text(extract_text(file, kind), chunk_chars):
+            count += 1
+            if count > limit:
+                break
+    finally:
+        file.seek(0)
+    return count
@@ -0,0 +1,130 @@
+"""
+Generation profiles: how long and how freely the model may answer.
+
+Generation time grows with the number of completion tokens, so each request
+gets a profile sized to what it needs instead of one generous default.
+/summarize and /scenario use their own endpoint profiles. A /chat query is
+given a class by a few keyword and length rules: greeting, short_answer, chat
+or long_form. The rules are cheap enough to run on every request, and no
+extra model call is needed.
+
+The default model reasons before it answers, and its reasoning tokens count
+against max_tokens. Profiles therefore leave room for the reasoning and may set
+reasoning_effort ("low", "medium" or "high") to keep it short.
+
+Profiles are defined in config.settings (GENERATION_PROFILES). Requests,
+upstream latency and completion tokens are recorded per profile, so the
+savings can be read from /metrics.
+"""
+import logging
+import re
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "chat"
+
+_GREETING = re.compile(
+    r"^(hi+|hello+|hey+|hiya|yo|namaste|good (morning|afternoon|evening|night)|thanks?( you)?|thank you( so much| very much)?"
+    r"|ok(ay)?|cool|great|nice|bye|goodbye|see you|how are you|how r u|what'?s up|sup)"
+    r"( (there|again|friend|buddy|myra|man|a lot|so much|today|doing))*$"
+)
+# Wording that asks for a long answer: explanations, writing, code, lists and comparisons
+_LONG_FORM = re.compile(
+    r"\b(explain|describe|elaborate|write|draft|compose|essay|story|poem|article|letter|code|program|script|"
+    r"implement|function|steps?|step by step|guide|tutorial|list|outline|plan|compare|comparison|"
+    r"difference between|pros and cons|in detail|detailed|how (do|can|should) (i|we|you)|how to)\b"
+)
+_SHORT_QUESTION = re.compile(
+    r"^(who|what|when|where|which|whose|is|are|was|were|do|does|did|can|could|will|would|should|"
+    r"how (many|much|old|long|far|tall|big))\b"
+)
+_NON_WORD = re.compile(r"[^\w' ]+")
+GREETING_MAX_WORDS = 6
+SHORT_QUERY_WORDS = 12
+# Queries longer than this usually carry enough context to deserve a full answer
+LONG_QUERY_CHARS = 400
+REASONING_EFFORTS = ("low", "medium", "high")
+
+
+class GenerationProfile:
+    """Sampling options for one kind of request."""
+
+    def __init__(self, name: str, max_tokens: int, temperature: float, stop=None, reasoning_effort=None):
+        if max_tokens <= 0:
+            raise ValueError(f"Generation profile {name!r}: max_tokens must be positive")
+        if not 0 <= temperature <= 2:
+            raise ValueError(f"Generation profile {name!r}: temperature must be between 0 and 2")
+        if isinstance(stop, str):
+            stop = [stop]
+        if stop and len(stop) > 4:
+            raise ValueError(f"Generation profile {name!r}: at most 4 stop sequences are allowed")
+        if reasoning_effort is not None and reasoning_effort not in REASONING_EFFORTS:
+            raise ValueError(
+                f"Generation profile {name!r}: reasoning_effort must be one of {', '.join(REASONING_EFFORTS)}"
+            )
+        self.name = name
+        self.max_tokens = int(max_tokens)
+        self.temperature = float(temperature)
+        self.stop = list(stop) if stop else None
+        self.reasoning_effort = reasoning_effort
+
+    def options(self) -> dict:
+        """Keyword arguments for chat.completions.create()."""
+        options = {"max_tokens": self.max_tokens, "temperature": self.temperature}
+        if self.stop:
+            options["stop"] = self.stop
+        if self.reasoning_effort:
+            # Not a named argument of the installed SDK, so it goes in the JSON body
+            options["extra_body"] = {"reasoning_effort": self.reasoning_effort}
+        return options
+
+    def __repr__(self):
+        return f"GenerationProfile({self.name!r}, max_tokens={self.max_tokens}, temperature={self.temperature})"
+
+
+def classify_query(query: str) -> str:
+    """Pick the profile for a /chat query from its wording and length."""
+    if len(query) > LONG_QUERY_CHARS:
+        return "long_form"
+    text = _NON_WORD.sub(" ", query.lower()).strip()
+    words = text.split()
+    if not words:
+        return DEFAULT_PROFILE
+    if len(words) <= GREETING_MAX_WORDS and _GREETING.match(" ".join(words)):
+        return "greeting"
+    if _LONG_FORM.search(text):
+        return "long_form"
+    if len(words) <= SHORT_QUERY_WORDS and _SHORT_QUESTION.match(text):
+        return "short_answer"
+    return DEFAULT_PROFILE
+
+
+def load_profiles(config: dict = None) -> dict:
+    """Build the profiles defined in settings, keyed by name."""
+    config = settings.GENERATION_PROFILES if config is None else config
+    profiles = {
+        name: GenerationProfile(
+            name, options["max_tokens"], options["temperature"], options.get("stop"), options.get("reasoning_effort")
+        )
+        for name, options in config.items()
+    }
+    if DEFAULT_PROFILE not in profiles:
+        raise ValueError(f"GENERATION_PROFILES must define a {DEFAULT_PROFILE!r} profile")
+    logger.info(
+        "Loaded generation profiles: "
+        + ", ".join(f"{name} (max_tokens={profile.max_tokens})" for name, profile in profiles.items())
+    )
+    return profiles
+
+
+def select_profile(profiles: dict, query: str, profile: str = None) -> GenerationProfile:
+    """The profile named by the caller, or the query's class when none is given."""
+    if profile is None:
+        profile = classify_query(query) if settings.GENERATION_CLASSIFY_QUERIES else DEFAULT_PROFILE
+    selected = profiles.get(profile)
+    if selected is None:
+        logger.warning(f"Unknown generation profile {profile!r}, using {DEFAULT_PROFILE!r}")
+        selected = profiles[DEFAULT_PROFILE]
+    return selected
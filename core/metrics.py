@@ -0,0 +1,266 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain Python objects guarded by a lock, so
+recording a sample costs a dict lookup and a bisect. All metrics register
+themselves in a module-level registry rendered by the /metrics endpoint.
+Values are per process: with several workers each scrape reports only the
+worker that answered it, so aggregate across workers (or scrape each one).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+# Latency buckets in seconds, from static file hits up to slow upstream calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(label) for label in labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing value."""
+
+    type_name = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self, items):
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, *labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self, items):
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the wall-clock duration of the enclosed block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _render_samples(self, items):
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP layer, recorded by RequestContextMiddleware
+HTTP_REQUEST_DURATION = Histogram(
+    "myra_http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route", "status")
+)
+
+# ChatManager.chat() stages: load_history, chunk_messages, upstream, save_history
+CHAT_STAGE_DURATION = Histogram(
+    "myra_chat_stage_duration_seconds", "Time spent in each stage of ChatManager.chat().", ("stage",)
+)
+UPSTREAM_TOKENS = Histogram(
+    "myra_upstream_tokens", "Tokens reported in the upstream usage field per call.", ("kind",), buckets=TOKEN_BUCKETS
+)
+UPSTREAM_TOKENS_TOTAL = Counter(
+    "myra_upstream_tokens_total", "Total tokens reported in the upstream usage field.", ("kind",)
+)
+UPSTREAM_RETRIES = Counter("myra_upstream_retries_total", "Failed upstream attempts that were retried or gave up.")
+UPSTREAM_ERRORS = Counter("myra_upstream_errors_total", "Chat requests that failed after all retries.")
+GENERATION_DURATION = Histogram(
+    "myra_generation_duration_seconds", "Upstream call time by generation profile.", ("profile",)
+)
+GENERATION_COMPLETION_TOKENS = Histogram(
+    "myra_generation_completion_tokens", "Completion tokens per upstream call by generation profile.", ("profile",),
+    buckets=TOKEN_BUCKETS,
+)
+GENERATION_TRUNCATED = Counter(
+    "myra_generation_truncated_total", "Answers cut off by the profile's max_tokens.", ("profile",)
+)
+RATE_LIMITED = Counter("myra_rate_limited_total", "Requests rejected by the per-client rate limit.")
+
+# History retention
+ARCHIVED_MESSAGES = Counter(
+    "myra_archived_messages_total", "Messages moved from hot history to archive segments.", ("reason",)
+)
+
+# Hit/miss counts for every cache in the app
+CACHE_REQUESTS = Counter("myra_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+
+# Text-to-speech
+TTS_SYNTHESIS_DURATION = Histogram(
+    "myra_tts_synthesis_duration_seconds", "Time spent synthesizing one sentence.", ("engine",)
+)
+AUDIO_CACHE_BYTES = Gauge("myra_audio_cache_bytes", "Bytes of synthesized audio held in the disk cache.")
+
+
+@contextmanager
+def chat_stage(stage):
+    """Time one stage of a chat request."""
+    with CHAT_STAGE_DURATION.time(stage):
+        yield
+
+
+def _usage_field(usage, name):
+    if isinstance(usage, dict):
+        return usage.get(name)
+    value = getattr(usage, name, None)
+    if value is None:
+        # Fields newer than the SDK's model end up in model_extra
+        value = (getattr(usage, "model_extra", None) or {}).get(name)
+    return value
+
+
+def record_usage(usage):
+    """Record token counts from an upstream usage object.
+
+    Returns the number of prompt tokens served from the provider's prefix
+    cache, or None when the API does not report it.
+    """
+    if usage is None:
+        return None
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = _usage_field(usage, kind)
+        if value is not None:
+            label = kind[: -len("_tokens")]
+            UPSTREAM_TOKENS.observe(value, label)
+            UPSTREAM_TOKENS_TOTAL.inc(label, amount=value)
+
+    details = _usage_field(usage, "prompt_tokens_details")
+    cached = _usage_field(details, "cached_tokens") if details is not None else None
+    if cached is None:
+        return None
+    UPSTREAM_TOKENS_TOTAL.inc("cached_prompt", amount=cached)
+    CACHE_REQUESTS.inc("upstream_prompt", "hit" if cached > 0 else "miss")
+    return cached
+
+
+def record_generation(profile, seconds, usage, finish_reason):
+    """Record one upstream call against the generation profile it used."""
+    GENERATION_DURATION.observe(seconds, profile)
+    completion_tokens = _usage_field(usage, "completion_tokens") if usage is not None else None
+    if completion_tokens is not None:
+        GENERATION_COMPLETION_TOKENS.observe(completion_tokens, profile)
+    if finish_reason == "length":
+        GENERATION_TRUNCATED.inc(profile)
@@ -0,0 +1,446 @@
+"""
+History retention: per-session limits, compressed archival and migration.
+
+Hot history lives in the shared state backend and is kept small. A periodic
+job moves whole sessions that have been idle longer than HISTORY_SESSION_TTL,
+and the oldest turns of sessions longer than HISTORY_MAX_TURNS, into an
+append-only archive of compressed segments. Every archived batch is written as
+a self-contained gzip member (or zstd frame) and indexed by session and byte
+range, so one session is read back by decompressing only its own frames.
+
+    python -m core.retention migrate Data/ChatLog.json
+    python -m core.retention compact
+    python -m core.retention show default
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from config.settings import settings
+from core import metrics
+from core.state import DEFAULT_SESSION, get_state_backend
+
+try:
+    import zstandard  # Optional: faster, smaller archive frames
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Messages per archive frame and per state backend round trip
+ARCHIVE_BATCH = 1000
+SEGMENT_EXTENSIONS = {"gzip": "jsonl.gz", "zstd": "jsonl.zst"}
+# State namespace recording the logs already migrated, keyed by content hash
+MIGRATION_NAMESPACE = "migration"
+
+
+class AlreadyMigrated(ValueError):
+    """The chat log was imported before; importing it again would duplicate it."""
+
+
+class ArchiveStore:
+    """Append-only compressed segments plus a SQLite index of their frames.
+
+    Each process appends to its own segment file, named by creation time and
+    pid, and rolls over to a new one past segment_max_bytes, so writers never
+    share a file. The index is shared and records, for every frame, the
+    session, segment, byte range, message count, time span and the highest
+    hot-store message id it contains.
+    """
+
+    INDEX_SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS frames (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            segment TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            messages INTEGER NOT NULL,
+            first_at REAL,
+            last_at REAL,
+            last_message_id INTEGER
+        )""",
+        "CREATE INDEX IF NOT EXISTS frames_session ON frames (session_id, id)",
+    )
+
+    def __init__(self, directory: str, compression: str = "gzip", segment_max_bytes: int = 64 * 1024 * 1024):
+        if compression not in SEGMENT_EXTENSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, archiving with gzip instead")
+            compression = "gzip"
+        self.directory = directory
+        self.compression = compression
+        self.segment_max_bytes = segment_max_bytes
+        self._segment = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = sqlite3.connect(os.path.join(directory, "index.db"), timeout=10, check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        with self._index:
+            for statement in self.INDEX_SCHEMA:
+                self._index.execute(statement)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def _decompress(segment: str, data: bytes) -> bytes:
+        if segment.endswith(SEGMENT_EXTENSIONS["zstd"]):
+            if zstandard is None:
+                raise RuntimeError(f"The zstandard package is required to read {segment}")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def _segment_name(self) -> str:
+        if self._segment is not None:
+            path = os.path.join(self.directory, self._segment)
+            if not os.path.exists(path) or os.path.getsize(path) < self.segment_max_bytes:
+                return self._segment
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        extension = SEGMENT_EXTENSIONS[self.compression]
+        self._segment = f"segment-{stamp}-{os.getpid()}-{self._sequence}.{extension}"
+        return self._segment
+
+    def append(self, session_id: str, messages) -> int:
+        """Write one frame of messages for a session; returns its compressed size."""
+        if not messages:
+            return 0
+        lines = [
+            json.dumps(
+                {
+                    "session_id": session_id,
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": message.get("created_at"),
+                },
+                ensure_ascii=False,
+            )
+            for message in messages
+        ]
+        frame = self._compress(("\n".join(lines) + "\n").encode("utf-8"))
+        timestamps = [message["created_at"] for message in messages if message.get("created_at") is not None]
+        ids = [message["id"] for message in messages if message.get("id") is not None]
+
+        with self._lock:
+            segment = self._segment_name()
+            with open(os.path.join(self.directory, segment), "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._index:
+                self._index.execute(
+                    "INSERT INTO frames (session_id, segment, offset, length, messages, first_at, last_at, last_message_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        session_id, segment, offset, len(frame), len(messages),
+                        min(timestamps) if timestamps else None,
+                        max(timestamps) if timestamps else None,
+                        max(ids) if ids else None,
+                    ),
+                )
+        return len(frame)
+
+    def archived_through(self, session_id: str):
+        """Highest hot-store message id already archived for a session, if any."""
+        with self._lock:
+            row = self._index.execute(
+                "SELECT MAX(last_message_id) FROM frames WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0]
+
+    def sessions(self):
+        """Archived sessions as dicts with session_id, messages, first_at and last_at."""
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT session_id, SUM(messages), MIN(first_at), MAX(last_at) FROM frames GROUP BY session_id"
+            ).fetchall()
+        return [
+            {"session_id": session_id, "messages": count, "first_at": first_at, "last_at": last_at}
+            for session_id, count, first_at, last_at in rows
+        ]
+
+    def iter_messages(self, session_id: str = None, since: float = None, until: float = None):
+        """Yield archived messages, frame by frame in archival order.
+
+        The index narrows the frames to read by session and time span; since
+        and until then filter individual messages (until is exclusive).
+        """
+        clauses, params = [], []
+        for clause, value in (("session_id = ?", session_id), ("last_at >= ?", since), ("first_at < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            frames = self._index.execute(
+                f"SELECT segment, offset, length FROM frames {where}ORDER BY id", params
+            ).fetchall()
+        for segment, offset, length in frames:
+            with open(os.path.join(self.directory, segment), "rb") as f:
+                f.seek(offset)
+                data = self._decompress(segment, f.read(length))
+            for line in data.decode("utf-8").splitlines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                created_at = message.get("created_at")
+                if since is not None and (created_at is None or created_at < since):
+                    continue
+                if until is not None and (created_at is None or created_at >= until):
+                    continue
+                yield message
+
+    def read_session(self, session_id: str):
+        """Yield a session's archived messages, oldest first, one frame at a time."""
+        return self.iter_messages(session_id)
+
+    def close(self):
+        with self._lock:
+            self._index.close()
+
+
+def _archive_oldest(state, archive, session_id: str, count: int, through_id: int, reason: str) -> int:
+    """Move up to `count` of a session's oldest messages (ids <= through_id) to the archive."""
+    moved = 0
+    done = archive.archived_through(session_id)
+    while moved < count:
+        batch = state.oldest_messages(session_id, min(ARCHIVE_BATCH, count - moved), through_id)
+        if not batch:
+            break
+        # A crash between archiving and deleting leaves already archived rows behind
+        fresh = [message for message in batch if done is None or message["id"] > done]
+        archive.append(session_id, fresh)
+        state.delete_messages(session_id, batch[-1]["id"])
+        moved += len(batch)
+        if fresh:
+            metrics.ARCHIVED_MESSAGES.inc(reason, amount=len(fresh))
+    return moved
+
+
+def compact(state=None, archive=None, now: float = None, ttl: int = None, max_turns: int = None) -> dict:
+    """Archive idle sessions, trim long ones and drop expired state entries; returns counts by reason."""
+    state = state or get_state_backend()
+    archive = archive or get_archive_store()
+    now = time.time() if now is None else now
+    ttl = settings.HISTORY_SESSION_TTL if ttl is None else ttl
+    max_turns = settings.HISTORY_MAX_TURNS if max_turns is None else max_turns
+
+    stats = {"sessions": 0, "ttl": 0, "max_turns": 0}
+    for session in state.list_sessions():
+        stats["sessions"] += 1
+        session_id = session["session_id"]
+        if ttl and session["last_at"] < now - ttl:
+            stats["ttl"] += _archive_oldest(state, archive, session_id, session["messages"], session["last_id"], "ttl")
+        elif max_turns and session["messages"] > 2 * max_turns:
+            excess = session["messages"] - 2 * max_turns
+            stats["max_turns"] += _archive_oldest(state, archive, session_id, excess, session["last_id"], "max_turns")
+    stats["expired"] = state.purge_expired()
+    return stats
+
+
+def iter_json_array(f, chunk_size: int = 1 << 16):
+    """Yield the elements of a top-level JSON array read incrementally from f.
+
+    Only the current chunk and the element being decoded are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+
+    def refill():
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        eof = not chunk
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                if started:
+                    raise ValueError("Unterminated JSON array")
+                return
+            refill()
+            continue
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            refill()
+            continue
+        if end == len(buffer) and not eof:
+            # A bare number may continue in the next chunk
+            refill()
+            continue
+        position = end
+        yield value
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def migrate_chat_log(path: str, state=None, archive=None, session_id: str = DEFAULT_SESSION,
+                     keep_turns: int = None, force: bool = False) -> dict:
+    """Stream a monolithic ChatLog.json into the state backend and archive.
+
+    The newest keep_turns turns become the session's hot history and
+    everything older goes straight to archive frames. Memory use is bounded by
+    the kept tail plus one frame, whatever the size of the file. Messages in the
+    old format carry no timestamps, so they are stamped with the file's mtime.
+
+    Each migrated file is recorded by its SHA-256 in the state backend, and
+    migrating the same content again raises AlreadyMigrated unless force is set.
+    """
+    state = state or get_state_backend()
+    archive = archive or get_archive_store()
+    digest = file_digest(path)
+    previous = state.get(MIGRATION_NAMESPACE, digest)
+    if previous is not None and not force:
+        raise AlreadyMigrated(
+            f"{path} was already migrated into session {previous['session']!r} "
+            f"({previous['read']} messages); use --force to import it again"
+        )
+    keep_turns = settings.HISTORY_MAX_TURNS if keep_turns is None else keep_turns
+    keep = 2 * keep_turns if keep_turns else None
+    created_at = os.path.getmtime(path)
+
+    stats = {"read": 0, "skipped": 0, "archived": 0, "kept": 0}
+    tail = deque()
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for message in iter_json_array(f):
+            if not isinstance(message, dict) or "role" not in message or "content" not in message:
+                stats["skipped"] += 1
+                continue
+            stats["read"] += 1
+            tail.append({"role": message["role"], "content": message["content"], "created_at": created_at})
+            if keep is None:
+                if len(tail) >= ARCHIVE_BATCH:
+                    state.append_messages(session_id, list(tail))
+                    stats["kept"] += len(tail)
+                    tail.clear()
+            elif len(tail) > keep:
+                batch.append(tail.popleft())
+                if len(batch) >= ARCHIVE_BATCH:
+                    archive.append(session_id, batch)
+                    stats["archived"] += len(batch)
+                    batch = []
+    if batch:
+        archive.append(session_id, batch)
+        stats["archived"] += len(batch)
+    while tail:
+        chunk = [tail.popleft() for _ in range(min(ARCHIVE_BATCH, len(tail)))]
+        state.append_messages(session_id, chunk)
+        stats["kept"] += len(chunk)
+    metrics.ARCHIVED_MESSAGES.inc("migration", amount=stats["archived"])
+    state.set(MIGRATION_NAMESPACE, digest, {
+        "path": os.path.abspath(path), "session": session_id, "migrated_at": time.time(), **stats
+    })
+    return stats
+
+
+async def retention_loop(interval: int):
+    """Run compact() every interval seconds on one worker at a time."""
+    state = get_state_backend()
+    while True:
+        await asyncio.sleep(interval)
+        window = int(time.time() // interval)
+        # The first worker to count this window runs it; the others skip
+        if state.incr("retention", f"run:{window}", 1, 2 * interval) != 1:
+            continue
+        try:
+            start = time.perf_counter()
+            stats = await asyncio.to_thread(compact)
+            logger.info(
+                f"Retention run archived {stats['ttl']} idle and {stats['max_turns']} excess messages "
+                f"and removed {stats['expired']} expired state entries",
+                extra={"duration_ms": round((time.perf_counter() - start) * 1000, 3)},
+            )
+        except Exception as e:
+            logger.error(f"Retention run failed: {str(e)}", exc_info=True)
+
+
+_archive_store = None
+_archive_lock = threading.Lock()
+
+
+def get_archive_store() -> ArchiveStore:
+    """Shared ArchiveStore built from settings on first use."""
+    global _archive_store
+    if _archive_store is None:
+        with _archive_lock:
+            if _archive_store is None:
+                _archive_store = ArchiveStore(
+                    settings.ARCHIVE_DIR, settings.ARCHIVE_COMPRESSION, settings.ARCHIVE_SEGMENT_MAX_BYTES
+                )
+    return _archive_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Import a monolithic ChatLog.json")
+    migrate.add_argument("path", nargs="?", default=settings.CHAT_LOG_PATH)
+    migrate.add_argument("--session", default=DEFAULT_SESSION, help="Session to import the log into")
+    migrate.add_argument("--keep-turns", type=int, default=settings.HISTORY_MAX_TURNS,
+                         help="Newest turns to keep as hot history, 0 keeps everything")
+    migrate.add_argument("--force", action="store_true", help="Import the log even if it was migrated before")
+    commands.add_parser("compact", help="Run one retention pass now")
+    show = commands.add_parser("show", help="Print a session's archived messages as NDJSON")
+    show.add_argument("session")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        try:
+            stats = migrate_chat_log(args.path, session_id=args.session, keep_turns=args.keep_turns, force=args.force)
+        except AlreadyMigrated as e:
+            parser.exit(1, f"{str(e)}\n")
+        print(
+            f"Migrated {stats['read']} messages from {args.path}: {stats['kept']} kept, "
+            f"{stats['archived']} archived, {stats['skipped']} skipped. The original file was left in place."
+        )
+    elif args.command == "compact":
+        stats = compact()
+        print(
+            f"Checked {stats['sessions']} sessions: archived {stats['ttl']} idle and {stats['max_turns']} excess "
+            f"messages, removed {stats['expired']} expired state entries"
+        )
+    elif args.command == "show":
+        for message in get_archive_store().read_session(args.session):
+            print(json.dumps(message, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
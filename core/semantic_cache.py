@@ -0,0 +1,289 @@
+"""
+Near-duplicate answer cache for first-turn chat queries.
+
+Queries are normalized and broken into shingles: character 3-grams, which
+tolerate small rewordings, punctuation and typos, plus word bigrams, which
+keep word order and key-word substitutions significant. A MinHash signature of the
+shingles is split into bands for locality-sensitive hashing, so a lookup only
+compares against entries that share at least one band. Candidates are then
+scored by exact Jaccard similarity of their shingle sets and the best one at
+or above the threshold is returned.
+
+Similar text is not the same question, so a candidate above the threshold is
+also checked word by word: both queries must agree on negation ("who is not
+the owner" never matches "who is the owner"), and every content word of one
+must appear in the other, allowing one-letter typos inside longer words.
+Numbers and word endings must match exactly. Common chat
+shorthand ("u", "r", "pls") is expanded first, so "who r u" finds "who are you".
+
+Hits and near misses (scores just under the threshold) are logged on the
+core.semantic_cache.review logger with both queries, so false positives can be
+reviewed and the threshold tuned.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from config.settings import settings
+from core import metrics
+
+logger = logging.getLogger(__name__)
+review_logger = logging.getLogger("core.semantic_cache.review")
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 64
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+_NON_WORD = re.compile(r"[\W_]+")
+_IRREGULAR_NOT = re.compile(r"\b(ca|wo|sha)n['\u2019]t\b")
+_IRREGULAR_NOT_STEMS = {"ca": "can", "wo": "will", "sha": "shall"}
+_CONTRACTED_NOT = re.compile(r"n['\u2019]t\b")
+# Chat shorthand, expanded word by word during normalization
+SHORTHAND = {
+    "u": "you", "r": "are", "ur": "your", "im": "i am", "whats": "what is", "wat": "what",
+    "pls": "please", "plz": "please", "thx": "thanks", "tnx": "thanks",
+}
+NEGATIONS = frozenset({"not", "no", "never", "nothing", "nobody", "none", "neither", "nor", "cannot", "without"})
+# Words that do not change what is being asked, including contraction endings ("who's");
+# question words do, so they are not listed
+STOPWORDS = frozenset("""
+a an the is are am was were be been being do does did has have had i me my mine you your yours he him his she
+her it its we us our they them their this that these those of to in on at for from with by about as into and or
+but if so than then there here can could will would shall should may might must please tell some any just
+really very hey hi hello s d ll re ve m
+""".split())
+_DIGIT = re.compile(r"\d")
+# Answers to these depend on when they are asked
+_TIME_SENSITIVE = re.compile(
+    r"\b(time|today|tonight|tomorrow|yesterday|now|date|current|currently|latest|news|weather|score)\b"
+)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_HASH_PRIME = np.uint64(1099511628211)
+
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, (1 << 61) - 1, size=(NUM_PERMUTATIONS, 1), dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 61) - 1, size=(NUM_PERMUTATIONS, 1), dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _IRREGULAR_NOT.sub(lambda match: f"{_IRREGULAR_NOT_STEMS[match.group(1)]} not", text)
+    text = _CONTRACTED_NOT.sub(" not", text)
+    return " ".join(SHORTHAND.get(word, word) for word in _NON_WORD.sub(" ", text).split())
+
+
+def _close(a: str, b: str) -> bool:
+    """Equal, or a one-letter typo inside a word of 4+ letters.
+
+    Tokens with digits (years, amounts) must match exactly, and so must word
+    endings: "frances" is not "france", nor "2014" "2018".
+    """
+    if a == b:
+        return True
+    if min(len(a), len(b)) < 4 or abs(len(a) - len(b)) > 1 or _DIGIT.search(a) or _DIGIT.search(b):
+        return False
+    if a[-1] != b[-1]:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (
+            len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def terms(normalized: str):
+    """(all words, content words, negated) of a normalized query."""
+    words = frozenset(normalized.split())
+    return words, words - STOPWORDS - NEGATIONS, bool(words & NEGATIONS)
+
+
+def same_question(a, b) -> bool:
+    """Whether two queries' terms agree on negation and on every content word."""
+    words_a, content_a, negated_a = a
+    words_b, content_b, negated_b = b
+    if negated_a != negated_b:
+        return False
+    return all(any(_close(word, other) for other in words_b) for word in content_a) and \
+        all(any(_close(word, other) for other in words_a) for word in content_b)
+
+
+def shingles(normalized: str) -> np.ndarray:
+    """Sorted unique hashes of the shingles of a normalized text.
+
+    Character 3-grams match small wording changes; word bigrams keep word
+    order significant, so swapped or substituted key words ("celsius to
+    fahrenheit" vs "fahrenheit to celsius") pull the similarity down.
+    """
+    words = normalized.split()
+    bigrams = [
+        int.from_bytes(hashlib.blake2b(f"{first} {second}".encode("utf-8"), digest_size=8).digest(), "little")
+        for first, second in zip(["^"] + words, words + ["$"])
+    ]
+    padded = f" {normalized} "
+    codepoints = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    count = len(codepoints) - SHINGLE_SIZE + 1
+    if count <= 0 or not words:
+        return np.empty(0, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        hashes = np.full(count, np.uint64(SHINGLE_SIZE))
+        for offset in range(SHINGLE_SIZE):
+            hashes = hashes * _HASH_PRIME + codepoints[offset:offset + count]
+    return np.unique(np.concatenate([hashes, np.array(bigrams, dtype=np.uint64)]) % _MERSENNE_PRIME)
+
+
+def minhash(shingle_hashes: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        permuted = (_PERM_A * shingle_hashes[np.newaxis, :] + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    if not len(a) or not len(b):
+        return 0.0
+    intersection = len(np.intersect1d(a, b, assume_unique=True))
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class _Entry:
+    __slots__ = ("query", "answer", "shingles", "terms", "bands", "expires_at")
+
+    def __init__(self, query, answer, shingle_hashes, query_terms, bands, expires_at):
+        self.query = query
+        self.answer = answer
+        self.shingles = shingle_hashes
+        self.terms = query_terms
+        self.bands = bands
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """In-memory LSH index of answered queries, bounded by LRU eviction and a TTL."""
+
+    def __init__(self, threshold: float = 0.75, ttl: float = 86400, max_entries: int = 5000,
+                 max_query_chars: int = 300, near_miss_margin: float = 0.15):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_query_chars = max_query_chars
+        self.near_miss_margin = near_miss_margin
+        self._entries = OrderedDict()  # normalized query -> _Entry, least recently used first
+        self._buckets = [{} for _ in range(BANDS)]  # band hash -> set of normalized queries
+        self._lock = threading.Lock()
+
+    def cacheable(self, query: str) -> bool:
+        return len(query) <= self.max_query_chars and not _TIME_SENSITIVE.search(query.lower())
+
+    @staticmethod
+    def _bands(signature: np.ndarray):
+        return [hash(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()) for band in range(BANDS)]
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for band, value in enumerate(entry.bands):
+            bucket = self._buckets[band].get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][value]
+
+    def lookup(self, query: str):
+        """Return the cached answer for a near-duplicate query, or None."""
+        if not self.cacheable(query):
+            return None
+        key = normalize(query)
+        shingle_hashes = shingles(key)
+        if not len(shingle_hashes):
+            return None
+        bands = self._bands(minhash(shingle_hashes))
+        query_terms = terms(key)
+        now = time.time()
+
+        best_key, best_query, best_score = None, None, 0.0
+        rejected_query, rejected_score = None, 0.0
+        with self._lock:
+            candidates = set()
+            for band, value in enumerate(bands):
+                candidates.update(self._buckets[band].get(value, ()))
+            for candidate in candidates:
+                entry = self._entries[candidate]
+                if entry.expires_at <= now:
+                    self._remove(candidate)
+                    continue
+                score = 1.0 if candidate == key else jaccard(shingle_hashes, entry.shingles)
+                if score >= self.threshold and candidate != key and not same_question(query_terms, entry.terms):
+                    if score > rejected_score:
+                        rejected_query, rejected_score = entry.query, score
+                    continue
+                if score > best_score:
+                    best_key, best_query, best_score = candidate, entry.query, score
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                entry = self._entries[best_key]
+            else:
+                entry = None
+
+        if entry is not None:
+            metrics.CACHE_REQUESTS.inc("semantic_answer", "hit")
+            review_logger.info(
+                f"Semantic cache hit: {query!r} matched {entry.query!r} ({best_score:.3f})",
+                extra={"query": query, "matched_query": entry.query, "similarity": round(best_score, 3)},
+            )
+            return entry.answer
+        metrics.CACHE_REQUESTS.inc("semantic_answer", "miss")
+        if rejected_query is not None:
+            review_logger.info(
+                f"Semantic cache rejected: {query!r} vs {rejected_query!r} ({rejected_score:.3f}) "
+                f"differ in negation or content words",
+                extra={"query": query, "matched_query": rejected_query, "similarity": round(rejected_score, 3)},
+            )
+        elif best_key is not None and best_score >= self.threshold - self.near_miss_margin:
+            review_logger.info(
+                f"Semantic cache near miss: {query!r} vs {best_query!r} ({best_score:.3f})",
+                extra={"query": query, "matched_query": best_query, "similarity": round(best_score, 3)},
+            )
+        return None
+
+    def store(self, query: str, answer: str):
+        if not self.cacheable(query) or not answer:
+            return
+        key = normalize(query)
+        shingle_hashes = shingles(key)
+        if not len(shingle_hashes):
+            return
+        bands = self._bands(minhash(shingle_hashes))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(query, answer, shingle_hashes, terms(key), bands, time.time() + self.ttl)
+            for band, value in enumerate(bands):
+                self._buckets[band].setdefault(value, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def create_semantic_cache():
+    """The answer cache configured in settings, or None when it is disabled."""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    logger.info(f"Semantic answer cache enabled with threshold {settings.SEMANTIC_CACHE_THRESHOLD}")
+    return SemanticCache(
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl=settings.SEMANTIC_CACHE_TTL,
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    )
@@ -0,0 +1,275 @@
+"""
+Text-to-speech with a content-addressed audio cache.
+
+Answers are split into sentences that are synthesized concurrently and
+streamed back in order as soon as each one is ready. Audio for every
+(voice, sentence) pair is cached on disk under the hash of both, with the
+total size bounded by least-recently-used eviction, so concurrent users never
+share an output file and repeated phrases are never synthesized twice.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import settings
+from core import metrics
+
+try:
+    import edge_tts  # Optional: Microsoft Edge neural voices
+except ImportError:
+    edge_tts = None
+
+logger = logging.getLogger(__name__)
+
+# Sentence boundaries for Latin, Devanagari and CJK punctuation
+_SENTENCE_END = re.compile(r"(?<=[.!?।。！？])\s+|(?<=[。！？])")
+MAX_SENTENCE_CHARS = 400
+MIN_SENTENCE_CHARS = 20
+
+
+def split_sentences(text: str, max_chars: int = MAX_SENTENCE_CHARS):
+    """Split text into speakable chunks.
+
+    Very short sentences are merged with the next one so each synthesis call
+    does useful work, and overlong ones are broken at commas or spaces.
+    """
+    pieces = []
+    for line in text.splitlines():
+        pieces.extend(part.strip() for part in _SENTENCE_END.split(line) if part.strip())
+
+    sentences = []
+    buffer = ""
+    for piece in pieces:
+        if buffer:
+            # CJK text is not space separated
+            separator = "" if buffer[-1] in "。！？" else " "
+            buffer = f"{buffer}{separator}{piece}"
+        else:
+            buffer = piece
+        if len(buffer) >= MIN_SENTENCE_CHARS:
+            sentences.extend(_wrap(buffer, max_chars))
+            buffer = ""
+    if buffer:
+        sentences.extend(_wrap(buffer, max_chars))
+    return sentences
+
+
+def _wrap(sentence: str, max_chars: int):
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(", ", 0, max_chars)
+        if cut <= 0:
+            cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield sentence[:cut + 1].strip()
+        sentence = sentence[cut + 1:].strip()
+    if sentence:
+        yield sentence
+
+
+class Synthesizer:
+    """Interface for speech engines."""
+
+    name = "base"
+    media_type = "audio/mpeg"
+    file_extension = "mp3"
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        raise NotImplementedError
+
+
+class EdgeSynthesizer(Synthesizer):
+    """Microsoft Edge neural voices via the edge-tts package."""
+
+    name = "edge"
+
+    def __init__(self):
+        if edge_tts is None:
+            raise RuntimeError("The edge-tts package is required for TTS_ENGINE=edge")
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        audio = bytearray()
+        async for chunk in edge_tts.Communicate(text, voice).stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        return bytes(audio)
+
+
+class StubSynthesizer(Synthesizer):
+    """Deterministic fake engine for tests and offline benchmarks.
+
+    Produces bytes derived from the voice and text, with a configurable
+    simulated synthesis time per character.
+    """
+
+    name = "stub"
+
+    def __init__(self, seconds_per_char: float = 0.0005, bytes_per_char: int = 64):
+        self.seconds_per_char = seconds_per_char
+        self.bytes_per_char = bytes_per_char
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        if self.seconds_per_char:
+            await asyncio.sleep(len(text) * self.seconds_per_char)
+        seed = hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).digest()
+        size = max(len(seed), len(text) * self.bytes_per_char)
+        return (seed * (size // len(seed) + 1))[:size]
+
+
+def create_synthesizer(engine: str = None) -> Synthesizer:
+    """Build the configured engine; the stub is only used when asked for by name."""
+    engine = (engine or settings.TTS_ENGINE).lower()
+    if engine == "stub":
+        return StubSynthesizer()
+    if engine == "edge":
+        return EdgeSynthesizer()
+    raise ValueError(f"Unknown TTS engine: {engine}")
+
+
+class AudioCache:
+    """Disk cache of synthesized audio keyed by hash of (engine, voice, text).
+
+    Recency is tracked in memory and mirrored to file mtimes so the LRU order
+    survives restarts. Writes go through a temporary file and os.replace, so
+    readers never see partial audio. The index and the size bound are per
+    process: each worker counts only the files present at startup and the ones
+    it wrote, so N workers sharing a directory can fill it to about N * max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, extension: str = "mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(engine: str, voice: str, text: str) -> str:
+        return hashlib.sha256(f"{engine}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def _load_index(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(f".{self.extension}"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[: -len(self.extension) - 1], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+        self._evict()
+        metrics.AUDIO_CACHE_BYTES.set(self._total)
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+            return data
+        except OSError:
+            # Evicted or removed underneath us
+            with self._lock:
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._total -= size
+            return None
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Failed to cache audio {key}: {str(e)}")
+            return
+        with self._lock:
+            previous = self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total += len(data) - previous
+            self._evict()
+            metrics.AUDIO_CACHE_BYTES.set(self._total)
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+
+class SpeechService:
+    """Sentence-level concurrent synthesis with caching and ordered streaming."""
+
+    def __init__(self, synthesizer: Synthesizer, cache: AudioCache, concurrency: int = 4):
+        self.synthesizer = synthesizer
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+
+    @property
+    def media_type(self) -> str:
+        return self.synthesizer.media_type
+
+    async def _sentence_audio(self, sentence: str, voice: str, semaphore) -> bytes:
+        key = self.cache.key(self.synthesizer.name, voice, sentence)
+        audio = await asyncio.to_thread(self.cache.get, key)
+        if audio is not None:
+            metrics.CACHE_REQUESTS.inc("tts_audio", "hit")
+            return audio
+        metrics.CACHE_REQUESTS.inc("tts_audio", "miss")
+
+        async with semaphore:
+            start = time.perf_counter()
+            audio = await self.synthesizer.synthesize(sentence, voice)
+            metrics.TTS_SYNTHESIS_DURATION.observe(time.perf_counter() - start, self.synthesizer.name)
+        await asyncio.to_thread(self.cache.put, key, audio)
+        return audio
+
+    async def stream(self, text: str, voice: str):
+        """Yield audio for each sentence in order, synthesizing ahead concurrently."""
+        sentences = split_sentences(text)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._sentence_audio(sentence, voice, semaphore)) for sentence in sentences]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            # Client went away or a sentence failed: stop outstanding work
+            for task in tasks:
+                task.cancel()
+
+
+_speech_service = None
+
+
+def get_speech_service() -> SpeechService:
+    """Shared SpeechService built from settings on first use."""
+    global _speech_service
+    if _speech_service is None:
+        synthesizer = create_synthesizer()
+        cache = AudioCache(settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_MAX_BYTES, synthesizer.file_extension)
+        _speech_service = SpeechService(synthesizer, cache, settings.TTS_CONCURRENCY)
+        logger.info(f"Speech service ready with engine: {synthesizer.name}")
+    return _speech_service
@@ -0,0 +1,472 @@
+"""
+Shared state for sessions, caches and rate-limit counters.
+
+Every uvicorn/gunicorn worker is a separate process, so anything kept in a
+module-level object is invisible to the other workers. StateBackend is the
+one place such state lives. SQLiteStateBackend (the default) keeps it in a
+WAL-mode database that all workers on a host share safely, MemoryStateBackend
+is a per-process backend for single-worker runs and tests, and other stores
+(e.g. Redis) can be plugged in by implementing the same interface and
+registering them in BACKENDS.
+"""
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION = "default"
+
+
+class StateBackend:
+    """Interface for shared state stores.
+
+    Values are any JSON-serializable object. TTLs are in seconds; None means
+    the entry never expires.
+    """
+
+    name = "base"
+    # Expired key-value entries are also deleted on one write in this many, so
+    # short-lived keys such as rate-limit windows never pile up
+    PURGE_EVERY_WRITES = 1000
+
+    # Key-value entries, grouped by namespace (caches, flags, ...)
+    def get(self, namespace: str, key: str, default=None):
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value, ttl: float = None):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl: float = None) -> int:
+        """Atomically add to a counter and return the new value.
+
+        The TTL is set when the counter is created, which makes fixed-window
+        rate limiting a single call.
+        """
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Delete every expired key-value entry; returns how many were removed."""
+        raise NotImplementedError
+
+    def _kv_written(self):
+        if next(self._kv_writes) % self.PURGE_EVERY_WRITES == 0:
+            self.purge_expired()
+
+    # Conversation history, one ordered message list per session
+    def append_messages(self, session_id: str, messages):
+        raise NotImplementedError
+
+    def get_messages(self, session_id: str, limit: int = None):
+        """The most recent `limit` messages (all when None), oldest first."""
+        raise NotImplementedError
+
+    def count_messages(self, session_id: str) -> int:
+        raise NotImplementedError
+
+    def clear_session(self, session_id: str):
+        raise NotImplementedError
+
+    # Retention support
+    def list_sessions(self):
+        """Every stored session as a dict with session_id, messages, last_id and last_at."""
+        raise NotImplementedError
+
+    def oldest_messages(self, session_id: str, limit: int, through_id: int = None):
+        """The oldest messages of a session with their id and created_at, oldest first."""
+        raise NotImplementedError
+
+    def delete_messages(self, session_id: str, through_id: int):
+        """Delete a session's messages up to and including through_id."""
+        raise NotImplementedError
+
+    # Reading history back
+    def message_page(self, session_id: str = None, limit: int = 100, after_id: int = None, before_id: int = None,
+                     since: float = None, until: float = None, descending: bool = False):
+        """One page of messages in id order, with id, session_id, role, content and created_at.
+
+        session_id None covers every session; since/until bound created_at
+        (until is exclusive).
+        """
+        raise NotImplementedError
+
+    def iter_messages(self, session_id: str = None, since: float = None, until: float = None,
+                      batch_size: int = 1000):
+        """Yield matching messages oldest first, fetching one page at a time."""
+        after_id = None
+        while True:
+            page = self.message_page(session_id, batch_size, after_id=after_id, since=since, until=until)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after_id = page[-1]["id"]
+
+    def close(self):
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    """Per-process backend; only correct with a single worker."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._sessions = {}
+        self._next_id = 1
+        self._kv_writes = itertools.count(1)
+
+    def _live(self, namespace, key):
+        entry = self._values.get((namespace, key))
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._values[(namespace, key)]
+            return None
+        return entry
+
+    def get(self, namespace, key, default=None):
+        with self._lock:
+            entry = self._live(namespace, key)
+            return default if entry is None else entry[0]
+
+    def set(self, namespace, key, value, ttl=None):
+        with self._lock:
+            self._values[(namespace, key)] = (value, time.time() + ttl if ttl else None)
+        self._kv_written()
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._values.pop((namespace, key), None)
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        with self._lock:
+            entry = self._live(namespace, key)
+            if entry is None:
+                entry = (0, time.time() + ttl if ttl else None)
+            value = entry[0] + amount
+            self._values[(namespace, key)] = (value, entry[1])
+        self._kv_written()
+        return value
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, (_, expires_at) in self._values.items() if expires_at is not None and expires_at <= now
+            ]
+            for key in expired:
+                del self._values[key]
+        return len(expired)
+
+    def append_messages(self, session_id, messages):
+        now = time.time()
+        with self._lock:
+            stored = self._sessions.setdefault(session_id, [])
+            for message in messages:
+                stored.append({
+                    "id": self._next_id,
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": message.get("created_at", now),
+                })
+                self._next_id += 1
+
+    def get_messages(self, session_id, limit=None):
+        with self._lock:
+            messages = self._sessions.get(session_id, [])
+            selected = messages[-limit:] if limit else messages
+            return [{"role": message["role"], "content": message["content"]} for message in selected]
+
+    def count_messages(self, session_id):
+        with self._lock:
+            return len(self._sessions.get(session_id, []))
+
+    def clear_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def list_sessions(self):
+        with self._lock:
+            return [
+                {
+                    "session_id": session_id,
+                    "messages": len(messages),
+                    "last_id": messages[-1]["id"],
+                    "last_at": messages[-1]["created_at"],
+                }
+                for session_id, messages in self._sessions.items() if messages
+            ]
+
+    def oldest_messages(self, session_id, limit, through_id=None):
+        with self._lock:
+            messages = self._sessions.get(session_id, [])
+            if through_id is not None:
+                messages = [message for message in messages if message["id"] <= through_id]
+            return [dict(message) for message in messages[:limit]]
+
+    def message_page(self, session_id=None, limit=100, after_id=None, before_id=None,
+                     since=None, until=None, descending=False):
+        with self._lock:
+            if session_id is None:
+                sessions = self._sessions.items()
+            else:
+                sessions = [(session_id, self._sessions.get(session_id, []))]
+            selected = [
+                dict(message, session_id=owner)
+                for owner, messages in sessions
+                for message in messages
+                if (after_id is None or message["id"] > after_id)
+                and (before_id is None or message["id"] < before_id)
+                and (since is None or message["created_at"] >= since)
+                and (until is None or message["created_at"] < until)
+            ]
+        selected.sort(key=lambda message: message["id"], reverse=descending)
+        return selected[:limit]
+
+    def delete_messages(self, session_id, through_id):
+        with self._lock:
+            remaining = [message for message in self._sessions.get(session_id, []) if message["id"] > through_id]
+            if remaining:
+                self._sessions[session_id] = remaining
+            else:
+                self._sessions.pop(session_id, None)
+
+
+class SQLiteStateBackend(StateBackend):
+    """SQLite database in WAL mode, shared by every worker on the host.
+
+    WAL lets readers proceed while one writer commits, and each thread keeps
+    its own connection. Messages are appended as rows, so saving a turn costs
+    the same regardless of how long the conversation already is.
+    """
+
+    name = "sqlite"
+    MAX_ROWID = (1 << 63) - 1
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS kv (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL,
+            PRIMARY KEY (namespace, key)
+        )""",
+        """CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id)",
+        "CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at)",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._kv_writes = itertools.count(1)
+        with self._transaction(write=True) as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _transaction(self, write: bool = False):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return _Transaction(conn, write)
+
+    def get(self, namespace, key, default=None):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._transaction(write=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at),
+            )
+        self._kv_written()
+
+    def delete(self, namespace, key):
+        with self._transaction(write=True) as conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        now = time.time()
+        with self._transaction(write=True) as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                value, expires_at = amount, (now + ttl if ttl else None)
+            else:
+                value, expires_at = json.loads(row[0]) + amount, row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at),
+            )
+        self._kv_written()
+        return value
+
+    def purge_expired(self):
+        with self._transaction(write=True) as conn:
+            cursor = conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def append_messages(self, session_id, messages):
+        now = time.time()
+        with self._transaction(write=True) as conn:
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, message["role"], message["content"], message.get("created_at", now))
+                    for message in messages
+                ],
+            )
+
+    def get_messages(self, session_id, limit=None):
+        with self._transaction() as conn:
+            if limit:
+                rows = conn.execute(
+                    "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                    (session_id, limit),
+                ).fetchall()
+                rows.reverse()
+            else:
+                rows = conn.execute(
+                    "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+                ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def count_messages(self, session_id):
+        with self._transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def clear_session(self, session_id):
+        with self._transaction(write=True) as conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def list_sessions(self):
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT session_id, COUNT(*), MAX(id), MAX(created_at) FROM messages GROUP BY session_id"
+            ).fetchall()
+        return [
+            {"session_id": session_id, "messages": count, "last_id": last_id, "last_at": last_at}
+            for session_id, count, last_id, last_at in rows
+        ]
+
+    def oldest_messages(self, session_id, limit, through_id=None):
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, role, content, created_at FROM messages "
+                "WHERE session_id = ? AND id <= ? ORDER BY id LIMIT ?",
+                (session_id, through_id if through_id is not None else self.MAX_ROWID, limit),
+            ).fetchall()
+        return [
+            {"id": message_id, "role": role, "content": content, "created_at": created_at}
+            for message_id, role, content, created_at in rows
+        ]
+
+    def delete_messages(self, session_id, through_id):
+        with self._transaction(write=True) as conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ? AND id <= ?", (session_id, through_id))
+
+    def message_page(self, session_id=None, limit=100, after_id=None, before_id=None,
+                     since=None, until=None, descending=False):
+        clauses, params = [], []
+        for clause, value in (
+            ("session_id = ?", session_id),
+            ("id > ?", after_id),
+            ("id < ?", before_id),
+            ("created_at >= ?", since),
+            ("created_at < ?", until),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        order = "DESC" if descending else "ASC"
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT id, session_id, role, content, created_at FROM messages {where}ORDER BY id {order} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            {"id": message_id, "session_id": owner, "role": role, "content": content, "created_at": created_at}
+            for message_id, owner, role, content, created_at in rows
+        ]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Transaction:
+    """Run the enclosed statements in one transaction.
+
+    Writers take the lock up front (BEGIN IMMEDIATE) so two workers doing a
+    read-modify-write such as incr never deadlock upgrading a read lock.
+    """
+
+    def __init__(self, conn, write: bool):
+        self.conn = conn
+        self.write = write
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE" if self.write else "BEGIN")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+BACKENDS = {
+    "sqlite": lambda: SQLiteStateBackend(settings.STATE_DB_PATH),
+    "memory": MemoryStateBackend,
+}
+
+_state_backend = None
+_state_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """The process-wide backend selected by settings.STATE_BACKEND."""
+    global _state_backend
+    if _state_backend is None:
+        with _state_lock:
+            if _state_backend is None:
+                name = settings.STATE_BACKEND
+                if name not in BACKENDS:
+                    raise ValueError(f"Unknown state backend: {name}")
+                _state_backend = BACKENDS[name]()
+                logger.info(f"Using {name} state backend")
+    return _state_backend
@@ -5,14 +5,15 @@ import os
 import sys
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 # Add project root to path
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
+# Set up logging
+from config.logging_config import setup_logging
+setup_logging()
+logger = logging.getLogger(__name__)
+
 try:
     # Import the FastAPI app
     from api.main import create_app
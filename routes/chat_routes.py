@@ -1,15 +1,26 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, field_validator
+from starlette.concurrency import iterate_in_threadpool
+from starlette.datastructures import UploadFile
+import asyncio
 import logging
 import os
 import sys
+import time
 # Ensure module imports work in Vercel environment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
 from core.chat import ChatManager
+from core.detections import PARSERS
+from core.documents import UploadTooLarge, chunk_text, count_chunks, detect_kind, extract_text, spool_upload
+from core.state import DEFAULT_SESSION
 from typing import Dict, List
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import multipart  # Optional: needed by Starlette to parse multipart/form-data uploads
+except ImportError:
+    multipart = None
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -72,13 +83,28 @@ class DetectionData(BaseModel):
 
 class ChatRequestWithName(ChatRequest):
     userName: str = None
+    sessionId: str = None
+
+    @field_validator('sessionId')
+    @classmethod
+    def session_id_must_be_short(cls, v):
+        if v is not None and len(v) > 128:
+            raise ValueError('Session id must be at most 128 characters')
+        return v
 
 @router.post("/chat")
 async def chat(request: ChatRequestWithName):
     try:
-        logger.info(f"Received chat request with query: {request.query[:100]}...")  # Log truncated query
-        response = chat_manager.chat(request.query, request.userName)
-        logger.info("Chat request processed successfully")
+        start = time.perf_counter()
+        logger.info("Received chat request", extra={"query": request.query[:100]})  # Log truncated query
+        # The upstream call blocks, so it runs in a worker thread to keep the event loop free
+        response = await asyncio.to_thread(
+            chat_manager.chat, request.query, request.userName, request.sessionId or DEFAULT_SESSION, cacheable=True
+        )
+        logger.info(
+            "Chat request processed successfully",
+            extra={"duration_ms": round((time.perf_counter() - start) * 1000, 3)},
+        )
         return {"response": response}
     except HTTPException as he:
         logger.error(f"HTTP error in chat endpoint: {str(he)}")
@@ -91,16 +117,24 @@ async def chat(request: ChatRequestWithName):
         )
 
 
-@router.post("/summarize")
-async def summarize(request: SummarizeRequest):
-    try:
-        prompt = f"""Your task is to summarize the following text concisely while preserving key information and meaning:
+SUMMARIZE_PROMPT = """Your task is to summarize the following text concisely while preserving key information and meaning:
 
-{request.text}
+{text}
 
 Provide a clear and focused summary."""
-        
-        summary = chat_manager.chat(prompt)
+
+# Used when a document is too long for one call and its parts were summarized separately
+COMBINE_SUMMARIES_PROMPT = """The following are summaries of consecutive parts of one document, in order. Combine them into a single concise summary of the whole document, preserving key information and meaning:
+
+{text}
+
+Provide a clear and focused summary."""
+
+@router.post("/summarize")
+async def summarize(request: SummarizeRequest):
+    try:
+        prompt = SUMMARIZE_PROMPT.format(text=request.text)
+        summary = await asyncio.to_thread(chat_manager.chat, prompt, profile="summarize")
         if not summary:
             raise HTTPException(
                 status_code=500,
@@ -116,11 +150,115 @@ Provide a clear and focused summary."""
             detail="Failed to process summarization request"
         )
 
-@router.post("/scenario")
-async def scenario_description(request: DetectionData):
+async def _summarize_part(template: str, text: str) -> str:
+    # No session: document parts must not see, or end up in, chat history
+    summary = await asyncio.to_thread(chat_manager.chat, template.format(text=text), None, None, profile="summarize")
+    if not summary:
+        raise HTTPException(status_code=500, detail="Failed to generate summary")
+    return summary
+
+
+async def _summarize_document(file, kind: str):
+    """Summarize a document chunk by chunk; returns (summary, chunks, characters).
+
+    Text is extracted and chunked in a worker thread as the summarizer asks
+    for it, and partial summaries are folded together whenever they reach a
+    chunk's size, so memory stays bounded by the chunk size rather than the
+    document size.
+    """
+    chunk_chars = settings.SUMMARIZE_CHUNK_CHARS
+    max_chunks = settings.SUMMARIZE_MAX_CHUNKS
+    # Each chunk is an upstream call, so refuse long documents before making any
+    if max_chunks and await asyncio.to_thread(count_chunks, file, kind, chunk_chars, max_chunks) > max_chunks:
+        raise UploadTooLarge(
+            f"Document is longer than {max_chunks} chunks of {chunk_chars} characters; send a shorter document"
+        )
+    summaries = []
+    chunks = characters = 0
+    async for chunk in iterate_in_threadpool(chunk_text(extract_text(file, kind), chunk_chars)):
+        chunks += 1
+        characters += len(chunk)
+        summaries.append(await _summarize_part(SUMMARIZE_PROMPT, chunk))
+        if len(summaries) > 1 and sum(len(summary) for summary in summaries) >= chunk_chars:
+            summaries = [await _summarize_part(COMBINE_SUMMARIES_PROMPT, "\n\n".join(summaries))]
+    if not chunks:
+        raise ValueError("No text could be extracted from the file")
+    if chunks == 1:
+        return summaries[0], chunks, characters
+    if len(summaries) > 1:
+        summaries = [await _summarize_part(COMBINE_SUMMARIES_PROMPT, "\n\n".join(summaries))]
+    return summaries[0], chunks, characters
+
+
+@router.post("/summarize/upload")
+async def summarize_upload(request: Request, filename: str = None):
+    """Summarize an uploaded text, Markdown or PDF file.
+
+    Send the file as multipart/form-data in a field named "file" (needs the
+    python-multipart package), or as the raw request body with its own
+    Content-Type and an optional ?filename=. Either way the upload is
+    spooled to a temporary file and never held in memory whole.
+    """
+    max_bytes = settings.SUMMARIZE_UPLOAD_MAX_BYTES
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload is larger than {max_bytes} bytes")
+
+    form = None
+    upload = None
     try:
-        # Prepare the prompt with the required instruction text
-        scenario_prompt = """You are a helpful and observant visual assistant. A user cannot see the image, so your task is to describe the visible scene clearly and naturally, as if you're standing next to them.
+        if content_type == "multipart/form-data":
+            if multipart is None:
+                raise HTTPException(
+                    status_code=415,
+                    detail="Multipart uploads need the python-multipart package; send the file as the request body instead"
+                )
+            if not content_length:
+                # Starlette does not bound multipart file sizes, so require the length up front
+                raise HTTPException(status_code=411, detail="Content-Length is required for multipart uploads")
+            form = await request.form(max_files=1, max_fields=10)
+            part = form.get("file")
+            if not isinstance(part, UploadFile):
+                raise HTTPException(status_code=422, detail='Expected a file in the form field "file"')
+            file, filename, part_type = part.file, part.filename or filename, part.content_type
+        else:
+            upload = await spool_upload(request.stream(), max_bytes)
+            file, part_type = upload, content_type
+
+        kind = await asyncio.to_thread(detect_kind, file, part_type, filename)
+        start = time.perf_counter()
+        summary, chunks, characters = await _summarize_document(file, kind)
+        logger.info(
+            "Summarized uploaded document",
+            extra={
+                "kind": kind,
+                "chunks": chunks,
+                "characters": characters,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            },
+        )
+        return {"summary": summary, "chunks": chunks, "characters": characters}
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Summarize upload endpoint error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to process summarization request"
+        )
+    finally:
+        if upload is not None:
+            upload.close()
+        if form is not None:
+            await form.close()
+
+# Instruction text shared by /scenario and /scenario/compact
+SCENARIO_PROMPT = """You are a helpful and observant visual assistant. A user cannot see the image, so your task is to describe the visible scene clearly and naturally, as if you're standing next to them.
 
 Based on the detected objects from an image, including their labels (e.g., "dog", "car", "bench"), their approximate positions within the frame (e.g., "bottom-left", "centre-right", "top"), and confidence levels, describe the image as a human would — using natural, flowing language that paints a vivid mental picture.
 
@@ -130,6 +268,10 @@ Imagine you are describing the scene out loud to a visually impaired person, foc
 
 The detected objects in the image are:
 """
+
+@router.post("/scenario")
+async def scenario_description(request: DetectionData):
+    try:
         # Format the detection data for the prompt
         formatted_detections = []
         for object_type, detections in request.detections.items():
@@ -139,10 +281,10 @@ The detected objects in the image are:
                 )
         
         scenario_text = "\n".join(formatted_detections)
-        full_prompt = scenario_prompt + "\n" + scenario_text
+        full_prompt = SCENARIO_PROMPT + "\n" + scenario_text
         
         # Use the chat manager to generate a response
-        response = chat_manager.chat(full_prompt)
+        response = await asyncio.to_thread(chat_manager.chat, full_prompt, profile="scenario")
         return {"description": response}
     except HTTPException:
         raise
@@ -151,4 +293,35 @@ The detected objects in the image are:
         raise HTTPException(
             status_code=500,
             detail="Failed to process scenario description request"
-        )
\ No newline at end of file
+        )
+
+@router.post("/scenario/compact")
+async def scenario_description_compact(request: Request):
+    """Describe a scene sent as columnar detection arrays (see core.detections).
+
+    The body is JSON, msgpack or a NumPy .npz archive, chosen by Content-Type.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    parser = PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type {content_type!r}, expected one of: {', '.join(PARSERS)}"
+        )
+    try:
+        detections = parser(await request.body())
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+
+    try:
+        full_prompt = SCENARIO_PROMPT + "\n" + "\n".join(detections.lines())
+        response = await asyncio.to_thread(chat_manager.chat, full_prompt, profile="scenario")
+        return {"description": response}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Compact scenario description endpoint error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to process scenario description request"
+        )
@@ -0,0 +1,193 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+import base64
+import binascii
+import datetime
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import urllib.parse
+# Ensure module imports work in Vercel environment
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from core.retention import get_archive_store
+from core.state import get_state_backend
+from typing import Optional
+
+try:
+    import orjson  # Optional: several times faster JSON encoding for exports
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Pages are returned as ready-made responses, skipping FastAPI's generic encoder
+PageResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+MAX_PAGE_SIZE = 500
+# Export lines are flushed to the client in chunks of about this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def content_disposition(filename: str) -> str:
+    """An attachment header that is safe for any filename.
+
+    The quoted filename keeps only [A-Za-z0-9._-], so quotes and CR/LF cannot
+    break out of the header; the RFC 5987 filename* carries the full name,
+    percent-encoded as UTF-8, for clients that support it.
+    """
+    fallback = _UNSAFE_FILENAME.sub("_", filename)
+    if fallback == filename:
+        return f'attachment; filename="{filename}"'
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{urllib.parse.quote(filename, safe="")}'
+
+
+def require_history_access(authorization: Optional[str] = Header(None)):
+    """Guard history endpoints with HISTORY_API_KEY; without a key they are disabled."""
+    if not settings.HISTORY_API_KEY:
+        raise HTTPException(status_code=403, detail="History access is disabled; set HISTORY_API_KEY to enable it")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.HISTORY_API_KEY}"):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+
+router = APIRouter(dependencies=[Depends(require_history_access)])
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+
+def _epoch(value: Optional[datetime.datetime]):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def encode_cursor(message_id: int) -> str:
+    return base64.urlsafe_b64encode(str(message_id).encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/sessions/export")
+def export_history(
+    session_id: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    include_archived: bool = True,
+):
+    """Stream history as NDJSON, one message per line.
+
+    Filters by session and/or a created-at range (until is exclusive).
+    Archived messages come first, then live history, each oldest first. Rows
+    are read a page at a time and encoded as they go, so memory use does not
+    grow with the size of the export.
+    """
+    since_ts, until_ts = _epoch(since), _epoch(until)
+    if since_ts is not None and until_ts is not None and since_ts >= until_ts:
+        raise HTTPException(status_code=400, detail="since must be earlier than until")
+    state = get_state_backend()
+    archive = get_archive_store() if include_archived else None
+
+    def lines():
+        if archive is not None:
+            for message in archive.iter_messages(session_id, since_ts, until_ts):
+                yield _dumps({
+                    "sessionId": message["session_id"],
+                    "id": None,
+                    "role": message["role"],
+                    "content": message["content"],
+                    "createdAt": _isoformat(message.get("created_at")),
+                    "archived": True,
+                })
+        for message in state.iter_messages(session_id, since_ts, until_ts):
+            yield _dumps({
+                "sessionId": message["session_id"],
+                "id": message["id"],
+                "role": message["role"],
+                "content": message["content"],
+                "createdAt": _isoformat(message["created_at"]),
+                "archived": False,
+            })
+
+    def chunks():
+        # Starlette runs sync iterators in a worker thread, so the blocking
+        # reads never stall the event loop
+        buffer = bytearray()
+        exported = 0
+        try:
+            for line in lines():
+                buffer += line
+                exported += 1
+                if len(buffer) >= EXPORT_CHUNK_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+            if buffer:
+                yield bytes(buffer)
+        finally:
+            logger.info(f"Exported {exported} messages", extra={"session_id": session_id})
+
+    filename = f"history-{session_id}.ndjson" if session_id else "history.ndjson"
+    return StreamingResponse(
+        chunks(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
+
+
+@router.get("/sessions/{session_id}/messages")
+def session_messages(
+    session_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+):
+    """One page of a session's live history.
+
+    Pages are keyed on message ids rather than offsets, so each page is an
+    index range scan and stays stable while new messages are appended. Pass
+    nextCursor back as cursor to continue; it is null on the last page.
+    """
+    after_id = before_id = None
+    if cursor:
+        if order == "asc":
+            after_id = decode_cursor(cursor)
+        else:
+            before_id = decode_cursor(cursor)
+    page = get_state_backend().message_page(
+        session_id, limit + 1, after_id=after_id, before_id=before_id, descending=order == "desc"
+    )
+    has_more = len(page) > limit
+    page = page[:limit]
+    return PageResponse({
+        "sessionId": session_id,
+        "messages": [
+            {
+                "id": message["id"],
+                "role": message["role"],
+                "content": message["content"],
+                "createdAt": _isoformat(message["created_at"]),
+            }
+            for message in page
+        ],
+        "nextCursor": encode_cursor(page[-1]["id"]) if has_more else None,
+    })
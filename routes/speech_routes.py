@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
+import logging
+import os
+import re
+import sys
+# Ensure module imports work in Vercel environment
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import SUPPORTED_LANGUAGES
+from config.voice_mapping import KNOWN_LANGUAGES, KNOWN_VOICES, select_voice
+from core.language import detect_language
+from core.speech import get_speech_service
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MAX_SPEAK_CHARS = 5000
+# Language codes with a voice, plus the locales the UI offers (those without one use the default voice)
+SPEAK_LANGUAGES = KNOWN_LANGUAGES | {code.split("-")[0].lower() for code in SUPPORTED_LANGUAGES}
+_LANGUAGE_TAG = re.compile(r"^[A-Za-z]{2,3}(-[A-Za-z0-9]{2,8})?$")
+
+class SpeakRequest(BaseModel):
+    text: str
+    voice: Optional[str] = None
+    language: Optional[str] = None
+    gender: Optional[str] = None
+
+    @field_validator('text')
+    @classmethod
+    def text_must_not_be_empty(cls, v):
+        if not v or not v.strip():
+            raise ValueError('Text cannot be empty')
+        if len(v) > MAX_SPEAK_CHARS:
+            raise ValueError(f'Text is too long to speak (max {MAX_SPEAK_CHARS} characters)')
+        return v.strip()
+
+    @field_validator('language')
+    @classmethod
+    def language_must_be_known(cls, v):
+        if v is None or v == "auto":
+            return v
+        if not _LANGUAGE_TAG.match(v) or v.split("-")[0].lower() not in SPEAK_LANGUAGES:
+            raise ValueError('Unknown language: use a code such as "en" or "hi-IN", or "auto"')
+        return v
+
+    @field_validator('gender')
+    @classmethod
+    def gender_must_be_known(cls, v):
+        if v is not None and v.lower() not in ("male", "female"):
+            raise ValueError('Gender must be "male" or "female"')
+        return v.lower() if v else v
+
+def resolve_voice(request: SpeakRequest):
+    """Return (voice, language), detecting the language when none is given."""
+    language = request.language
+    if not language or language == "auto":
+        language, _ = detect_language(request.text)
+    if request.voice:
+        if request.voice not in KNOWN_VOICES:
+            raise HTTPException(status_code=400, detail=f"Unknown voice: {request.voice}")
+        return request.voice, language
+    return select_voice(language, request.gender), language
+
+@router.post("/speak")
+async def speak(request: SpeakRequest):
+    voice, language = resolve_voice(request)
+    try:
+        service = get_speech_service()
+    except Exception as e:
+        logger.error(f"Failed to initialize speech service: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Speech service is not available"
+        )
+
+    async def audio_chunks():
+        try:
+            async for chunk in service.stream(request.text, voice):
+                yield chunk
+        except Exception as e:
+            # Headers are already sent, so the stream can only be cut short
+            logger.error(f"Speech synthesis failed: {str(e)}")
+
+    return StreamingResponse(
+        audio_chunks(),
+        media_type=service.media_type,
+        headers={"X-Voice": voice, "X-Language": language},
+    )
@@ -0,0 +1,39 @@
+"""
+Shared test setup.
+
+config.settings reads the environment once at import time, so the variables
+the app needs are set here before any test module imports it. Runs happen in a
+scratch working directory so nothing is written to the working tree.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("GroqAPIKey", "test-key")
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("RETENTION_INTERVAL", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("TTS_ENGINE", "stub")
+
+
+def pytest_sessionstart(session):
+    # Relative paths (logs/, Data/, audio/) resolve against a scratch directory
+    os.chdir(tempfile.mkdtemp(prefix="myra-tests-"))
+
+
+@pytest.fixture(scope="session")
+def app():
+    from api.main import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,104 @@
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+from core.assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    Asset,
+    AssetStore,
+)
+
+
+def make_request(headers=None, query_string=b""):
+    raw = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": query_string})
+
+
+@pytest.fixture
+def store(tmp_path):
+    static = tmp_path / "static"
+    (static / "css").mkdir(parents=True)
+    (static / "css" / "site.css").write_text("body { color: red; }\n" * 200)
+    (static / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    template = tmp_path / "bot.html"
+    template.write_text('<link href="static/css/site.css"><img src="/static/missing.png">' + "<p>hi</p>" * 100)
+    return AssetStore(static_dir=str(static), template_path=str(template))
+
+
+def test_compressible_asset_keeps_gzip_variant():
+    asset = Asset(b"hello world " * 200, "text/css")
+    assert "gzip" in asset.variants
+    assert gzip.decompress(asset.variants["gzip"][0]) == b"hello world " * 200
+    assert asset.variants["gzip"][1] != asset.etag
+
+
+def test_binary_asset_is_not_compressed():
+    asset = Asset(bytes(range(256)) * 4, "image/png")
+    assert list(asset.variants) == ["identity"]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*", "gzip"),
+    ("", "identity"),
+])
+def test_select_encoding(header, expected):
+    asset = Asset(b"a" * 4096, "text/plain")
+    asset.variants.pop("br", None)
+    assert asset.select_encoding(header) == expected
+
+
+def test_etag_matches_any_variant_and_weak_form():
+    asset = Asset(b"a" * 4096, "text/plain")
+    gzip_etag = asset.variants["gzip"][1]
+    assert asset.matches(asset.etag)
+    assert asset.matches(f'"other", W/{gzip_etag}')
+    assert asset.matches("*")
+    assert not asset.matches('"other"')
+    assert not asset.matches("")
+
+
+def test_response_returns_304_for_current_etag(store):
+    asset = store.static["css/site.css"]
+    response = asset.response(make_request({"If-None-Match": asset.etag}), REVALIDATE_CACHE_CONTROL)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == asset.etag
+
+
+def test_response_serves_gzip_when_accepted(store):
+    asset = store.static["css/site.css"]
+    response = asset.response(make_request({"Accept-Encoding": "gzip"}), REVALIDATE_CACHE_CONTROL)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body) == asset.variants["identity"][0]
+
+
+def test_template_static_references_are_fingerprinted(store):
+    html = store.template.variants["identity"][0].decode("utf-8")
+    digest = store.static["css/site.css"].digest
+    assert f'"/static/css/site.css?v={digest}"' in html
+    # Unknown files are left as written
+    assert '"/static/missing.png"' in html
+
+
+def test_serve_static_cache_policy(store):
+    digest = store.static["logo.png"].digest
+    hashed = store.serve_static(make_request(query_string=f"v={digest}".encode()), "logo.png")
+    stale = store.serve_static(make_request(query_string=b"v=old"), "logo.png")
+    assert hashed.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert stale.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    assert store.serve_static(make_request(), "nope.css").status_code == 404
+
+
+def test_root_page_revalidates_with_etag(client):
+    first = client.get("/")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    second = client.get("/", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
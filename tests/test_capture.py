@@ -0,0 +1,136 @@
+import json
+import logging
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.capture import REDACTED, CaptureFormatter, TrafficCaptureMiddleware, pseudonym, sanitize
+from benchmarks.replay import summarize
+from config.settings import Settings
+
+
+def format_capture(body: bytes, redact_text: bool, **fields):
+    record = logging.LogRecord("capture", logging.INFO, __file__, 1, "capture", (), None)
+    record.capture = {"raw_body": body, "body_truncated": False, **fields}
+    return json.loads(CaptureFormatter(redact_text).format(record))
+
+
+def test_sensitive_keys_are_redacted_at_any_depth():
+    body = {"userName": "ada", "nested": [{"api_key": "k", "DB-Password": "p", "query": "hi"}], "Authorization": "t"}
+    assert sanitize(body) == {
+        "userName": REDACTED,
+        "nested": [{"api_key": REDACTED, "DB-Password": REDACTED, "query": "hi"}],
+        "Authorization": REDACTED,
+    }
+
+
+def test_redact_text_masks_only_free_text():
+    assert sanitize({"query": "hello", "n": 3, "ok": True, "items": ["ab"]}, redact_text=True) == \
+        {"query": "xxxxx", "n": 3, "ok": True, "items": ["ab"]}
+    assert sanitize({"text": ["long", "text"], "language": "en-GB"}, redact_text=True) == \
+        {"text": ["xxxx", "xxxx"], "language": "en-GB"}
+
+
+def test_redact_text_keeps_ids_distinct_and_stable():
+    first = sanitize({"query": "hi", "sessionId": "tab-1"}, redact_text=True)
+    again = sanitize({"query": "hello", "sessionId": "tab-1"}, redact_text=True)
+    other = sanitize({"query": "hi", "sessionId": "tab-2"}, redact_text=True)
+    assert first["sessionId"] == again["sessionId"] == pseudonym("tab-1")
+    assert first["sessionId"] != other["sessionId"]
+    assert "tab-1" not in first["sessionId"]
+
+
+def test_redact_text_keeps_scenario_payloads_valid():
+    body = {
+        "status": "success",
+        "filename": "frame.jpg",
+        "detections": {"dog": [{"object_id": "dog_0", "position": "bottom-left", "confidence": 0.9}]},
+    }
+    sanitized = sanitize(body, redact_text=True)
+    assert sanitized["status"] == "success"
+    [detection] = sanitized["detections"]["dog"]
+    assert detection["position"] == "bottom-left"
+    assert detection["object_id"] == pseudonym("dog_0")
+
+
+def test_replay_counts_changed_statuses_as_errors():
+    results = [
+        {"path": "/chat", "status": 200, "captured_status": 200, "latency_s": 0.1, "captured_ms": 90, "lag_s": 0},
+        {"path": "/chat", "status": 422, "captured_status": 200, "latency_s": 0.01, "captured_ms": 90, "lag_s": 0},
+        {"path": "/chat", "status": 429, "captured_status": 429, "latency_s": 0.01, "captured_ms": 1, "lag_s": 0},
+        {"path": "/chat", "status": None, "captured_status": 200, "latency_s": 1.0, "captured_ms": 90, "lag_s": 0},
+    ]
+    overall = summarize(results, elapsed=1.0)["overall"]
+    assert overall["errors"] == 2
+    assert overall["status_mismatches"] == 2
+
+
+def test_formatter_omits_bodies_that_are_not_json():
+    entry = format_capture(b"\xff\xfe not json", redact_text=True, path="/summarize/upload")
+    assert entry["body"] is None
+    assert entry["body_encoding"] == "omitted"
+    assert "raw_body" not in entry
+
+
+def test_text_redaction_is_on_by_default(monkeypatch):
+    monkeypatch.delenv("TRAFFIC_CAPTURE_REDACT_TEXT", raising=False)
+    assert Settings().TRAFFIC_CAPTURE_REDACT_TEXT is True
+    monkeypatch.setenv("TRAFFIC_CAPTURE_REDACT_TEXT", "0")
+    assert Settings().TRAFFIC_CAPTURE_REDACT_TEXT is False
+
+
+def test_capture_settings_come_from_settings(monkeypatch):
+    monkeypatch.setenv("TRAFFIC_CAPTURE_PATH", "logs/traffic.jsonl")
+    monkeypatch.setenv("TRAFFIC_CAPTURE_EXCLUDE", "/health,,/metrics")
+    monkeypatch.setenv("TRAFFIC_CAPTURE_MAX_BODY_BYTES", "10")
+    configured = Settings()
+    assert configured.TRAFFIC_CAPTURE_PATH == "logs/traffic.jsonl"
+    assert configured.TRAFFIC_CAPTURE_EXCLUDE == ("/health", "/metrics")
+    assert configured.TRAFFIC_CAPTURE_MAX_BODY_BYTES == 10
+
+
+def read_lines(path, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists():
+            lines = path.read_text().splitlines()
+            if len(lines) >= count:
+                return [json.loads(line) for line in lines]
+        time.sleep(0.02)
+    raise AssertionError(f"expected {count} capture lines in {path}")
+
+
+def make_app(path, **options):
+    app = FastAPI()
+
+    @app.post("/chat")
+    async def chat(payload: dict):
+        return {"response": "ok"}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {}
+
+    app.add_middleware(TrafficCaptureMiddleware, path=str(path), **options)
+    return app
+
+
+def test_middleware_writes_redacted_lines_and_skips_excluded(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    client = TestClient(make_app(path, exclude=("/metrics",)))
+    client.get("/metrics")
+    client.post("/chat", json={"query": "my secret plans", "userName": "ada"})
+    [entry] = read_lines(path, 1)
+    assert entry["path"] == "/chat" and entry["status"] == 200
+    assert entry["body"] == {"query": "x" * 15, "userName": REDACTED}
+    assert entry["request_bytes"] > 0 and entry["response_bytes"] > 0
+
+
+def test_middleware_truncates_large_bodies(tmp_path):
+    path = tmp_path / "truncated.jsonl"
+    client = TestClient(make_app(path, max_body_bytes=8, redact_text=False))
+    client.post("/chat", json={"query": "longer than eight bytes"})
+    [entry] = read_lines(path, 1)
+    assert entry["body_truncated"] is True
+    assert entry["body"] is None
@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from config.settings import settings
+from core.chat import ChatManager, history_window
+from core.state import MemoryStateBackend
+
+
+class FakeCompletions:
+    """Records every upstream request and answers with a fixed reply."""
+
+    def __init__(self, content="an answer", finish_reason="stop"):
+        self.content = content
+        self.finish_reason = finish_reason
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        choice = SimpleNamespace(message=SimpleNamespace(content=self.content), finish_reason=self.finish_reason)
+        return SimpleNamespace(choices=[choice], usage={"prompt_tokens": 10, "completion_tokens": 5})
+
+
+@pytest.fixture
+def upstream():
+    return FakeCompletions()
+
+
+@pytest.fixture
+def manager(upstream):
+    manager = ChatManager()
+    manager.client = SimpleNamespace(chat=SimpleNamespace(completions=upstream))
+    manager.state = MemoryStateBackend()
+    manager.semantic_cache = None
+    return manager
+
+
+def history_sent(request):
+    """The session history of one upstream request, without prefix and time."""
+    return request["messages"][1:-1]
+
+
+@pytest.mark.parametrize("total, expected", [(0, 0), (10, 10), (11, 7), (14, 10), (15, 7), (100, 8)])
+def test_history_window_moves_in_blocks(total, expected):
+    assert history_window(total, max_messages=10, block=4) == expected
+
+
+def test_history_window_without_a_limit_loads_everything():
+    assert history_window(500, max_messages=0, block=4) == 500
+
+
+def test_prompt_prefix_is_stable_between_trims(manager, upstream, monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_MAX_MESSAGES", 10)
+    monkeypatch.setattr(settings, "HISTORY_TRIM_BLOCK", 4)
+    for turn in range(30):
+        manager.chat(f"question {turn}", session_id="s")
+
+    broken = 0
+    for previous, current in zip(upstream.requests, upstream.requests[1:]):
+        before = previous["messages"][:-1]  # All but the time message
+        if current["messages"][:len(before)] != before:
+            broken += 1
+    # One new prefix per block of 4 messages (two turns) once the limit is reached
+    assert broken == (30 - 5) // 2
+    assert all(len(history_sent(request)) <= 10 + 1 for request in upstream.requests)
+    assert all(history_sent(request)[0]["role"] == "user" for request in upstream.requests)
+    assert history_sent(upstream.requests[-1])[-1] == {"role": "user", "content": "question 29"}
+
+
+def test_token_budget_drops_whole_blocks(manager):
+    messages = [{"role": "user" if i % 2 == 0 else "assistant", "content": "x" * 40} for i in range(9)]
+    # 9 messages of 10 tokens; a 50 token budget drops two blocks of 2
+    assert manager._chunk_messages(messages, max_tokens=50, block=2) == messages[4:]
+    assert manager._chunk_messages(messages, max_tokens=90, block=2) == messages
+    # When even the newest block is too long, the newest messages that fit are kept
+    assert manager._chunk_messages(messages, max_tokens=15, block=4) == messages[-1:]
+
+
+def test_stateless_requests_do_not_touch_history(manager, upstream):
+    manager.chat("summarize this", session_id=None, profile="summarize")
+    assert history_sent(upstream.requests[0]) == [{"role": "user", "content": "summarize this"}]
+    assert manager.state.list_sessions() == []
+
+
+def test_realtime_info_is_rounded(manager, monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_TIME_GRANULARITY", 3600)
+    assert manager._get_realtime_info().endswith(":00")
+
+
+class ReasoningCompletions(FakeCompletions):
+    """Spends max_tokens below a threshold on reasoning and returns no answer text."""
+
+    def __init__(self, needs_tokens):
+        super().__init__()
+        self.needs_tokens = needs_tokens
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        if kwargs["max_tokens"] < self.needs_tokens:
+            content, finish_reason = "", "length"
+        else:
+            content, finish_reason = "an answer", "stop"
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice], usage={"prompt_tokens": 10, "completion_tokens": kwargs["max_tokens"]})
+
+
+def test_profile_options_are_sent_upstream(manager, upstream):
+    manager.chat("hi", session_id=None)
+    request = upstream.requests[0]
+    greeting = manager.profiles["greeting"]
+    assert request["max_tokens"] == greeting.max_tokens
+    assert request["extra_body"] == {"reasoning_effort": greeting.reasoning_effort}
+
+
+def test_answer_cut_off_by_reasoning_is_retried_with_more_tokens(manager):
+    upstream = ReasoningCompletions(needs_tokens=manager.profiles["greeting"].max_tokens * 2)
+    manager.client = SimpleNamespace(chat=SimpleNamespace(completions=upstream))
+    assert manager.chat("hi", session_id="s") == "an answer"
+    assert [request["max_tokens"] for request in upstream.requests] == [
+        manager.profiles["greeting"].max_tokens, manager.profiles["greeting"].max_tokens * 2
+    ]
+
+
+def test_empty_answer_after_the_retry_is_an_error(manager):
+    upstream = ReasoningCompletions(needs_tokens=10 ** 9)
+    manager.client = SimpleNamespace(chat=SimpleNamespace(completions=upstream))
+    with pytest.raises(HTTPException) as error:
+        manager.chat("hi", session_id="s")
+    assert error.value.status_code == 500
+    assert len(upstream.requests) == 2
+    assert manager.state.list_sessions() == []
+
+
+def test_empty_answer_that_was_not_cut_off_is_not_retried(manager):
+    upstream = FakeCompletions(content="", finish_reason="stop")
+    manager.client = SimpleNamespace(chat=SimpleNamespace(completions=upstream))
+    with pytest.raises(HTTPException):
+        manager.chat("hi", session_id=None)
+    assert len(upstream.requests) == 1
+
+
+def test_long_queries_are_never_trimmed_away(manager, upstream):
+    # Longer than the history token budget, as a large document part can be
+    manager.chat("y" * 24000, None, None, profile="summarize")
+    assert history_sent(upstream.requests[0]) == [{"role": "user", "content": "y" * 24000}]
+
+
+def test_long_query_trims_history_but_keeps_itself(manager, upstream):
+    for turn in range(3):
+        manager.chat("x" * 4000, session_id="s")
+    manager.chat("y" * 24000, session_id="s")
+    sent = history_sent(upstream.requests[-1])
+    assert sent[-1] == {"role": "user", "content": "y" * 24000}
+    assert sum(len(message["content"]) for message in sent[:-1]) / 4 <= 5000
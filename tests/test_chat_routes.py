@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+
+class SlowChatManager:
+    """Blocks like a real upstream call."""
+
+    def chat(self, query, user_name=None, session_id=None, cacheable=False, profile=None):
+        time.sleep(0.3)
+        return f"answer to {query}"
+
+
+@pytest.fixture
+def slow_chat(monkeypatch):
+    monkeypatch.setattr("routes.chat_routes.chat_manager", SlowChatManager())
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/chat", {"query": "hello", "sessionId": "s"}),
+    ("/summarize", {"text": "A long enough text to summarize for this test."}),
+])
+def test_blocking_upstream_calls_do_not_block_the_event_loop(app, slow_chat, path, payload):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(client.post(path, json=payload) for _ in range(4)))
+            return responses, time.perf_counter() - started
+
+    responses, elapsed = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200] * 4
+    # Four 0.3 s calls run side by side instead of one after another
+    assert elapsed < 0.9
@@ -0,0 +1,149 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from core import detections
+from core.detections import LABEL_DTYPE, POSITIONS, ColumnarDetections, parse_json, parse_npz
+
+PAYLOAD = {
+    "status": "success",
+    "filename": "frame.jpg",
+    "labels": ["person", "dog"],
+    "label": [1, 0, 0],
+    "position": [8, 6, 4],
+    "confidence": [0.67, 0.91, 0.88],
+}
+LINES = [
+    "- person at bottom-left (confidence: 91.00%)",
+    "- person at centre (confidence: 88.00%)",
+    "- dog at bottom-right (confidence: 67.00%)",
+]
+
+
+def npz_body(**overrides) -> bytes:
+    arrays = {
+        "status": np.asarray("success"),
+        "filename": np.asarray("frame.jpg"),
+        "labels": np.asarray(PAYLOAD["labels"]),
+        "label": np.asarray(PAYLOAD["label"], dtype=LABEL_DTYPE),
+        "position": np.asarray(PAYLOAD["position"], dtype="u1"),
+        "confidence": np.asarray(PAYLOAD["confidence"], dtype="<f4"),
+    }
+    arrays.update(overrides)
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+class FakeChatManager:
+    def __init__(self):
+        self.prompts = []
+
+    def chat(self, query, profile=None, **kwargs):
+        self.prompts.append((query, profile))
+        return "A dog and two people."
+
+
+@pytest.fixture
+def chat_manager(monkeypatch):
+    fake = FakeChatManager()
+    monkeypatch.setattr("routes.chat_routes.chat_manager", fake)
+    return fake
+
+
+def test_json_and_npz_give_the_same_lines():
+    assert parse_json(json.dumps(PAYLOAD).encode()).lines() == LINES
+    assert parse_npz(npz_body()).lines() == LINES
+
+
+def test_raw_buffers_are_accepted():
+    payload = {**PAYLOAD, "label": np.asarray(PAYLOAD["label"], dtype=LABEL_DTYPE).tobytes()}
+    assert ColumnarDetections.from_mapping(payload).lines() == LINES
+
+
+def test_custom_positions_and_empty_frames():
+    frame = ColumnarDetections("success", "", ["cat"], [0], [1], [0.5], positions=["left", "right"])
+    assert frame.lines() == ["- cat at right (confidence: 50.00%)"]
+    assert len(ColumnarDetections("success", "", ["cat"], [], [], [])) == 0
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"status": "error"}, "Status"),
+    ({"labels": []}, "labels must be"),
+    ({"label": [0, 0, 2]}, "outside labels"),
+    ({"position": [0, 0, len(POSITIONS)]}, "outside positions"),
+    ({"confidence": [0.5, 0.5, 1.5]}, "between 0 and 1"),
+    ({"confidence": [0.5, 0.5]}, "same length"),
+    ({"label": [[0], [0], [1]]}, "flat array"),
+    ({"label": [0.5, 0, 1]}, "integers"),
+    ({"label": "0,0,1"}, "must be an array"),
+])
+def test_invalid_payloads_are_rejected(change, message):
+    with pytest.raises(ValueError, match=message):
+        ColumnarDetections.from_mapping({**PAYLOAD, **change})
+
+
+def test_missing_fields_and_bad_bodies_are_rejected():
+    with pytest.raises(ValueError, match="Missing fields: label, confidence"):
+        ColumnarDetections.from_mapping({k: v for k, v in PAYLOAD.items() if k not in ("label", "confidence")})
+    with pytest.raises(ValueError, match="not valid JSON"):
+        parse_json(b"{")
+    with pytest.raises(ValueError, match="not a valid .npz"):
+        parse_npz(b"PK not really")
+
+
+def test_detection_limit(monkeypatch):
+    monkeypatch.setattr(detections, "MAX_DETECTIONS", 2)
+    with pytest.raises(ValueError, match="At most 2 detections"):
+        parse_json(json.dumps(PAYLOAD).encode())
+
+
+def test_npz_that_expands_too_far_is_rejected(monkeypatch):
+    monkeypatch.setattr(detections, "MAX_NPZ_BYTES", 64)
+    with pytest.raises(ValueError, match="expands to more than 64 bytes"):
+        parse_npz(npz_body())
+
+
+def test_npz_pickled_arrays_are_rejected():
+    with pytest.raises(ValueError, match="not a valid .npz"):
+        parse_npz(npz_body(labels=np.asarray([{"x": 1}], dtype=object)))
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/json", json.dumps(PAYLOAD).encode()),
+    ("application/json; charset=utf-8", json.dumps(PAYLOAD).encode()),
+    ("application/x-npz", npz_body()),
+])
+def test_compact_scenario(client, chat_manager, content_type, body):
+    response = client.post("/scenario/compact", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 200
+    assert response.json() == {"description": "A dog and two people."}
+    prompt, profile = chat_manager.prompts[0]
+    assert prompt.endswith("\n".join(LINES))
+    assert profile == "scenario"
+
+
+def test_compact_scenario_rejects_unsupported_types(client, chat_manager):
+    response = client.post("/scenario/compact", content=b"<xml/>", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 415
+    assert "application/json" in response.json()["detail"]
+    assert chat_manager.prompts == []
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/json", b"not json"),
+    ("application/json", json.dumps({**PAYLOAD, "label": [0, 0, 9]}).encode()),
+    ("application/x-npz", b"not an archive"),
+])
+def test_compact_scenario_rejects_invalid_payloads(client, chat_manager, content_type, body):
+    response = client.post("/scenario/compact", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 422
+    assert chat_manager.prompts == []
+
+
+def test_msgpack_buffers():
+    msgpack = pytest.importorskip("msgpack")
+    payload = {**PAYLOAD, "confidence": np.asarray(PAYLOAD["confidence"], dtype="<f4").tobytes()}
+    assert detections.parse_msgpack(msgpack.packb(payload)).lines() == LINES
@@ -0,0 +1,192 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+from config.settings import settings
+from core.documents import (
+    UploadTooLarge,
+    chunk_text,
+    count_chunks,
+    detect_kind,
+    iter_text,
+    spool_upload,
+)
+
+RESUME_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "resume.pdf")
+PARAGRAPH = "FastAPI is a modern web framework for building APIs with Python. " * 3
+
+
+class FakeChatManager:
+    def __init__(self):
+        self.prompts = []
+
+    def chat(self, query, user_name=None, session_id=None, profile=None, **kwargs):
+        self.prompts.append(query)
+        return f"summary {len(self.prompts)}"
+
+
+@pytest.fixture
+def chat_manager(monkeypatch):
+    fake = FakeChatManager()
+    monkeypatch.setattr("routes.chat_routes.chat_manager", fake)
+    return fake
+
+
+def document(paragraphs: int) -> bytes:
+    return "".join(f"## Part {number}\n\n{PARAGRAPH}\n\n" for number in range(paragraphs)).encode()
+
+
+def test_chunks_split_on_paragraphs_and_stay_under_the_limit():
+    chunks = list(chunk_text(iter_text(io.BytesIO(document(20)), block_bytes=100), 1000))
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    # Cuts fall between paragraphs, never inside one
+    assert all(chunk.endswith("Python.") or chunk.splitlines()[-1].startswith("## Part") for chunk in chunks)
+    assert sum(chunk.count("## Part") for chunk in chunks) == 20
+
+
+def test_text_without_separators_is_cut_at_the_limit():
+    assert list(chunk_text(["x" * 25], 10)) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_decoding_survives_split_characters_and_a_bom():
+    data = "﻿café ünïcode".encode("utf-8")
+    assert "".join(iter_text(io.BytesIO(data), block_bytes=3)) == "café ünïcode"
+
+
+def test_count_chunks_stops_after_the_limit_and_rewinds():
+    file = io.BytesIO(document(20))
+    total = len(list(chunk_text(iter_text(file), 500)))
+    file.seek(0)
+    assert count_chunks(file, "text", 500, limit=100) == total
+    assert count_chunks(file, "text", 500, limit=2) == 3
+    assert file.tell() == 0
+
+
+@pytest.mark.parametrize("head, content_type, filename, expected", [
+    (b"%PDF-1.4", "", "", "pdf"),
+    (b"# notes", "text/markdown; charset=utf-8", "", "text"),
+    (b"notes", "application/octet-stream", "notes.bin", "text"),
+    (b"notes", "", "notes.md", "text"),
+])
+def test_detect_kind(head, content_type, filename, expected):
+    assert detect_kind(io.BytesIO(head), content_type, filename) == expected
+
+
+@pytest.mark.parametrize("head, content_type, filename, message", [
+    (b"notes", "application/pdf", "", "not a valid PDF"),
+    (b"\x89PNG\0", "application/octet-stream", "", "Unsupported file type"),
+    (b"<xml/>", "application/xml", "", "Unsupported file type 'application/xml'"),
+])
+def test_detect_kind_rejects(head, content_type, filename, message):
+    with pytest.raises(ValueError, match=message):
+        detect_kind(io.BytesIO(head), content_type, filename)
+
+
+def test_spool_upload_enforces_the_size_limit():
+    async def body(blocks):
+        for block in blocks:
+            yield block
+
+    spooled = asyncio.run(spool_upload(body([b"ab", b"cd"]), max_bytes=4))
+    assert spooled.read() == b"abcd"
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_upload(body([b"ab", b"cde"]), max_bytes=4))
+
+
+def test_upload_is_summarized_chunk_by_chunk(client, chat_manager, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_CHUNK_CHARS", 1000)
+    response = client.post("/summarize/upload?filename=notes.md", content=document(20))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["chunks"] > 1
+    # One call per chunk plus the calls that combine partial summaries
+    assert len(chat_manager.prompts) > body["chunks"]
+    assert body["summary"] == f"summary {len(chat_manager.prompts)}"
+
+
+def test_upload_with_too_many_chunks_is_rejected_before_summarizing(client, chat_manager, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_CHUNK_CHARS", 1000)
+    monkeypatch.setattr(settings, "SUMMARIZE_MAX_CHUNKS", 2)
+    response = client.post("/summarize/upload", content=document(20), headers={"Content-Type": "text/plain"})
+    assert response.status_code == 413
+    assert "longer than 2 chunks" in response.json()["detail"]
+    assert chat_manager.prompts == []
+
+
+def test_upload_size_limit(client, chat_manager, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_UPLOAD_MAX_BYTES", 100)
+    headers = {"Content-Type": "text/plain"}
+    # Rejected from Content-Length, and while streaming when no length is sent
+    assert client.post("/summarize/upload", content=b"x" * 101, headers=headers).status_code == 413
+    streamed = client.post("/summarize/upload", content=iter([b"x" * 60, b"x" * 60]), headers=headers)
+    assert streamed.status_code == 413
+    assert chat_manager.prompts == []
+
+
+@pytest.mark.parametrize("content, content_type, status", [
+    (b"\x89PNG\0\0", "image/png", 422),
+    (b"%PDF-not really", "application/pdf", 422),
+    (b"   \n\n  ", "text/plain", 422),
+])
+def test_invalid_uploads(client, chat_manager, content, content_type, status):
+    response = client.post("/summarize/upload", content=content, headers={"Content-Type": content_type})
+    assert response.status_code == status
+    assert chat_manager.prompts == []
+
+
+def test_multipart_uploads(client, chat_manager, monkeypatch):
+    headers = {"Content-Type": "multipart/form-data; boundary=x"}
+    monkeypatch.setattr("routes.chat_routes.multipart", None)
+    assert client.post("/summarize/upload", content=b"--x--", headers=headers).status_code == 415
+    monkeypatch.setattr("routes.chat_routes.multipart", object())
+    response = client.post("/summarize/upload", content=iter([b"--x--"]), headers=headers)
+    assert response.status_code == 411
+
+
+def test_pdf_text_is_extracted_page_by_page():
+    pytest.importorskip("pypdf")
+    from core.documents import extract_text
+
+    with open(RESUME_PDF, "rb") as f:
+        assert detect_kind(f, "application/pdf", "resume.pdf") == "pdf"
+        pages = list(extract_text(f, "pdf"))
+    assert pages and all(page.endswith("\n\n") for page in pages)
+    assert "INFORMATION TECHNOLOGY" in "".join(pages)
+
+
+def test_pdf_upload_as_the_request_body(client, chat_manager):
+    pytest.importorskip("pypdf")
+    with open(RESUME_PDF, "rb") as f:
+        response = client.post("/summarize/upload?filename=resume.pdf", content=f.read(),
+                               headers={"Content-Type": "application/pdf"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["chunks"] >= 1 and body["characters"] > 1000
+    assert "INFORMATION TECHNOLOGY" in chat_manager.prompts[0]
+
+
+def test_pdf_upload_as_multipart(client, chat_manager):
+    pytest.importorskip("pypdf")
+    pytest.importorskip("multipart")
+    with open(RESUME_PDF, "rb") as f:
+        response = client.post("/summarize/upload", files={"file": ("resume.pdf", f, "application/pdf")})
+    assert response.status_code == 200
+    assert response.json()["characters"] > 1000
+    assert "INFORMATION TECHNOLOGY" in chat_manager.prompts[0]
+
+
+def test_text_upload_as_multipart(client, chat_manager):
+    pytest.importorskip("multipart")
+    response = client.post("/summarize/upload", files={"file": ("notes.md", document(2), "text/markdown")})
+    assert response.status_code == 200
+    assert response.json()["chunks"] == 1
+    assert "## Part 1" in chat_manager.prompts[0]
+
+
+def test_multipart_upload_without_a_file_field(client, chat_manager):
+    pytest.importorskip("multipart")
+    response = client.post("/summarize/upload", data={"note": "no file"},
+                           files={"other": ("notes.md", b"text", "text/markdown")})
+    assert response.status_code == 422
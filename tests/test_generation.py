@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from config.settings import DEFAULT_GENERATION_PROFILES, Settings
+from core.generation import GenerationProfile, classify_query, load_profiles, select_profile
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("hi", "greeting"),
+    ("Thanks a lot!", "greeting"),
+    ("who wrote Hamlet?", "short_answer"),
+    ("how many legs does a spider have", "short_answer"),
+    ("explain how HTTPS keeps traffic private", "long_form"),
+    ("what is the difference between TCP and UDP", "long_form"),
+    ("I can't decide what to cook tonight", "chat"),
+    ("hi " + "x" * 400, "long_form"),
+    ("?!", "chat"),
+])
+def test_classify_query(query, expected):
+    assert classify_query(query) == expected
+
+
+def test_default_profiles_leave_room_for_reasoning():
+    profiles = load_profiles(DEFAULT_GENERATION_PROFILES)
+    # Reasoning tokens count against max_tokens; small caps end before any answer text
+    assert all(profile.max_tokens >= 512 for profile in profiles.values())
+    assert all(profile.reasoning_effort for profile in profiles.values())
+    assert profiles["greeting"].stop is None
+
+
+def test_options_send_reasoning_effort_in_the_body():
+    profile = GenerationProfile("test", 512, 0.5, stop="\n\n", reasoning_effort="low")
+    assert profile.options() == {
+        "max_tokens": 512,
+        "temperature": 0.5,
+        "stop": ["\n\n"],
+        "extra_body": {"reasoning_effort": "low"},
+    }
+    assert "extra_body" not in GenerationProfile("plain", 512, 0.5).options()
+
+
+@pytest.mark.parametrize("options", [
+    {"max_tokens": 0, "temperature": 0.5},
+    {"max_tokens": 64, "temperature": 3},
+    {"max_tokens": 64, "temperature": 0.5, "reasoning_effort": "extreme"},
+    {"max_tokens": 64, "temperature": 0.5, "stop": ["a", "b", "c", "d", "e"]},
+])
+def test_invalid_profiles_are_rejected(options):
+    with pytest.raises(ValueError):
+        load_profiles({"chat": options})
+
+
+def test_overrides_merge_with_the_defaults(monkeypatch):
+    overrides = {"greeting": {"stop": ["\n\n"]}, "chat": {"reasoning_effort": None}, "tiny": {"max_tokens": 64}}
+    monkeypatch.setenv("GENERATION_PROFILES", json.dumps(overrides))
+    profiles = Settings().GENERATION_PROFILES
+    assert profiles["greeting"] == {**DEFAULT_GENERATION_PROFILES["greeting"], "stop": ["\n\n"]}
+    assert "reasoning_effort" not in profiles["chat"]
+    # New profiles start from the chat profile
+    assert profiles["tiny"] == {"max_tokens": 64, "temperature": 0.7}
+
+
+def test_unknown_profile_falls_back_to_chat():
+    profiles = load_profiles(DEFAULT_GENERATION_PROFILES)
+    assert select_profile(profiles, "hello", "missing").name == "chat"
+    assert select_profile(profiles, "hello").name == "greeting"
+
+
+def test_groq_sdk_sends_profile_options_in_the_body():
+    from fastapi.testclient import TestClient
+    from groq import Groq
+
+    from benchmarks.stub_upstream import StubConfig, create_stub_app
+
+    sent = []
+    http_client = TestClient(create_stub_app(StubConfig(seed=1, latency_ms=0, tokens_per_second=0)))
+    http_client.event_hooks["request"] = [lambda request: sent.append(json.loads(request.content))]
+    groq = Groq(api_key="test", base_url="http://testserver", http_client=http_client, max_retries=0)
+    options = GenerationProfile("test", 512, 0.5, reasoning_effort="low").options()
+    groq.chat.completions.create(model="stub", messages=[{"role": "user", "content": "hi"}], **options)
+    assert sent[0]["reasoning_effort"] == "low"
+    assert sent[0]["max_tokens"] == 512
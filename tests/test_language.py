@@ -0,0 +1,38 @@
+import pytest
+
+from config.voice_mapping import DEFAULT_VOICE, KNOWN_LANGUAGES, VOICE_INDEX, select_voice
+from core.language import LanguageDetector, detect_language
+
+
+@pytest.mark.parametrize("text, language", [
+    ("Hello, how are you doing today?", "en"),
+    ("Bonjour, comment allez-vous aujourd'hui?", "fr"),
+    ("Hola, ¿cómo estás hoy?", "es"),
+    ("Guten Tag, wie geht es Ihnen?", "de"),
+    ("नमस्ते, आप कैसे हैं?", "hi"),
+    ("こんにちは、お元気ですか", "ja"),
+])
+def test_detects_common_languages(text, language):
+    detected, confidence = detect_language(text)
+    assert detected == language
+    assert confidence > 0.9
+
+
+@pytest.mark.parametrize("text", ["", "ok", "12345 !!", None])
+def test_short_or_empty_text_gets_the_default(text):
+    assert detect_language(text, default="fr") == ("fr", 0.0)
+
+
+def test_detector_from_custom_samples():
+    detector = LanguageDetector({"aa": "aaaa aaa aa " * 50, "bb": "bbbb bbb bb " * 50})
+    assert detector.detect("bbbbbb bb")[0] == "bb"
+    assert detector.detect("aaa aaaa")[0] == "aa"
+
+
+def test_voice_index_falls_back_per_language_then_default():
+    assert select_voice("hi-IN", "female") == "hi-IN-SwaraNeural"
+    # No male Arabic voice: the language default is used
+    assert select_voice("ar", "male") == VOICE_INDEX[("ar", None)]
+    assert select_voice("zh-CN") == DEFAULT_VOICE
+    assert select_voice(None) == DEFAULT_VOICE
+    assert {"en", "hi", "ja"} <= KNOWN_LANGUAGES
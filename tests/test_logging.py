@@ -0,0 +1,75 @@
+import json
+import logging
+import queue
+import sys
+
+from config.logging_config import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestIdFilter,
+    SamplingFilter,
+    request_id_var,
+)
+
+
+def make_record(name="core.chat", level=logging.INFO, msg="hello", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_keeps_the_configured_fraction():
+    sampler = SamplingFilter(0.25)
+    kept = sum(sampler.filter(make_record()) for _ in range(100))
+    assert kept == 25
+
+
+def test_sampling_never_drops_warnings_unsampled_loggers_or_opt_outs():
+    sampler = SamplingFilter(0.0)
+    assert sampler.filter(make_record(level=logging.WARNING))
+    assert sampler.filter(make_record(name="core.speech"))
+    assert sampler.filter(make_record(sample=False))
+    assert not sampler.filter(make_record())
+
+
+def test_json_formatter_includes_extras_and_request_id():
+    token = request_id_var.set("abc123")
+    try:
+        record = make_record(msg="user %s", status=200)
+        record.args = ("joined",)
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "user joined"
+    assert payload["request_id"] == "abc123"
+    assert payload["status"] == 200
+    assert payload["level"] == "INFO"
+    assert "sample" not in payload
+
+
+def test_dropping_queue_handler_counts_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    before = DroppingQueueHandler.dropped
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.queue.qsize() == 1
+    assert DroppingQueueHandler.dropped == before + 1
+
+
+def test_dropping_queue_handler_formats_exceptions_up_front():
+    handler = DroppingQueueHandler(queue.Queue())
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord("x", logging.ERROR, __file__, 1, "failed %d", (3,), sys.exc_info())
+    prepared = handler.prepare(record)
+    assert prepared.msg == "failed 3" and prepared.args is None
+    assert prepared.exc_info is None and "RuntimeError: boom" in prepared.exc_text
+
+
+def test_request_id_is_echoed_or_generated(client):
+    echoed = client.get("/health", headers={"X-Request-ID": "req-42"})
+    assert echoed.headers["x-request-id"] == "req-42"
+    generated = client.get("/health")
+    assert len(generated.headers["x-request-id"]) == 32
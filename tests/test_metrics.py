@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import metrics
+
+
+def test_counter_labels_and_render():
+    counter = metrics.Counter("test_events_total", "Events.", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('b"c')
+    assert counter.value("a") == 3
+    lines = counter.render()
+    assert 'test_events_total{kind="a"} 3' in lines
+    assert 'test_events_total{kind="b\\"c"} 1' in lines
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_duration_seconds", "Durations.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.render()
+    assert 'test_duration_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{le="1"} 3' in lines
+    assert 'test_duration_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_duration_seconds_sum 6.05" in lines
+    assert "test_duration_seconds_count 4" in lines
+
+
+def test_duplicate_metric_names_are_rejected():
+    with pytest.raises(ValueError):
+        metrics.Counter("myra_rate_limited_total", "Duplicate.")
+
+
+def test_record_usage_reads_fields_from_model_extra():
+    usage = SimpleNamespace(
+        prompt_tokens=120,
+        completion_tokens=30,
+        model_extra={"prompt_tokens_details": {"cached_tokens": 100}},
+    )
+    hits = metrics.CACHE_REQUESTS.value("upstream_prompt", "hit")
+    assert metrics.record_usage(usage) == 100
+    assert metrics.CACHE_REQUESTS.value("upstream_prompt", "hit") == hits + 1
+    assert metrics.record_usage({"prompt_tokens": 5}) is None
+    assert metrics.record_usage(None) is None
+
+
+def test_record_generation_counts_truncated_answers():
+    truncated = metrics.GENERATION_TRUNCATED.value("test")
+    metrics.record_generation("test", 0.2, {"completion_tokens": 64}, "length")
+    metrics.record_generation("test", 0.2, None, "stop")
+    assert metrics.GENERATION_TRUNCATED.value("test") == truncated + 1
+    assert metrics.GENERATION_DURATION.count("test") == 2
+    assert metrics.GENERATION_COMPLETION_TOKENS.count("test") == 1
+
+
+def test_chat_stage_times_the_block():
+    before = metrics.CHAT_STAGE_DURATION.count("test_stage")
+    with metrics.chat_stage("test_stage"):
+        pass
+    assert metrics.CHAT_STAGE_DURATION.count("test_stage") == before + 1
+
+
+def test_metrics_endpoint_exposes_request_histogram(client):
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'myra_http_request_duration_seconds_count{method="GET",route="health",status="200"}' in response.text
@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import middleware
+from api.middleware import RateLimitMiddleware
+from core.state import MemoryStateBackend
+
+
+@pytest.fixture(autouse=True)
+def state(monkeypatch):
+    backend = MemoryStateBackend()
+    monkeypatch.setattr(middleware, "get_state_backend", lambda: backend)
+    return backend
+
+
+def make_client(limit=2, trusted_hops=0):
+    app = FastAPI()
+
+    @app.get("/chat")
+    async def chat():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(RateLimitMiddleware, limit=limit, trusted_hops=trusted_hops)
+    return TestClient(app)
+
+
+def test_requests_over_the_limit_get_429():
+    client = make_client()
+    assert [client.get("/chat").status_code for _ in range(3)] == [200, 200, 429]
+    rejected = client.get("/chat")
+    assert 0 < int(rejected.headers["retry-after"]) <= 60
+    assert rejected.json() == {"detail": "Rate limit exceeded"}
+    assert client.get("/health").status_code == 200
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies():
+    client = make_client()
+    statuses = [client.get("/chat", headers={"X-Forwarded-For": f"10.0.0.{i}"}).status_code for i in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_trusted_hops_pick_the_address_the_proxy_saw():
+    client = make_client(trusted_hops=1)
+    # A client rotating a spoofed first entry is still counted by the proxy-appended one
+    statuses = [
+        client.get("/chat", headers={"X-Forwarded-For": f"1.1.1.{i}, 203.0.113.7"}).status_code for i in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    assert client.get("/chat", headers={"X-Forwarded-For": "203.0.113.8"}).status_code == 200
+
+
+def test_client_key_selection():
+    def scope(forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"headers": headers, "client": ("192.0.2.1", 1234)}
+
+    two_hops = RateLimitMiddleware(None, limit=1, trusted_hops=2)
+    assert two_hops._client(scope("spoofed, 198.51.100.4, 10.0.0.2")) == "198.51.100.4"
+    # Fewer entries than trusted proxies: the request did not come through them
+    assert two_hops._client(scope("10.0.0.2")) == "192.0.2.1"
+    assert RateLimitMiddleware(None, limit=1)._client(scope("198.51.100.4")) == "192.0.2.1"
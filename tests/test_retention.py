@@ -0,0 +1,131 @@
+import io
+import json
+import os
+
+import pytest
+
+from core import retention
+from core.retention import AlreadyMigrated, ArchiveStore, compact, iter_json_array, migrate_chat_log
+from core.state import MemoryStateBackend
+
+
+@pytest.fixture
+def archive(tmp_path):
+    store = ArchiveStore(str(tmp_path / "archive"))
+    yield store
+    store.close()
+
+
+def messages(count, start_at=100.0, prefix="m"):
+    return [
+        {"id": i + 1, "role": "user" if i % 2 == 0 else "assistant", "content": f"{prefix}{i} ✓",
+         "created_at": start_at + i}
+        for i in range(count)
+    ]
+
+
+def test_archive_round_trip_per_session(archive):
+    archive.append("a", messages(3))
+    archive.append("b", messages(2, prefix="b"))
+    archive.append("a", messages(2, start_at=200.0, prefix="late"))
+    assert [m["content"] for m in archive.read_session("a")] == ["m0 ✓", "m1 ✓", "m2 ✓", "late0 ✓", "late1 ✓"]
+    assert [m["session_id"] for m in archive.iter_messages()] == ["a"] * 3 + ["b"] * 2 + ["a"] * 2
+    sessions = {s["session_id"]: s for s in archive.sessions()}
+    assert sessions["a"]["messages"] == 5 and sessions["a"]["last_at"] == 201.0
+    assert archive.archived_through("a") == 3
+    assert archive.archived_through("missing") is None
+
+
+def test_archive_time_filters(archive):
+    archive.append("a", messages(4))
+    assert [m["created_at"] for m in archive.iter_messages("a", since=101, until=103)] == [101, 102]
+
+
+def test_segments_roll_over_and_stay_readable(tmp_path):
+    store = ArchiveStore(str(tmp_path), segment_max_bytes=1)
+    for batch in range(3):
+        store.append("s", messages(2, prefix=f"b{batch}-"))
+    segments = [name for name in os.listdir(tmp_path) if name.startswith("segment-")]
+    assert len(segments) == 3
+    assert len(list(store.read_session("s"))) == 6
+    store.close()
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveStore(str(tmp_path), compression="lz4")
+
+
+def test_compact_archives_idle_and_excess_history(archive):
+    state = MemoryStateBackend()
+    state.append_messages("idle", [dict(m, created_at=0.0) for m in messages(4)])
+    state.append_messages("long", [dict(m, created_at=1000.0) for m in messages(10)])
+    state.append_messages("short", [dict(m, created_at=1000.0) for m in messages(2)])
+    state.set("rate_limit", "old", 1, ttl=-1)
+
+    stats = compact(state, archive, now=1000.0, ttl=500, max_turns=2)
+    assert stats == {"sessions": 3, "ttl": 4, "max_turns": 6, "expired": 1}
+    assert state.get_messages("idle") == []
+    assert [m["content"] for m in state.get_messages("long")] == ["m6 ✓", "m7 ✓", "m8 ✓", "m9 ✓"]
+    assert len(state.get_messages("short")) == 2
+    assert [m["content"] for m in archive.read_session("long")] == [f"m{i} ✓" for i in range(6)]
+    assert len(list(archive.read_session("idle"))) == 4
+
+
+def test_compact_skips_rows_already_archived(archive):
+    state = MemoryStateBackend()
+    state.append_messages("s", [dict(m, created_at=0.0) for m in messages(4)])
+    # A crash after archiving but before deleting leaves the rows in both places
+    archive.append("s", state.oldest_messages("s", 2))
+    compact(state, archive, now=1000.0, ttl=10, max_turns=0)
+    assert [m["content"] for m in archive.read_session("s")] == [f"m{i} ✓" for i in range(4)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_json_array_streams_elements(chunk_size):
+    data = '[{"a": [1, 2]}, "x,]", 12345, true, null]'
+    assert list(iter_json_array(io.StringIO(data), chunk_size)) == [{"a": [1, 2]}, "x,]", 12345, True, None]
+    assert list(iter_json_array(io.StringIO(""), chunk_size)) == []
+
+
+@pytest.mark.parametrize("data", ['{"a": 1}', "[1, 2"])
+def test_iter_json_array_rejects_bad_input(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(data), 4))
+
+
+def test_migrate_chat_log_keeps_recent_turns(tmp_path, archive, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_BATCH", 3)
+    log = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"c{i}"} for i in range(10)]
+    path = tmp_path / "ChatLog.json"
+    path.write_text(json.dumps(log + ["junk", {"role": "user"}]))
+    state = MemoryStateBackend()
+
+    stats = migrate_chat_log(str(path), state, archive, session_id="legacy", keep_turns=2)
+    assert stats == {"read": 10, "skipped": 2, "archived": 6, "kept": 4}
+    assert [m["content"] for m in state.get_messages("legacy")] == ["c6", "c7", "c8", "c9"]
+    assert [m["content"] for m in archive.read_session("legacy")] == [f"c{i}" for i in range(6)]
+    # The source file is left alone
+    assert json.loads(path.read_text())[0] == log[0]
+
+
+def test_migrate_chat_log_refuses_to_import_twice(tmp_path, archive):
+    log = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"c{i}"} for i in range(10)]
+    path = tmp_path / "ChatLog.json"
+    path.write_text(json.dumps(log))
+    state = MemoryStateBackend()
+
+    migrate_chat_log(str(path), state, archive, session_id="legacy", keep_turns=2)
+    # A copy elsewhere, or a touched file, is still the same log
+    copy = tmp_path / "copy.json"
+    copy.write_text(path.read_text())
+    with pytest.raises(AlreadyMigrated, match="already migrated into session 'legacy'"):
+        migrate_chat_log(str(copy), state, archive, session_id="legacy", keep_turns=2)
+    assert len(state.get_messages("legacy")) == 4
+    assert len(list(archive.read_session("legacy"))) == 6
+
+    migrate_chat_log(str(path), state, archive, session_id="legacy", keep_turns=2, force=True)
+    assert len(state.get_messages("legacy")) == 8
+    # A changed log is a different file
+    path.write_text(json.dumps(log + [{"role": "user", "content": "new"}]))
+    assert migrate_chat_log(str(path), state, archive, session_id="other", keep_turns=0)["kept"] == 11
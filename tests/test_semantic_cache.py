@@ -0,0 +1,134 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from core import semantic_cache
+from core.semantic_cache import SemanticCache, normalize, same_question, terms
+
+OWNER = "who is the owner of this bot"
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(threshold=0.75)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Who R U??", "who are you"),
+    ("I can't, it isn’t", "i can not it is not"),
+    ("thx!", "thanks"),
+])
+def test_normalize_expands_shorthand_and_contractions(text, expected):
+    assert normalize(text) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "who is the owner of this bot?",
+    "Who's the owner of this bot",
+    "who is the ownr of this bot",
+    "who is the owner of the bot",
+])
+def test_paraphrases_hit(cache, query):
+    cache.store(OWNER, "Shivansh built me.")
+    assert cache.lookup(query) == "Shivansh built me."
+
+
+def test_shorthand_paraphrase_hits(cache):
+    cache.store("who are you", "I am Myra.")
+    assert cache.lookup("who are u?") == "I am Myra."
+    assert cache.lookup("Who r u") == "I am Myra."
+
+
+@pytest.mark.parametrize("query", [
+    "who is not the owner of this bot",
+    "who isn't the owner of this bot",
+])
+def test_similar_text_with_a_different_meaning_misses(cache, query, caplog):
+    cache.store(OWNER, "Shivansh built me.")
+    caplog.set_level(logging.INFO, logger="core.semantic_cache.review")
+    assert cache.lookup(query) is None
+    assert "Semantic cache rejected" in caplog.text
+
+
+def test_substituted_content_word_misses(cache):
+    cache.store("what is the capital of france", "Paris")
+    assert cache.lookup("what is the capital of spain") is None
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("who won the world cup in 2018", "who won the world cup in 2014"),
+    ("what is the square root of 1024", "what is the square root of 1025"),
+    ("what is 1234 times 5678", "what is 1234 times 5679"),
+    ("what was the population of india in 2019", "what was the population of india in 2018"),
+    ("who is the president of france", "who is the president of frances"),
+])
+def test_numbers_and_word_endings_must_match(cache, stored, query):
+    cache.store(stored, "cached answer")
+    assert cache.lookup(query) is None
+
+
+def test_negated_query_is_cached_on_its_own(cache):
+    cache.store(OWNER, "Shivansh built me.")
+    cache.store("who is not the owner of this bot", "Everyone else.")
+    assert cache.lookup("who isn't the owner of this bot?") == "Everyone else."
+    assert cache.lookup(OWNER) == "Shivansh built me."
+
+
+def test_same_question_requires_matching_negation_and_content():
+    assert same_question(terms("who are you"), terms("who are you please"))
+    assert not same_question(terms("who are you"), terms("where are you"))
+    assert not same_question(terms("is it safe"), terms("is it not safe"))
+
+
+def test_time_sensitive_and_long_queries_are_not_cached(cache):
+    cache.store("what is the weather today", "Sunny")
+    cache.store("x" * 400, "long")
+    assert len(cache) == 0
+    assert cache.lookup("what is the weather today") is None
+
+
+def test_entries_expire_and_are_evicted(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(semantic_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    cache = SemanticCache(ttl=10, max_entries=2)
+    cache.store("who are you", "Myra")
+    clock.now = 11
+    assert cache.lookup("who are you") is None
+    for query in ("first question here", "second question here", "third question here"):
+        cache.store(query, query)
+    assert len(cache) == 2
+    assert cache.lookup("first question here") is None
+    assert cache.lookup("third question here") == "third question here"
+
+
+def test_first_turns_are_served_from_the_cache(monkeypatch):
+    from core.chat import ChatManager
+    from core.state import MemoryStateBackend
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        choice = SimpleNamespace(message=SimpleNamespace(content="I am Myra."), finish_reason="stop")
+        return SimpleNamespace(choices=[choice], usage=None)
+
+    manager = ChatManager()
+    manager.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    manager.state = MemoryStateBackend()
+    manager.semantic_cache = SemanticCache()
+
+    assert manager.chat("who are you", session_id="tab-1", cacheable=True) == "I am Myra."
+    assert manager.chat("who are u?", session_id="tab-2", cacheable=True) == "I am Myra."
+    assert len(calls) == 1
+    # The cached answer is stored as the new session's first turn
+    assert manager.state.get_messages("tab-2")[1] == {"role": "assistant", "content": "I am Myra."}
+    # Later turns depend on the conversation and always go upstream
+    manager.chat("who are you", session_id="tab-2", cacheable=True)
+    assert len(calls) == 2
+
+
+def test_ui_sends_a_per_tab_session_id(client):
+    page = client.get("/").text
+    assert "sessionStorage.setItem('sessionId', sessionId)" in page
+    assert "sessionId: sessionId" in page
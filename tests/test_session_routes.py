@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import routes.session_routes as session_routes
+from config.settings import settings
+from core.retention import ArchiveStore
+from core.state import MemoryStateBackend
+
+KEY = "history-key"
+AUTH = {"Authorization": f"Bearer {KEY}"}
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    state = MemoryStateBackend()
+    archive = ArchiveStore(str(tmp_path / "archive"))
+    monkeypatch.setattr(session_routes, "get_state_backend", lambda: state)
+    monkeypatch.setattr(session_routes, "get_archive_store", lambda: archive)
+    monkeypatch.setattr(settings, "HISTORY_API_KEY", KEY)
+    state.append_messages("s1", [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}", "created_at": 1000.0 + i}
+        for i in range(5)
+    ])
+    state.append_messages("s2", [{"role": "user", "content": "other", "created_at": 2000.0}])
+    archive.append("s1", [{"role": "user", "content": "archived", "created_at": 500.0}])
+    yield state
+    archive.close()
+
+
+@pytest.mark.parametrize("path", ["/sessions/s1/messages", "/sessions/export"])
+def test_history_is_disabled_without_a_key(client, history, monkeypatch, path):
+    monkeypatch.setattr(settings, "HISTORY_API_KEY", None)
+    response = client.get(path, headers=AUTH)
+    assert response.status_code == 403
+    assert "m0" not in response.text
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}, {"Authorization": KEY}])
+def test_history_rejects_missing_or_wrong_keys(client, history, headers):
+    assert client.get("/sessions/s1/messages", headers=headers).status_code == 401
+    assert client.get("/sessions/export", headers=headers).status_code == 401
+
+
+def test_pages_follow_the_cursor(client, history):
+    first = client.get("/sessions/s1/messages", params={"limit": 2}, headers=AUTH).json()
+    assert [m["content"] for m in first["messages"]] == ["m0", "m1"]
+    assert first["messages"][0]["createdAt"].startswith("1970-01-01T00:16:40")
+    contents = [m["content"] for m in first["messages"]]
+    cursor = first["nextCursor"]
+    while cursor:
+        page = client.get("/sessions/s1/messages", params={"limit": 2, "cursor": cursor}, headers=AUTH).json()
+        contents += [m["content"] for m in page["messages"]]
+        cursor = page["nextCursor"]
+    assert contents == ["m0", "m1", "m2", "m3", "m4"]
+
+
+def test_pages_in_descending_order(client, history):
+    page = client.get("/sessions/s1/messages", params={"limit": 3, "order": "desc"}, headers=AUTH).json()
+    assert [m["content"] for m in page["messages"]] == ["m4", "m3", "m2"]
+    rest = client.get("/sessions/s1/messages", params={"order": "desc", "cursor": page["nextCursor"]},
+                      headers=AUTH).json()
+    assert [m["content"] for m in rest["messages"]] == ["m1", "m0"]
+    assert rest["nextCursor"] is None
+
+
+@pytest.mark.parametrize("params", [{"cursor": "!!!"}, {"limit": 0}, {"order": "sideways"}])
+def test_invalid_page_parameters(client, history, params):
+    assert client.get("/sessions/s1/messages", params=params, headers=AUTH).status_code in (400, 422)
+
+
+def test_export_streams_archived_then_live_history(client, history):
+    response = client.get("/sessions/export", params={"session_id": "s1"}, headers=AUTH)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["content"] for line in lines] == ["archived", "m0", "m1", "m2", "m3", "m4"]
+    assert lines[0]["archived"] is True and lines[0]["id"] is None
+    assert all(line["sessionId"] == "s1" for line in lines)
+
+
+def test_export_filename_uses_the_session_id(client, history):
+    response = client.get("/sessions/export", params={"session_id": "s1"}, headers=AUTH)
+    assert response.headers["content-disposition"] == 'attachment; filename="history-s1.ndjson"'
+
+
+@pytest.mark.parametrize("session_id, fallback, encoded", [
+    ("日本", "history-__.ndjson", "history-%E6%97%A5%E6%9C%AC.ndjson"),
+    ('a"b', "history-a_b.ndjson", "history-a%22b.ndjson"),
+    ("a\r\nSet-Cookie: x=1", "history-a__Set-Cookie__x_1.ndjson", "history-a%0D%0ASet-Cookie%3A%20x%3D1.ndjson"),
+])
+def test_export_filename_is_safe_for_any_session_id(client, history, session_id, fallback, encoded):
+    history.append_messages(session_id, [{"role": "user", "content": "hi", "created_at": 3000.0}])
+    response = client.get("/sessions/export", params={"session_id": session_id}, headers=AUTH)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == \
+        f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{encoded}"
+    assert "set-cookie" not in response.headers
+    assert [json.loads(line)["sessionId"] for line in response.text.splitlines()] == [session_id]
+
+
+def test_export_time_range_and_live_only(client, history):
+    params = {"since": "1970-01-01T00:16:41Z", "until": "1970-01-01T00:16:43Z", "include_archived": "false"}
+    lines = client.get("/sessions/export", params=params, headers=AUTH).text.splitlines()
+    assert [json.loads(line)["content"] for line in lines] == ["m1", "m2"]
+    bad = {"since": "1970-01-02T00:00:00Z", "until": "1970-01-01T00:00:00Z"}
+    assert client.get("/sessions/export", params=bad, headers=AUTH).status_code == 400
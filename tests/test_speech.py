@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import routes.speech_routes as speech_routes
+from core import speech
+from core.speech import AudioCache, SpeechService, StubSynthesizer, create_synthesizer, split_sentences
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    service = SpeechService(StubSynthesizer(seconds_per_char=0), AudioCache(str(tmp_path), 1 << 20), concurrency=2)
+    monkeypatch.setattr(speech_routes, "get_speech_service", lambda: service)
+    return service
+
+
+def test_split_sentences_merges_short_and_wraps_long():
+    assert split_sentences("Hi. Ok. This sentence is long enough to stand alone.") == \
+        ["Hi. Ok. This sentence is long enough to stand alone."]
+    chunks = split_sentences("word, " * 100, max_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert split_sentences("こんにちは。元気ですか？今日はいい天気ですね。散歩に行きましょう。")
+
+
+def test_missing_edge_tts_is_an_error_not_a_stub(monkeypatch):
+    monkeypatch.setattr(speech, "edge_tts", None)
+    with pytest.raises(RuntimeError):
+        create_synthesizer("edge")
+    assert isinstance(create_synthesizer("stub"), StubSynthesizer)
+    with pytest.raises(ValueError):
+        create_synthesizer("espeak")
+
+
+def test_audio_cache_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345" and cache.total_bytes == 10
+    # The index is rebuilt from disk on restart
+    assert AudioCache(str(tmp_path), max_bytes=10).total_bytes == 10
+
+
+def test_stream_yields_sentences_in_order_and_caches(service):
+    text = "The first sentence is here. The second sentence follows it."
+
+    async def collect():
+        return [chunk async for chunk in service.stream(text, "en-US-JennyNeural")]
+
+    first = asyncio.run(collect())
+    assert len(first) == 2
+    synthesize = service.synthesizer.synthesize
+    service.synthesizer.synthesize = None  # Any synthesis now would fail
+    try:
+        assert asyncio.run(collect()) == first
+    finally:
+        service.synthesizer.synthesize = synthesize
+
+
+def test_speak_streams_audio_with_voice_headers(client, service):
+    response = client.post("/speak", json={"text": "Namaste. Aap kaise hain?", "language": "hi-IN", "gender": "female"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["x-voice"] == "hi-IN-SwaraNeural"
+    assert response.headers["x-language"] == "hi-IN"
+    assert response.content
+
+
+@pytest.mark.parametrize("language", ["zh-CN", "auto", "EN"])
+def test_speak_accepts_known_languages(client, service, language):
+    assert client.post("/speak", json={"text": "Hello there, how are you?", "language": language}).status_code == 200
+
+
+@pytest.mark.parametrize("language", ["日本語", "xx", "en-US\r\nX-Evil: 1", "english"])
+def test_speak_rejects_unknown_languages(client, service, language):
+    response = client.post("/speak", json={"text": "Hello", "language": language})
+    assert response.status_code == 422
+
+
+def test_speak_rejects_unknown_voice(client, service):
+    assert client.post("/speak", json={"text": "Hello", "voice": "robot"}).status_code == 400
+
+
+def test_speak_is_unavailable_without_an_engine(client, monkeypatch):
+    def unavailable():
+        raise RuntimeError("The edge-tts package is required for TTS_ENGINE=edge")
+
+    monkeypatch.setattr(speech_routes, "get_speech_service", unavailable)
+    assert client.post("/speak", json={"text": "Hello"}).status_code == 503
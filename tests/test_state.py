@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import state as state_module
+from core.state import MemoryStateBackend, SQLiteStateBackend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(state_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, clock):
+    if request.param == "memory":
+        backend = MemoryStateBackend()
+    else:
+        backend = SQLiteStateBackend(str(tmp_path / "state.db"))
+    yield backend
+    backend.close()
+
+
+def stored_keys(backend):
+    if isinstance(backend, MemoryStateBackend):
+        return len(backend._values)
+    with backend._transaction() as conn:
+        return conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+
+def test_values_expire_after_their_ttl(backend, clock):
+    backend.set("cache", "a", {"answer": 42}, ttl=10)
+    backend.set("cache", "b", [1, 2])
+    assert backend.get("cache", "a") == {"answer": 42}
+    clock.now += 11
+    assert backend.get("cache", "a") is None
+    assert backend.get("cache", "a", "gone") == "gone"
+    assert backend.get("cache", "b") == [1, 2]
+    backend.delete("cache", "b")
+    assert backend.get("cache", "b") is None
+
+
+def test_incr_keeps_the_ttl_from_creation(backend, clock):
+    assert backend.incr("rate_limit", "ip:1", 1, 60) == 1
+    clock.now += 59
+    assert backend.incr("rate_limit", "ip:1", 2, 60) == 3
+    clock.now += 2
+    assert backend.incr("rate_limit", "ip:1", 1, 60) == 1
+
+
+def test_purge_expired_deletes_only_expired_rows(backend, clock):
+    for window in range(5):
+        backend.incr("rate_limit", f"ip:{window}", 1, 60)
+    backend.set("flags", "forever", True)
+    clock.now += 61
+    backend.incr("rate_limit", "ip:fresh", 1, 60)
+    assert stored_keys(backend) == 7
+    assert backend.purge_expired() == 5
+    assert stored_keys(backend) == 2
+    assert backend.get("flags", "forever") is True
+    assert backend.purge_expired() == 0
+
+
+def test_writes_purge_expired_rows_periodically(backend, clock):
+    backend.PURGE_EVERY_WRITES = 4
+    for window in range(3):
+        backend.incr("rate_limit", f"old:{window}", 1, 60)
+    clock.now += 61
+    assert stored_keys(backend) == 3
+    # The fourth write triggers a purge of the three expired windows
+    backend.set("cache", "new", 1, ttl=60)
+    assert stored_keys(backend) == 1
+
+
+def test_messages_round_trip_and_limit(backend):
+    backend.append_messages("s1", [{"role": "user", "content": f"m{i}"} for i in range(5)])
+    backend.append_messages("s2", [{"role": "user", "content": "other"}])
+    assert [m["content"] for m in backend.get_messages("s1")] == ["m0", "m1", "m2", "m3", "m4"]
+    assert [m["content"] for m in backend.get_messages("s1", limit=2)] == ["m3", "m4"]
+    assert backend.get_messages("missing") == []
+    sessions = {s["session_id"]: s["messages"] for s in backend.list_sessions()}
+    assert sessions == {"s1": 5, "s2": 1}
+
+
+def test_oldest_and_delete_messages(backend):
+    backend.append_messages("s", [{"role": "user", "content": f"m{i}"} for i in range(4)])
+    oldest = backend.oldest_messages("s", 2)
+    assert [m["content"] for m in oldest] == ["m0", "m1"]
+    backend.delete_messages("s", oldest[-1]["id"])
+    assert [m["content"] for m in backend.get_messages("s")] == ["m2", "m3"]
+    backend.clear_session("s")
+    assert backend.get_messages("s") == []
+
+
+def test_message_page_filters_and_iterates(backend, clock):
+    backend.append_messages("a", [{"role": "user", "content": "a0"}])
+    clock.now += 10
+    backend.append_messages("b", [{"role": "user", "content": "b0"}, {"role": "assistant", "content": "b1"}])
+    page = backend.message_page(limit=2)
+    assert [m["content"] for m in page] == ["a0", "b0"]
+    assert [m["content"] for m in backend.message_page(after_id=page[-1]["id"])] == ["b1"]
+    assert [m["content"] for m in backend.message_page(since=1005)] == ["b0", "b1"]
+    assert [m["content"] for m in backend.message_page(until=1005)] == ["a0"]
+    assert [m["content"] for m in backend.message_page("b", descending=True)] == ["b1", "b0"]
+    assert [m["content"] for m in backend.iter_messages(batch_size=1)] == ["a0", "b0", "b1"]
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from groq import Groq
+
+from benchmarks.harness import percentile, summarize_latencies
+from benchmarks.stub_upstream import PrefixCache, StubConfig, create_stub_app
+
+COMPLETIONS = "/openai/v1/chat/completions"
+
+
+def stub_client(**options):
+    options.setdefault("latency_ms", 0)
+    options.setdefault("tokens_per_second", 0)
+    return TestClient(create_stub_app(StubConfig(seed=1, **options)))
+
+
+def test_completion_respects_max_tokens_and_reports_usage():
+    client = stub_client(completion_tokens=50)
+    body = client.post(COMPLETIONS, json={"messages": [{"role": "user", "content": "x" * 40}], "max_tokens": 8}).json()
+    assert body["usage"] == {"prompt_tokens": 10, "completion_tokens": 8, "total_tokens": 18}
+    assert len(body["choices"][0]["message"]["content"].split()) == 8
+    assert client.get("/health").json()["completion_tokens"] == 8
+
+
+def test_streaming_ends_with_usage_and_done():
+    client = stub_client(completion_tokens=3)
+    response = client.post(COMPLETIONS, json={"messages": [{"role": "user", "content": "hi"}], "stream": True})
+    events = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks).split() == \
+        ["the", "quick", "brown"]
+    assert chunks[-1]["x_groq"]["usage"]["completion_tokens"] == 3
+
+
+def test_error_injection():
+    client = stub_client(error_rate=1.0, error_status=503)
+    response = client.post(COMPLETIONS, json={"messages": []})
+    assert response.status_code == 503
+    assert client.get("/health").json()["errors"] == 1
+
+
+def test_groq_sdk_parses_stub_responses():
+    groq = Groq(api_key="test", base_url="http://testserver", http_client=stub_client(completion_tokens=4),
+                max_retries=0)
+    completion = groq.chat.completions.create(model="stub", messages=[{"role": "user", "content": "hello"}])
+    assert completion.choices[0].finish_reason == "stop"
+    assert completion.choices[0].message.content == "the quick brown fox"
+    assert completion.usage.completion_tokens == 4
+
+
+def test_prefix_cache_counts_whole_blocks():
+    cache = PrefixCache(block_tokens=4)
+    system = {"role": "system", "content": "s" * 40}
+    assert cache.lookup_and_store([system, {"role": "user", "content": "a"}]) == 0
+    # The shared system message (10 tokens) is cached, rounded down to a block
+    assert cache.lookup_and_store([system, {"role": "user", "content": "b"}]) == 8
+
+
+@pytest.mark.parametrize("dist", ["fixed", "uniform", "lognormal"])
+def test_sampled_latency_is_non_negative(dist):
+    config = StubConfig(latency_ms=100, latency_dist=dist, seed=3)
+    samples = [config.sample_latency() for _ in range(200)]
+    assert min(samples) >= 0
+    if dist == "fixed":
+        assert set(samples) == {0.1}
+
+
+def test_summarize_latencies():
+    result = summarize_latencies([0.3, 0.1, 0.2], errors=1, elapsed=2.0)
+    assert result["requests"] == 4
+    assert result["throughput_rps"] == 1.5
+    assert result["latency_ms"]["p50"] == 200.0
+    assert result["latency_ms"]["max"] == 300.0
+    assert percentile([], 50) is None
+    assert summarize_latencies([], 0, 1.0)["latency_ms"]["p99"] is None